@@ -1,17 +1,39 @@
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
 import subprocess
 import os
 import json
 from datetime import datetime
 import time
 import re
+import asyncio
 from tkinter import messagebox
 from datetime import datetime, timedelta
-from item_manager import Expired, ExpiringSoon, InStock, Shopping, DefaultList
+from item_manager import Expired, ExpiringSoon, InStock, Shopping, DefaultList, UserSnapshot, clear_decrypt_caches
+from item_manager import metrics, timed, MetricsExporter, lambda_resilience
+from envelope_encryption import EnvelopeCipher
+from change_channel import ChangeChannel
+from offline_store import OfflineStore
+from async_item_manager import AsyncItemManager, AsyncDefaultListManager, TkAsyncBridge
+from list_views import VirtualTreeview, name_row
+from refresh_worker import RefreshWorker, RefreshResult, DRAIN_INTERVAL, REFRESH_INTERVAL, IDLE_REFRESH_INTERVAL
+from expiry_scheduler import ExpiryScheduler
+from notifications import NotificationManager
+from asset_cache import load_image
+from message_bus import BusClient, RECOGNIZE_REQUEST, RECOGNITION_RESULT, GUI_CLOSED, LOGGED_OUT
 import sys
 
+# Encrypt amounts locally with one cached KMS data key per session instead of
+# one KMS call per amount (needs the 'cryptography' package on the Jetson)
+USE_ENVELOPE_ENCRYPTION = False
+
+# Lambda/KMS call statistics, rewritten every minute (use a .prom name for Prometheus text format)
+METRICS_FILE = "fridge_metrics.json"
+
+# Keep the lists in a local SQLite file (offline_store.py): reads and writes are
+# local and a background worker syncs them with Lambda, also after being offline
+OFFLINE_FIRST = True
+
 root = tk.Tk()
 root.title("Smart Refrigerator")
 root.geometry("1024x600")
@@ -32,11 +54,54 @@ if not user_name:
     exit()
 
 # Initialize ItemManager instances with the user's name
-Is = InStock("in_stock_list", user_name)
-es = ExpiringSoon("expiring_soon_list", user_name)
-ex = Expired("expired_list", user_name)
-sh = Shopping("shopping_list", user_name)
-default_list = DefaultList(user_name)
+envelope = EnvelopeCipher() if USE_ENVELOPE_ENCRYPTION else None
+if OFFLINE_FIRST:
+    # Same methods as the ItemManagers, served from the local replica; on a first
+    # run the lists are pulled in the background instead of before the buttons show
+    offline_store = OfflineStore(user_name, envelope=envelope).start(initial_pull=False)
+    Is = offline_store.list_manager("in_stock_list")
+    es = offline_store.list_manager("expiring_soon_list")
+    ex = offline_store.list_manager("expired_list")
+    sh = offline_store.list_manager("shopping_list")
+    default_list = offline_store.default_list()
+else:
+    offline_store = None
+    Is = InStock("in_stock_list", user_name, envelope=envelope)
+    es = ExpiringSoon("expiring_soon_list", user_name, envelope=envelope)
+    ex = Expired("expired_list", user_name, envelope=envelope)
+    sh = Shopping("shopping_list", user_name, envelope=envelope)
+    default_list = DefaultList(user_name)
+
+    # Fetch all five lists with one Lambda call instead of one call per list; the
+    # change channel's first poll does that in the background
+    snapshot = UserSnapshot(user_name, lambda_client=Is.lambda_client)
+    snapshot.register(Is, es, ex, sh, default_list)
+
+# Awaitable views of the same managers: list writes run on the bridge's thread
+# pool and report back on the Tk thread, so a Lambda call never freezes the touchscreen
+bridge = TkAsyncBridge(root)
+a_Is, a_sh, a_ex = (AsyncItemManager(manager=manager) for manager in (Is, sh, ex))
+a_default_list = AsyncDefaultListManager(manager=default_list)
+
+# Moves items to expiring soon / expired as their dates come
+expiry_scheduler = ExpiryScheduler(Is, es, ex, sh)
+
+# Expiry checks and list reads run on their own thread so Lambda calls never
+# freeze the touchscreen; it is started once the list views exist
+refresh_worker = RefreshWorker(lambda: refresh_tick(), interval=IDLE_REFRESH_INTERVAL)
+
+# Changes made elsewhere (e.g. the Android app) are pushed to the fridge and
+# picked up by the next refresh tick, started right away
+def notify_list_changes(list_names):
+    refresh_worker.request()
+
+if offline_store is not None:
+    change_channel = offline_store.channel
+    offline_store.add_listener(notify_list_changes)
+else:
+    change_channel = ChangeChannel(snapshot, on_change=notify_list_changes).start()
+
+metrics_exporter = MetricsExporter(METRICS_FILE).start()
 
 if os.path.exists("current_user.txt"):
     os.remove("current_user.txt")
@@ -62,8 +127,13 @@ root.bind("<Escape>", exit_fullscreen)
 button_frame = tk.Frame(root, bg='#f0f0f0')
 button_frame.grid(row=1, column=0, columnspan=2, pady=10, sticky='n')
 
-recognized_item_path = "recognized_item.txt"
-recognition_terminated_path = "recognition_terminated.txt"
+# Recognition requests go to management.py over the message bus; the results
+# are queued there and shown by periodic_update on the Tk thread. Connecting
+# waits while management.py starts the bus, so it is done off the Tk thread.
+bus = BusClient()
+bus.subscribe(RECOGNITION_RESULT)
+bus.connect_in_background()
+pending_recognition = None  # out flag of the request waiting for its result, or None
 
 # Translation list
 translation_list = {
@@ -92,40 +162,32 @@ def on_enter(e, button, color):
 def on_leave(e, button, color):
     button['background'] = color
 
-def inform_management():
-    # Function to inform the management file when the "In" button is clicked
-    with open("management_signal.txt", "w") as signal_file:
-        signal_file.write("In button clicked")
+def inform_management(out=False):
+    # Ask management.py to run the classifier; the result comes back as a RECOGNITION_RESULT
+    global pending_recognition
+    if not bus.publish(RECOGNIZE_REQUEST, direction="out" if out else "in"):
+        messagebox.showerror("Recognition", "The recognition service is not running.")
+        return
+    pending_recognition = out
+    disable_main_gui()  # Until the result is confirmed or declined
 
 def in_button_click():
-    if os.path.exists(recognition_terminated_path):
-        os.remove(recognition_terminated_path)
     inform_management()
-    while not os.path.exists("recognition_terminated.txt"):
-        time.sleep(0.1)  # Check every 100 milliseconds
-
-    display_recognized_item()
 
 def out_button_click():
-    if os.path.exists(recognition_terminated_path):
-        os.remove(recognition_terminated_path)
-    inform_management()
-    while not os.path.exists("recognition_terminated.txt"):
-        time.sleep(0.1)  # Check every 100 milliseconds
+    inform_management(out=True)
 
-    display_recognized_item(out=True)
+def apply_bus_message(message):
+    global pending_recognition
+    if message.type == RECOGNITION_RESULT and pending_recognition is not None:
+        out, pending_recognition = pending_recognition, None
+        display_recognized_item(message.fields["item"], out)
 
-def display_recognized_item(out=False):
-    if os.path.exists(recognized_item_path):
-        with open(recognized_item_path, "r") as file:
-            recognized_item = file.read().strip()
+def display_recognized_item(recognized_item, out=False):
+    if recognized_item:
         confirmation_window(recognized_item, out)
     else:
         confirmation_window("No recognized item found.", out)
-    
-    # Delete the recognition_terminated.txt file if it exists
-    if os.path.exists(recognition_terminated_path):
-        os.remove(recognition_terminated_path)
 
 def confirmation_window(recognized_item, out):
     disable_main_gui()
@@ -166,9 +228,33 @@ def is_valid_item_name(item_name):
     if len(item_name) > 50:
         return False
     # Check if the item name is in the list of valid refrigerator items (case-insensitive)
-    existing_items = Is.get_items()
-    lower_item_name = item_name.lower()
-    return lower_item_name in [item['name'].lower() for item in existing_items]
+    return Is.find_item(item_name) is not None
+
+def run_in_background(coroutine, action, on_done=None):
+    # Called back on the Tk thread; the list on screen follows with the next refresh tick
+    def done(result):
+        refresh_worker.request()
+        if on_done is not None:
+            on_done()
+
+    def failed(error):
+        messagebox.showerror("Not Saved", f"{action} failed: {error}")
+
+    bridge.submit(coroutine, callback=done, errback=failed)
+
+async def store_item(item_name, amount, expiration_date, entry_date, metric):
+    # The three lists are independent, so their writes run concurrently
+    with timed(metric):
+        await asyncio.gather(a_Is.add_item(item_name, amount, expiration_date, entry_date),
+                             a_sh.remove_item_by_name(item_name),
+                             a_ex.remove_item_by_name(item_name))
+
+async def take_out(item_name, amount, metric):
+    # Decrease the item's amount in stock, expiring soon and expired lists,
+    # moving it to the shopping list when it runs out (one round-trip);
+    # without an amount all of it is taken out
+    with timed(metric):
+        return await a_Is.apply_transition(item_name, amount)
 
 def remove_manually():
     item_name = ask_for_input("Please enter the item name", center_confirm=True, validate_name=True)
@@ -182,34 +268,14 @@ def remove_manually():
         amount = ask_for_input("Please enter the quantity to remove from the refrigerator", skip_allowed=True, validate_amount=True,remove_item=True)
 
         if amount.lower() == "skip" :
-            # If user skips entering the amount
-            Is.remove_item_by_name(translated_item)
-            es.remove_item_by_name(translated_item)
-            ex.remove_item_by_name(translated_item)
-            if not sh.has_item(translated_item):
-                sh.add_item(translated_item, "1", "N/A", datetime.now().strftime("%d/%m/%Y"))
+            # If user skips entering the amount, take all of it out
+            run_in_background(take_out(translated_item, None, "remove_manually"), f"Taking out '{translated_item}'")
         else:
             amount = int(amount)
             if amount <= 0 or amount >= 20:
                 messagebox.showerror("Invalid Amount", "Amount must be a positive integer less than 20.")
                 return
-
-            # Decrease the item's amount in stock list
-            current_amount = int(Is.get_item_amount(translated_item))
-            new_amount = current_amount - amount
-
-            if new_amount <= 0:
-                Is.remove_item_by_name(translated_item)
-                if ex.has_item(translated_item):
-                    ex.remove_item_by_name(translated_item)
-                if es.has_item(translated_item):
-                    es.remove_item_by_name(translated_item)    
-                if not sh.has_item(translated_item):
-                    sh.add_item(translated_item, "1", "N/A", datetime.now().strftime("%d/%m/%Y"))
-            else:
-                Is.update_item(translated_item, new_amount)
-                es.update_item(translated_item, new_amount)
-                ex.update_item(translated_item, new_amount)
+            run_in_background(take_out(translated_item, amount, "remove_manually"), f"Taking out '{translated_item}'")
 
     close_confirmation()
     
@@ -240,10 +306,8 @@ def add_manually():
         if expiration_date == "skip" or expiration_date == "":
             expiration_date = (datetime.now() + timedelta(days=10)).strftime("%d/%m/%Y")
         entry_date = datetime.now().strftime("%d/%m/%Y")
-        Is.add_item(translated_item, amount, expiration_date, entry_date)
-        sh.remove_item_by_name(translated_item)
-        ex.remove_item_by_name(translated_item)
-        update_defaulListBox(default_treeview)
+        run_in_background(store_item(translated_item, amount, expiration_date, entry_date, "add_manually"),
+                          f"Adding '{translated_item}'", on_done=lambda: update_defaulListBox(default_treeview))
         close_confirmation()
 
 def confirm_in(recognized_item, source=None):
@@ -262,9 +326,8 @@ def confirm_in(recognized_item, source=None):
     if expiration_date == "skip" or expiration_date == "":
         expiration_date = (datetime.now() + timedelta(days=10)).strftime("%d/%m/%Y")
     entry_date = datetime.now().strftime("%d/%m/%Y")
-    Is.add_item(translated_item, amount, expiration_date, entry_date)
-    sh.remove_item_by_name(translated_item)
-    ex.remove_item_by_name(translated_item)
+    run_in_background(store_item(translated_item, amount, expiration_date, entry_date, "confirm_in"),
+                      f"Adding '{translated_item}'")
     close_confirmation()
 
 def confirm_out(recognized_item):
@@ -280,44 +343,20 @@ def confirm_out(recognized_item):
     amount = ask_for_input("Please enter the quantity to remove from the refrigerator", skip_allowed=True, validate_amount=True,remove_item=True)
 
     if amount.lower() == "skip" :
-        # If user skips entering the amount
-        Is.remove_item_by_name(translated_item)
-        es.remove_item_by_name(translated_item)
-        ex.remove_item_by_name(translated_item)
-        if not sh.has_item(translated_item):
-            sh.add_item(translated_item, "1", "N/A", datetime.now().strftime("%d/%m/%Y"))
+        # If user skips entering the amount, take all of it out
+        run_in_background(take_out(translated_item, None, "confirm_out"), f"Taking out '{translated_item}'")
     else:
         amount = int(amount)
         if amount <= 0 or amount >= 20:
             messagebox.showerror("Invalid Amount", "Amount must be a positive integer less than 20.")
             return
-
-        # Decrease the item's amount in stock list
-        current_amount = int(Is.get_item_amount(translated_item))
-        new_amount = current_amount - amount
-
-        if new_amount <= 0:
-            Is.remove_item_by_name(translated_item)
-            if ex.has_item(translated_item):
-                    ex.remove_item_by_name(translated_item)
-            if es.has_item(translated_item):
-                es.remove_item_by_name(translated_item)
-            if not sh.has_item(translated_item):
-                sh.add_item(translated_item, "1", "N/A", datetime.now().strftime("%d/%m/%Y"))
-        else:
-            Is.update_item(translated_item, new_amount)
-            es.update_item(translated_item, new_amount)
-            ex.update_item(translated_item, new_amount)
+        run_in_background(take_out(translated_item, amount, "confirm_out"), f"Taking out '{translated_item}'")
 
     close_confirmation()
 
 def close_confirmation():
     enable_main_gui()
 
-def get_recognized_item():
-    with open(recognized_item_path, "r") as file:
-        return file.read().strip()
-
 def ask_for_input(prompt, placeholder="", skip_allowed=False, center_confirm=False, validate_name=False, validate_amount=False, validate_date=False, source=None, remove_item=False,skipingExpiriationDate=False):
     # Open the on-screen keyboard with error handling
     try:
@@ -432,129 +471,85 @@ def decline():
     close_confirmation()
 
 def update_InStockList(treeview):
-    for row in treeview.get_children():
-        treeview.delete(row)
-    items = Is.get_items()
-    for item in items:
-        treeview.insert("", "end", values=(item['name'], item['amount'], item['expiration_date'], item['entry_date']))
+    list_views[treeview].update(Is.get_item_list())
 
 def update_expringSoonListBox(treeview):
-    for row in treeview.get_children():
-        treeview.delete(row)
-    items = es.get_items()
-    for item in items:
-        treeview.insert("", "end", values=(item['name'], item['amount'], item['expiration_date'], item['entry_date']))
+    list_views[treeview].update(es.get_item_list())
 
 def update_shoppingistBox(treeview):
-    for row in treeview.get_children():
-        treeview.delete(row)
-    items = sh.get_items()
-    for item in items:
-        shopping_list_treeview.insert("", "end", values=(item['name'], item['amount'], item['expiration_date'], item['entry_date']))
+    list_views[treeview].update(sh.get_item_list())
 
 def update_expiredListBox(treeview):
-    for row in treeview.get_children():
-        treeview.delete(row)
-    items = ex.get_items()
-    for item in items:
-        treeview.insert("", "end", values=(item['name'], item['amount'], item['expiration_date'], item['entry_date']))
+    list_views[treeview].update(ex.get_item_list())
 
 def update_defaulListBox(treeview):
-    for row in treeview.get_children():
-        treeview.delete(row)
-    default_items = default_list.get_items()  # Fetch default items from DynamoDB
-    for item in default_items:
-        treeview.insert("", "end", values=(item,))  # Insert the item name directly
-
-def update_expiring_soon():
-    today = datetime.now().date()
-    in_stock_items = Is.get_items()
-    expiring_soon_items = es.get_items()
-
-    for item in in_stock_items:
-        expiration_date = item["expiration_date"]
-        entry_date = datetime.strptime(item["entry_date"], "%d/%m/%Y").date()
-
-        if expiration_date.lower() == "n/a":
-            expiration_date = entry_date + timedelta(days=10)
-        else:
-            expiration_date = datetime.strptime(expiration_date, "%d/%m/%Y").date()
-
-        days_until_expiration = (expiration_date - today).days
-
-        if 0 < days_until_expiration <= 5:
-            already_in_expiring_soon = any(
-                es_item["name"] == item["name"] and 
-                es_item["expiration_date"] == item["expiration_date"] 
-                for es_item in expiring_soon_items
-            )
-            if already_in_expiring_soon:
-                continue
-            else:
-                show_notification(f"Item '{item['name']}' is expiring soon !", font_color="orange")
-            es.add_item(
-                    item["name"],
-                    item["amount"],
-                    item["expiration_date"],
-                    item["entry_date"]
-                )
-
-def check_and_move_expired_items():
-    today = datetime.now().date()
-    expiring_soon_items = es.get_items()
-    expired_items = ex.get_items()
-    items_to_remove = []
-
-    for es_item in expiring_soon_items:
-        expiration_date = es_item["expiration_date"]
-        entry_date = datetime.strptime(es_item["entry_date"], "%d/%m/%Y").date()
-
-        if expiration_date.lower() == "n/a":
-            expiration_date = entry_date + timedelta(days=10)
-        else:
-            expiration_date = datetime.strptime(expiration_date, "%d/%m/%Y").date()
-
-        if today >= expiration_date:
-            if not any(
-                expired_item["name"] == es_item["name"] and 
-                expired_item["amount"] == es_item["amount"] and 
-                expired_item["expiration_date"] == es_item["expiration_date"]
-                for expired_item in expired_items
-            ):
-                ex.add_item(
-                    es_item["name"],
-                    es_item["amount"],
-                    es_item["expiration_date"],
-                    es_item["entry_date"]
-                )
-                sh.add_item(
-                    es_item["name"],
-                    es_item["amount"],
-                    es_item["expiration_date"],
-                    es_item["entry_date"]
-                )
-                # Show notification for expired item
-                show_notification(f"Item '{es_item['name']}' has expired!", font_color="red")
-
-            items_to_remove.append(es_item)
-
-    for item in items_to_remove:
-        es.remove_item(
-            item["name"],
-            item["amount"],
-            item["expiration_date"]
-        )
+    list_views[treeview].update(default_list.get_items())  # Default items from DynamoDB
+
+visible_list = None  # Name of the list on screen, set on the Tk thread by show_list
+posted_lists = {}  # list_name -> items last handed to the Tk thread
+
+def lists_loaded():
+    # Reading a list before the first snapshot arrived would fetch it on its own
+    return offline_store is not None or snapshot.has_lists()
+
+item_list_managers = {"in_stock_list": Is, "expiring_soon_list": es, "expired_list": ex, "shopping_list": sh}
+
+def read_list(list_name):
+    if list_name == "default_list":
+        return default_list.get_items()
+    return item_list_managers[list_name].get_item_list()
+
+def refresh_tick():
+    # Runs on the refresh worker thread: manager calls only, no Tk. Only the list
+    # on screen is read; hidden lists are loaded when show_list asks for them.
+    start = time.perf_counter()
+    if not lists_loaded():
+        return None
+    expiry = expiry_scheduler.run()  # Only does work when a date is due or a list changed
+    lists = ()
+    list_name = visible_list
+    if list_name is not None:
+        items = read_list(list_name)
+        if items is not posted_lists.get(list_name):
+            posted_lists[list_name] = items
+            lists = ((list_name, items),)
+    if not lists and not expiry.notifications:
+        return None  # Nothing changed since the last tick, nothing for Tk to do
+    return RefreshResult(lists, expiry.notifications, time.perf_counter() - start)
+
+def set_visible_list(treeview):
+    # Called on the Tk thread whenever a list is shown or all lists are hidden
+    global visible_list
+    visible_list = treeview_lists.get(treeview)
+    refresh_worker.interval = REFRESH_INTERVAL if visible_list is not None else IDLE_REFRESH_INTERVAL
+    if visible_list is not None:
+        refresh_worker.request()  # Load it now rather than on the next tick
+
+def apply_refresh(result):
+    # Runs on the Tk thread with the result of a refresh tick
+    for kind, item_name in result.notifications:
+        notifications.notify(kind, item_name)
+    for list_name, items in result.lists:
+        list_views[list_treeviews[list_name]].update(items)
 
 def periodic_update():
-    update_expiring_soon()
-    check_and_move_expired_items()
-    update_expiredListBox(expired_treeview)
-    update_expringSoonListBox(expiring_soon_treeview)
-    update_shoppingistBox(shopping_list_treeview)
-    update_InStockList(in_stock_treeview)
-    update_defaulListBox(default_treeview)  # Update the default list periodically
-    
-    root.after(1000, periodic_update)  # Call the function every 60 seconds (60000 milliseconds)
+    tick_started = time.perf_counter()
+    if refresh_worker.drain(apply_refresh):
+        metrics.observe("gui", "periodic_update", time.perf_counter() - tick_started)
+    bus.drain(apply_bus_message)
+    update_connection_status()
+    root.after(DRAIN_INTERVAL, periodic_update)
+
+def update_connection_status():
+    # While the circuit breaker is open the lists shown are the last ones loaded
+    if offline_store is not None and not offline_store.online:
+        notification_label.config(text=f"Offline - {offline_store.pending_count()} changes waiting to sync")
+        notification_label.grid()
+    elif lambda_resilience.breaker.is_open:
+        notification_label.config(text="Offline - showing saved lists")
+        notification_label.grid()
+    else:
+        notification_label.grid_remove()
 
 def update_default_list(item_name):
     # Add item to default list in DynamoDB (if applicable)
@@ -577,6 +572,7 @@ def hide_all_lists():
     for treeview in treeviews:
         treeview.grid_remove()
     list_close_button.grid_remove()
+    set_visible_list(None)
 
 def hide_main_gui_buttons():
     in_button.grid_remove()
@@ -608,15 +604,10 @@ def enable_main_gui():
     out_button.config(state="normal")
     advanced_options_button.config(state="normal")
 
-# Load and resize images
-def load_image(path, size):
-    img = Image.open(path)
-    img = img.resize(size, Image.Resampling.LANCZOS)
-    return ImageTk.PhotoImage(img)
-
 def show_list(treeview):
     hide_advanced_options()  # Hide the advanced options list
     treeview.grid(row=1, column=0, columnspan=2, sticky='nsew')
+    set_visible_list(treeview)
     if treeview == default_treeview:
         scrollbar_DF.grid(row=1, column=2, sticky='ns')
     if treeview == in_stock_treeview:
@@ -656,8 +647,9 @@ def add_item_to_default_list():
         if item_name in existing_items:
             tk.messagebox.showerror("Duplicate Item", f"Item '{item_name}' is already in the default list.")
             return
-        default_list.add_item(item_name)  # Add the item to the default list in DynamoDB
-        update_defaulListBox(default_treeview)  # Refresh the default list view
+        # Add the item to the default list in DynamoDB, then refresh the default list view
+        run_in_background(a_default_list.add_item(item_name), f"Adding '{item_name}' to the default list",
+                          on_done=lambda: update_defaulListBox(default_treeview))
 
 
 def remove_item_from_default_list():
@@ -668,8 +660,9 @@ def remove_item_from_default_list():
         if item_name not in existing_items:
             tk.messagebox.showerror("Item doesn't exist", f"Item '{item_name}' isn't in the default list.")
             return
-        default_list.remove_item(item_name)  # Add the item to the default list in DynamoDB
-        update_defaulListBox(default_treeview)  # Refresh the default list view
+        # Remove the item from the default list in DynamoDB, then refresh the default list view
+        run_in_background(a_default_list.remove_item(item_name), f"Removing '{item_name}' from the default list",
+                          on_done=lambda: update_defaulListBox(default_treeview))
 
 
 def center_treeview(treeview):
@@ -686,52 +679,8 @@ def is_valid_date(date_str):
     except ValueError:
         return False
 
-notification_count = 0  # Global counter for notifications
-
-def show_notification(message, duration=6000, font_color="black"):
-    global notification_count
-
-    notification_window = tk.Toplevel(root)
-    notification_window.title("Notification")
-    window_width = 450
-    window_height = 40
-    
-    # Screen resolution
-    screen_width = 1024
-    screen_height = 600
-    
-    # Calculate the position for the notification window
-    notification_x = screen_width - window_width
-    notification_y = notification_count * (window_height + 10)  # Stagger notifications vertically
-    
-    # Ensure the notifications do not go off-screen
-    if notification_y + window_height > screen_height:
-        notification_y = screen_height - window_height
-
-    notification_window.geometry(f"{window_width}x{window_height}+{notification_x}+{notification_y}")
-    notification_window.overrideredirect(True)  # Remove window decorations
-    notification_window.attributes("-topmost", True)  # Ensure it stays on top
-
-    # Load the image
-    image = Image.open("icons/expired.png")
-    image = image.resize((30, 30),Image.Resampling.LANCZOS)  # Resize the image to fit the window
-    image_tk = ImageTk.PhotoImage(image)
-
-    # Enlarge the font size and make it bold
-    large_font = ("Helvetica", 16, "bold")
-
-    # Create the label
-    notification_label = tk.Label(notification_window, text=message, font=large_font, bg="#f0f0f0", fg=font_color, image=image_tk, compound='left', padx=10, pady=10, wraplength=window_width-70)
-    notification_label.image = image_tk  # Keep a reference to avoid garbage collection
-    notification_label.pack(expand=True, fill=tk.BOTH)
-
-    def hide_notification():
-        global notification_count
-        notification_window.destroy()
-        notification_count -= 1  # Decrement the counter when the notification is hidden
-
-    notification_window.after(duration, hide_notification)
-    notification_count += 1  # Increment the counter when a new notification is shown
+# One overlay for all notifications; events of the same tick are summarized
+notifications = NotificationManager(root, icon=load_image("icons/expired.png", (30, 30)))
 
 icon_size = (64, 64)
 button_size = (160, 160)
@@ -826,6 +775,24 @@ shopping_list_treeview.grid_remove()
 scrollbar_SL = ttk.Scrollbar(root, orient="vertical", command=shopping_list_treeview.yview)
 shopping_list_treeview.configure(yscrollcommand=scrollbar_SL.set)
 
+# Only the rows in view exist in Tk (the expired and shopping lists keep
+# growing); they are changed where the lists differ from what is shown
+list_views = {
+    default_treeview: VirtualTreeview(default_treeview, name_row, scrollbar=scrollbar_DF),
+    in_stock_treeview: VirtualTreeview(in_stock_treeview, scrollbar=scrollbar_IS),
+    expiring_soon_treeview: VirtualTreeview(expiring_soon_treeview, scrollbar=scrollbar_ES),
+    expired_treeview: VirtualTreeview(expired_treeview, scrollbar=scrollbar_E),
+    shopping_list_treeview: VirtualTreeview(shopping_list_treeview, scrollbar=scrollbar_SL)
+}
+list_treeviews = {
+    "in_stock_list": in_stock_treeview,
+    "expiring_soon_list": expiring_soon_treeview,
+    "expired_list": expired_treeview,
+    "shopping_list": shopping_list_treeview,
+    "default_list": default_treeview
+}
+treeview_lists = {treeview: list_name for list_name, treeview in list_treeviews.items()}
+
 # Renamed close button for list content
 list_close_button = tk.Button(root, text="Close", command=close_list, bg="#f44336", fg="white", font=BUTTON_FONT, relief=tk.FLAT, bd=0)
 list_close_button.grid(row=0, column=1, sticky='ne')
@@ -863,46 +830,20 @@ def add_scrollbar(treeview):
     scrollbar.grid(row=1, column=2, sticky='ns')
     return scrollbar
 
-# Load in-stock items from in_stock list
-def load_in_stock_items():
-    items = Is.get_items()
-    for item in items:
-        in_stock_treeview.insert("", "end", values=(item['name'], item['amount'], item['expiration_date'], item['entry_date']))
-
-# Load in-stock items from expiring_soon
-def load_expiring_soon_items():
-    items = es.get_items()
-    for item in items:
-        expiring_soon_treeview.insert("", "end", values=(item['name'], item['amount'], item['expiration_date'], item['entry_date']))
-
-def load_expired_items():
-    items = ex.get_items()
-    for item in items:
-        expired_treeview.insert("", "end", values=(item['name'], item['amount'], item['expiration_date'], item['entry_date']))
-
-def load_shopping_items():
-    items = sh.get_items()
-    for item in items:
-        shopping_list_treeview.insert("", "end", values=(item['name'], item['amount'], item['expiration_date'], item['entry_date']))
-
-load_in_stock_items()
-load_expiring_soon_items()
-load_expired_items()
-load_shopping_items()
-
-def load_default_items():
-    for row in default_treeview.get_children():
-        default_treeview.delete(row)
-    default_items = default_list.get_items()  # Fetch default items from DynamoDB
-    for item in default_items:
-        default_treeview.insert("", "end", values=(item,))  # Insert the item name directly
-
-load_default_items()
+# The lists are filled when first shown (show_list), not at startup
+refresh_worker.start()
 
 def on_closing():
-    # Create a signal file to indicate that GUI.py has closed
-    with open("GUI_closed.txt", "w") as f:
-        f.write("GUI closed")
+    # Tell InitialGUI.py and management.py that GUI.py has closed
+    bus.publish(GUI_CLOSED)
+    refresh_worker.stop()
+    bridge.close()
+    if offline_store is not None:
+        offline_store.close()
+    else:
+        change_channel.stop()
+    metrics_exporter.stop()
+    bus.close()
     root.destroy()  # Close the GUI window
 
 # Bind the "X" button to the on_closing function
@@ -912,12 +853,23 @@ def logout():
     # Ask for confirmation
     response = messagebox.askyesno("Log Out", "Are you sure you want to log out?")
     if response:
-        with open("GUI_logged_out.txt", "w") as f:
-                f.write("GUI_logged_out")
+        # Forget decrypted amounts and data keys of the user that is logging out
+        clear_decrypt_caches()
+        if envelope is not None:
+            envelope.clear()
+        bus.publish(LOGGED_OUT)
         global gui_process
         time.sleep(2)
         gui_process = subprocess.Popen(["python3.8", "management.py"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         time.sleep(2)
+        refresh_worker.stop()
+        bridge.close()
+        if offline_store is not None:
+            offline_store.close()
+        else:
+            change_channel.stop()
+        metrics_exporter.stop()
+        bus.close()
         root.destroy()
 
 # Add the logout button
@@ -926,5 +878,5 @@ logout_button = tk.Button(root, image=logout_img, command=logout, bg="#f0f0f0",
 logout_button.image = logout_img  # Keep a reference to avoid garbage collection
 logout_button.place(x=10, y=530)  # Position the button in the bottom-left corner
 
-root.after(1000, periodic_update) 
+root.after(DRAIN_INTERVAL, periodic_update)
 root.mainloop()
\ No newline at end of file
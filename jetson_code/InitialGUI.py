@@ -1,6 +1,5 @@
 import tkinter as tk
 from tkinter import messagebox
-from PIL import Image, ImageTk
 import boto3
 from botocore.exceptions import ClientError
 import hmac
@@ -8,9 +7,9 @@ import hashlib
 import base64
 import json
 import subprocess
-import os
 import time
-import threading
+from asset_cache import load_image
+from message_bus import BusClient, GUI_CLOSED, LOGGED_OUT
 
 # Cognito Configuration
 AWS_REGION = ''  # Replace with your AWS region
@@ -141,26 +140,17 @@ def login(username, password):
         else:
             messagebox.showerror("Login Failed", error_message)
 
-# Function to check if GUI.py has closed
-def check_gui_closed():
-    while True:
-        if os.path.exists("GUI_closed.txt"):
-            # Delete the GUI_closed.txt file
-            os.remove("GUI_closed.txt")
-            # Create a signal file to indicate that InitialGUI.py has closed
-            with open("initial_gui_closed.txt", "w") as f:
-                f.write("InitialGUI closed")
-            root.destroy()  # Close the InitialGUI window
-            break
-        time.sleep(1)  # Check every second
-
-def check_gui_logged_out():
-    while True:
-        if os.path.exists("GUI_logged_out.txt"):
-            os.remove("GUI_logged_out.txt")
-            root.destroy()  # Close the InitialGUI window
-            break
-        time.sleep(0.1)  # Check every second
+# Messages from GUI.py arrive on the bus client's thread; Tk is only touched
+# from its own thread, so the window is closed from there
+def on_gui_closed(message):
+    root.after(0, root.destroy)  # Close the InitialGUI window; management.py got the message too
+
+def on_gui_logged_out(message):
+    root.after(0, root.destroy)  # Close the InitialGUI window
+
+bus = BusClient()
+bus.subscribe(GUI_CLOSED, on_gui_closed)
+bus.subscribe(LOGGED_OUT, on_gui_logged_out)
 
 # Function to open the on-screen keyboard
 def open_on_screen_keyboard():
@@ -206,19 +196,11 @@ def main():
     root.title("Smart Refrigerator")
     root.geometry("1024x600")  # Adjusted window size to 1024x600
 
-    # Start the check_gui_closed function in a separate thread
-    gui_check_thread = threading.Thread(target=check_gui_closed)
-    gui_check_thread.daemon = True  # Ensure the thread terminates when the main program exits
-    gui_check_thread.start()
-
-    gui_logged_check_thread = threading.Thread(target=check_gui_logged_out)
-    gui_logged_check_thread.daemon = True  # Ensure the thread terminates when the main program exits
-    gui_logged_check_thread.start()
+    # Listen for GUI.py closing or logging out
+    bus.connect_in_background()  # Waits while management.py starts the bus
 
     # Load background image
-    bg_image = Image.open("icons/background.jpeg")
-    bg_image = bg_image.resize((1024, 600), Image.Resampling.LANCZOS)  # Resize to fit the window size
-    bg_photo = ImageTk.PhotoImage(bg_image)
+    bg_photo = load_image("icons/background.jpeg", (1024, 600))  # Resized to fit the window size
 
     # Add background image as a Label
     background_label = tk.Label(root, image=bg_photo)
@@ -238,9 +220,7 @@ def main():
     title_label = tk.Label(title_frame, text="Login", font=("Helvetica", 22, "bold"), fg="#333", bg="#f2f2f2")
     
     # Load and resize the image to fit next to "Login"
-    smart_img = Image.open("icons/smart.png")
-    smart_img = smart_img.resize((90, 90), Image.Resampling.LANCZOS)  # Resize the image to make it bigger
-    smart_img_photo = ImageTk.PhotoImage(smart_img)
+    smart_img_photo = load_image("icons/smart.png", (90, 90))  # Resize the image to make it bigger
     image_label = tk.Label(title_frame, image=smart_img_photo, bg="#f2f2f2")
 
     # Pack the title and image side by side
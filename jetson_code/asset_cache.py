@@ -0,0 +1,129 @@
+import hashlib
+import os
+import tkinter as tk
+
+from PIL import Image, ImageTk
+
+# Images of the GUI and the login screen, resized once. Both screens used to
+# open the PNG/JPEG files in icons/ and resize them with LANCZOS on every
+# launch, the 1024x600 background included. The resized image is written to
+# ASSET_CACHE_DIR in the format of its source, keyed by (path, size, mtime) so
+# an edited icon is resized again: JPEG photos stay JPEG (a fraction of the size
+# of the same photo as PNG) and are decoded by PIL, icons stay PNG with their
+# transparency and Tk reads them itself. In a process every (path, size)
+# is loaded once and the PhotoImage is shared by all the screens that show it.
+
+ASSET_CACHE_DIR = "asset_cache"
+RESAMPLE = Image.Resampling.LANCZOS
+JPEG_QUALITY = 90
+JPEG_EXTENSIONS = (".jpg", ".jpeg")
+
+_photos = {}  # (Tk interpreter, path, size, mtime) -> PhotoImage
+
+
+def entry_format(path):
+    """Format an image is cached in: "JPEG" for JPEG sources (photos), "PNG" for the rest."""
+    return "JPEG" if os.path.splitext(path)[1].lower() in JPEG_EXTENSIONS else "PNG"
+
+
+def _entry_path(path, size, mtime_ns, cache_dir):
+    source = os.path.abspath(path)
+    prefix = hashlib.sha1(source.encode()).hexdigest()[:12]
+    key = hashlib.sha1(f"{source}|{size[0]}x{size[1]}|{mtime_ns}".encode()).hexdigest()[:12]
+    extension = ".jpg" if entry_format(path) == "JPEG" else ".png"
+    return os.path.join(cache_dir, f"{prefix}-{size[0]}x{size[1]}-{key}{extension}")
+
+
+def _remove_stale(entry, cache_dir):
+    # Older entries of the same image and size, left by an earlier mtime
+    prefix, size, _ = os.path.basename(entry).split("-")
+    for name in os.listdir(cache_dir):
+        if name.startswith(f"{prefix}-{size}-") and name != os.path.basename(entry):
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+
+
+def resize(path, size):
+    """The image at path resized to size, the way load_image always did it."""
+    image = Image.open(path)
+    return image.resize(size, RESAMPLE)
+
+
+def cached_file(path, size, cache_dir=ASSET_CACHE_DIR):
+    """
+    Path of the cache entry holding the image at path resized to size,
+    resizing and writing it first if there is none for the file's mtime.
+
+    Args:
+        path (str): Image file, e.g. "icons/in.png".
+        size (tuple): (width, height) in pixels.
+        cache_dir (str): Directory of the entries.
+
+    Returns:
+        str: Path of a JPEG or PNG (see entry_format) of exactly that size.
+    """
+    size = tuple(size)
+    entry = _entry_path(path, size, os.stat(path).st_mtime_ns, cache_dir)
+    if os.path.exists(entry):
+        return entry
+
+    image = resize(path, size)
+    image_format = entry_format(path)
+    if image_format == "JPEG":
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        options = {"quality": JPEG_QUALITY}
+    else:
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or "A" in image.mode else "RGB")
+        options = {"compress_level": 6}  # Written once, read on every launch
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_path = f"{entry}.{os.getpid()}.tmp"
+    image.save(temp_path, format=image_format, **options)
+    os.replace(temp_path, entry)  # A screen starting meanwhile never reads half a file
+    _remove_stale(entry, cache_dir)
+    return entry
+
+
+def load_image(path, size, master=None, cache_dir=ASSET_CACHE_DIR):
+    """
+    PhotoImage of the image at path resized to size, shared within the process.
+
+    Args:
+        path (str): Image file, e.g. "icons/in.png".
+        size (tuple): (width, height) in pixels.
+        master: Widget whose Tk interpreter shows the image (default: the root window).
+        cache_dir (str): Directory of the resized images.
+
+    Returns:
+        PhotoImage: Keep a reference as long as a widget shows it, as before.
+    """
+    size = tuple(size)
+    interpreter = (master or tk._default_root).tk
+    key = (interpreter, os.path.abspath(path), size, os.stat(path).st_mtime_ns)
+    photo = _photos.get(key)
+    if photo is not None:
+        return photo
+
+    try:
+        entry = cached_file(path, size, cache_dir)
+    except OSError as e:
+        print(f"Error caching image {path}: {e}")
+        photo = ImageTk.PhotoImage(resize(path, size), master=master)
+    else:
+        if entry_format(path) == "JPEG":
+            photo = ImageTk.PhotoImage(Image.open(entry), master=master)  # Tk has no JPEG reader
+        else:
+            try:
+                photo = tk.PhotoImage(master=master, file=entry)
+            except tk.TclError:
+                photo = ImageTk.PhotoImage(Image.open(entry), master=master)  # Tk without PNG support (before 8.6)
+    _photos[key] = photo
+    return photo
+
+
+def clear():
+    """Forget the PhotoImages of this process; the files on disk are kept."""
+    _photos.clear()
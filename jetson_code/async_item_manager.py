@@ -0,0 +1,221 @@
+import asyncio
+import functools
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from item_manager import ItemManager, DefaultListManager, UserSnapshot
+
+# Threads that run the blocking boto3 calls behind the async managers
+ASYNC_WORKERS = 8
+
+# How often the Tk bridge checks for finished operations (milliseconds)
+TK_POLL_INTERVAL = 50
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the thread pool shared by all async managers, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=ASYNC_WORKERS, thread_name_prefix="item-manager")
+        return _executor
+
+
+class _AsyncWrapper:
+    """
+    Runs the methods of a synchronous manager in a thread pool.
+
+    Calls on the same wrapper run one at a time, in the order they were awaited,
+    so writes to one list never race on its cache. Calls on different wrappers
+    run concurrently.
+    """
+
+    def __init__(self, manager, executor=None):
+        self.manager = manager
+        self.executor = executor
+        self._lock = None  # Created inside the event loop (asyncio.Lock binds to a loop on Python 3.8)
+
+    @property
+    def list_name(self):
+        return self.manager.list_name
+
+    @property
+    def user_name(self):
+        return self.manager.user_name
+
+    async def _run(self, method, *args, **kwargs):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        loop = asyncio.get_event_loop()
+        async with self._lock:
+            return await loop.run_in_executor(self.executor or get_executor(),
+                                              functools.partial(method, *args, **kwargs))
+
+
+class AsyncItemManager(_AsyncWrapper):
+    """Awaitable version of ItemManager; the wrapped manager keeps working for synchronous callers."""
+
+    def __init__(self, list_name=None, user_name=None, manager=None, executor=None, **kwargs):
+        if manager is None:
+            manager = ItemManager(list_name, user_name, **kwargs)
+        super().__init__(manager, executor)
+
+    async def get_items(self):
+        return await self._run(self.manager.get_items)
+
+    async def add_item(self, name, amount=None, expiration_date=None, entry_date=None):
+        return await self._run(self.manager.add_item, name, amount, expiration_date, entry_date)
+
+    async def remove_item_by_name(self, name):
+        return await self._run(self.manager.remove_item_by_name, name)
+
+    async def update_item(self, name, new_amount):
+        return await self._run(self.manager.update_item, name, new_amount)
+
+    async def apply_transition(self, name, amount=None, entry_date=None):
+        return await self._run(self.manager.apply_transition, name, amount, entry_date)
+
+    async def has_item(self, name, verify=False):
+        return await self._run(self.manager.has_item, name, verify)
+
+    async def get_item_amount(self, name):
+        return await self._run(self.manager.get_item_amount, name)
+
+    def find_item(self, name):
+        """Look the name up in the cached items; never calls a Lambda, so it is not awaitable."""
+        return self.manager.find_item(name)
+
+
+class AsyncDefaultListManager(_AsyncWrapper):
+    """Awaitable version of DefaultListManager."""
+
+    def __init__(self, user_name=None, manager=None, executor=None, **kwargs):
+        if manager is None:
+            manager = DefaultListManager(user_name, **kwargs)
+        super().__init__(manager, executor)
+
+    async def get_items(self):
+        return await self._run(self.manager.get_items)
+
+    async def add_item(self, item_name):
+        return await self._run(self.manager.add_item, item_name)
+
+    async def remove_item(self, item_name):
+        return await self._run(self.manager.remove_item, item_name)
+
+
+class AsyncUserSnapshot(_AsyncWrapper):
+    """Awaitable version of UserSnapshot."""
+
+    def __init__(self, user_name=None, manager=None, executor=None, **kwargs):
+        if manager is None:
+            manager = UserSnapshot(user_name, **kwargs)
+        super().__init__(manager, executor)
+
+    def register(self, *managers):
+        """Register sync or async list managers to be filled by refresh."""
+        self.manager.register(*[getattr(m, 'manager', m) for m in managers])
+        return self
+
+    async def refresh(self):
+        return await self._run(self.manager.refresh)
+
+
+async def get_all_items(*managers):
+    """
+    Fetch several lists concurrently.
+
+    Args:
+        *managers: AsyncItemManager or AsyncDefaultListManager instances.
+
+    Returns:
+        list: The items of each manager, in the order the managers were given.
+    """
+    return await asyncio.gather(*[manager.get_items() for manager in managers])
+
+
+class TkAsyncBridge:
+    """
+    Runs coroutines on a background event loop and hands their results back to Tk.
+
+    Tk may only be touched from the thread running mainloop, so finished
+    operations are queued and their callbacks are run from root.after.
+
+        bridge = TkAsyncBridge(root)
+        bridge.submit(get_all_items(a_is, a_es), callback=refresh_treeviews)
+    """
+
+    def __init__(self, root, poll_interval=TK_POLL_INTERVAL):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._results = queue.Queue()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="tk-async-bridge", daemon=True)
+        self._thread.start()
+        self._after_id = self.root.after(self.poll_interval, self._drain)
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def submit(self, coroutine, callback=None, errback=None):
+        """
+        Schedule a coroutine without blocking the Tk main loop.
+
+        Args:
+            coroutine: The coroutine to run on the background loop.
+            callback: Called on the Tk thread with the coroutine's result.
+            errback: Called on the Tk thread with the exception if the coroutine raised.
+                Without one the error is printed.
+
+        Returns:
+            concurrent.futures.Future: The future of the scheduled coroutine.
+        """
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        future.add_done_callback(lambda done: self._results.put((done, callback, errback)))
+        return future
+
+    def call(self, function, *args, callback=None, errback=None):
+        """Run a blocking function (e.g. a sync manager method) in the shared thread pool."""
+        async def run():
+            return await self._loop.run_in_executor(get_executor(), functools.partial(function, *args))
+        return self.submit(run(), callback, errback)
+
+    def post(self, function, *args):
+        """Run function(*args) on the Tk thread; safe to call from any thread."""
+        done = Future()
+        done.set_result(None)
+        self._results.put((done, lambda _: function(*args), None))
+
+    def _drain(self):
+        while True:
+            try:
+                future, callback, errback = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if future.cancelled():
+                continue
+            error = future.exception()
+            try:
+                if error is not None:
+                    if errback is not None:
+                        errback(error)
+                    else:
+                        print(f"Background operation failed: {error}")
+                elif callback is not None:
+                    callback(future.result())
+            except Exception as e:
+                print(f"Error in background operation callback: {e}")
+        self._after_id = self.root.after(self.poll_interval, self._drain)
+
+    def close(self):
+        """Stop the background loop and the polling of results."""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=1)
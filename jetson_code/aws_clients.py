@@ -0,0 +1,121 @@
+import threading
+import boto3
+from botocore.config import Config
+
+# One botocore client per (service, region) for the whole process. Creating a
+# client loads the service model and resolves credentials, and every client has
+# its own connection pool, so the list managers share them instead of each
+# building its own.
+
+# Region per service; None uses the default from the AWS config/environment
+SERVICE_REGIONS = {
+    "lambda": None,
+    "kms": "eu-north-1"
+}
+
+# Enough connections for the parallel decryption workers (item_manager.MAX_DECRYPT_WORKERS)
+# plus the threads running the calls' attempts (resilience.MAX_CONCURRENT_CALLS)
+MAX_POOL_CONNECTIONS = 16
+CONNECT_TIMEOUT = 3  # Seconds
+READ_TIMEOUT = 10  # Seconds, Lambda calls include the function's run time
+TCP_KEEPALIVE = True
+RETRY_MODE = "adaptive"  # Client-side rate limiting on throttling errors
+MAX_ATTEMPTS = 1  # No botocore retries, resilience.ResilientCaller retries within a deadline
+
+
+def client_config(**overrides):
+    """
+    Build the botocore Config used for all clients.
+
+    Args:
+        **overrides: Config options replacing the module defaults, e.g. read_timeout=5.
+
+    Returns:
+        botocore.config.Config: The client configuration.
+    """
+    settings = {
+        "max_pool_connections": MAX_POOL_CONNECTIONS,
+        "connect_timeout": CONNECT_TIMEOUT,
+        "read_timeout": READ_TIMEOUT,
+        "tcp_keepalive": TCP_KEEPALIVE,
+        "retries": {"mode": RETRY_MODE, "max_attempts": MAX_ATTEMPTS}
+    }
+    settings.update(overrides)
+    try:
+        return Config(**settings)
+    except TypeError:
+        # botocore releases before 1.27 have no tcp_keepalive option
+        settings.pop("tcp_keepalive", None)
+        return Config(**settings)
+
+
+class ClientRegistry:
+    """Creates boto3 clients on first use and hands out the same client afterwards."""
+
+    def __init__(self, session=None, config=None, endpoint_url=None):
+        self.session = session  # boto3 Session; created on first use if None
+        self.config = config or client_config()
+        self.endpoint_url = endpoint_url  # Override for all services, e.g. a local test server
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get(self, service_name, region_name=None, **config):
+        """
+        Return the shared client for a service, creating it if needed.
+
+        Config overrides (e.g. read_timeout=30 for long polls) get a client of
+        their own, shared by every caller asking for the same overrides.
+        """
+        region_name = region_name or SERVICE_REGIONS.get(service_name)
+        key = (service_name, region_name, tuple(sorted(config.items())))
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        # Sessions are not thread-safe, so clients are created under the lock
+        with self._lock:
+            if key not in self._clients:
+                if self.session is None:
+                    self.session = boto3.session.Session()
+                self._clients[key] = self.session.client(
+                    service_name,
+                    region_name=region_name,
+                    endpoint_url=self.endpoint_url,
+                    config=self.config.merge(Config(**config)) if config else self.config
+                )
+            return self._clients[key]
+
+    def clear(self):
+        """Forget all clients; the next get creates new ones."""
+        with self._lock:
+            self._clients.clear()
+
+
+_registry = ClientRegistry()
+_registry_lock = threading.Lock()
+
+
+def get_client(service_name, region_name=None, **config):
+    """Return the process-wide client for a service (e.g. 'lambda' or 'kms')."""
+    return _registry.get(service_name, region_name, **config)
+
+
+def configure_clients(session=None, endpoint_url=None, **config):
+    """
+    Replace the process-wide registry, e.g. to change timeouts or point at a test endpoint.
+
+    Clients already handed out keep working but are no longer shared with new managers.
+
+    Args:
+        session: boto3 Session to create clients from.
+        endpoint_url: Endpoint used for every service instead of the AWS default.
+        **config: botocore Config options, see client_config.
+    """
+    global _registry
+    with _registry_lock:
+        _registry = ClientRegistry(session, client_config(**config), endpoint_url)
+    return _registry
+
+
+def clear_clients():
+    """Forget the process-wide clients."""
+    _registry.clear()
@@ -0,0 +1,813 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import boto3
+
+import aws_clients
+import item_manager
+from item_manager import InStock, ExpiringSoon, Expired, Shopping, DefaultList, UserSnapshot
+from local_backends import LocalKMS, LocalLambda, LocalDynamoDB, LocalAWSServer, FaultyLambda, local_lambda_for
+from offline_store import OfflineStore
+from change_channel import ChangeChannel
+from list_views import TreeviewBinder, VirtualTreeview, item_row
+from refresh_worker import RefreshWorker, RefreshResult
+from expiry_scheduler import ExpiryScheduler
+from notifications import NotificationManager
+from item_model import ItemList
+from message_bus import MessageBus, BusClient, GUI_CLOSED
+
+# Benchmarks for the Jetson side of the system, run against the in-process
+# stand-ins from local_backends.py so no AWS account is needed.
+#
+#   python3 benchmark.py decrypt --items 40 --kms-delay 0.05
+#   python3 benchmark.py transition --lambda-delay 0.05
+#   python3 benchmark.py startup --items 20
+#   python3 benchmark.py resilience --ticks 20
+#   python3 benchmark.py offline --lambda-delay 0.05
+#   python3 benchmark.py changes --duration 20
+#   python3 benchmark.py treeview --rows 10 100 1000 5000
+#   python3 benchmark.py refresh --lambda-delay 0.05 0.2 0.5
+#   python3 benchmark.py expiry --items 20 200 2000
+#   python3 benchmark.py notifications --burst 20 200
+#   python3 benchmark.py assets --rounds 5
+#   python3 benchmark.py bus --signals 20
+
+
+def bench_decrypt(args):
+    """Measure list-load latency with serial vs. parallel amount decryption."""
+    kms = LocalKMS(delay=args.kms_delay)
+    stored_items = [
+        {
+            "name": f"Item {i}",
+            "amount": kms.encrypt_amount(i % 19 + 1),
+            "expiration_date": "N/A",
+            "entry_date": "01/01/2025"
+        }
+        for i in range(args.items)
+    ]
+
+    def get_items_handler(event, context):
+        return {"statusCode": 200, "body": json.dumps(stored_items)}
+
+    lambda_client = LocalLambda({"Get_Items": get_items_handler})
+    manager = InStock("in_stock_list", "benchmark_user", lambda_client=lambda_client, kms_client=kms)
+
+    print(f"{args.items} items, {args.kms_delay * 1000:.0f} ms per KMS call, {args.rounds} rounds")
+    default_workers = item_manager.MAX_DECRYPT_WORKERS
+    for workers in (1, default_workers):
+        item_manager.MAX_DECRYPT_WORKERS = workers
+        timings = []
+        for _ in range(args.rounds):
+            manager._cache = None  # Force a fresh load every round
+            item_manager.clear_decrypt_caches()
+            start = time.perf_counter()
+            manager.get_items()
+            timings.append(time.perf_counter() - start)
+        label = "serial" if workers == 1 else f"{workers} workers"
+        print(f"  {label:>12}: avg {sum(timings) / len(timings) * 1000:8.1f} ms, best {min(timings) * 1000:8.1f} ms")
+    item_manager.MAX_DECRYPT_WORKERS = default_workers
+
+
+def legacy_take_out(Is, es, ex, sh, name, amount):
+    """The sequence of calls confirm_out made before Apply_Transition existed."""
+    today = time.strftime("%d/%m/%Y")
+    Is.has_item(name)
+    new_amount = 0 if amount is None else int(Is.get_item_amount(name)) - amount
+    if new_amount <= 0:
+        Is.remove_item_by_name(name)
+        if ex.has_item(name):
+            ex.remove_item_by_name(name)
+        if es.has_item(name):
+            es.remove_item_by_name(name)
+        if not sh.has_item(name):
+            sh.add_item(name, "1", "N/A", today)
+    else:
+        Is.update_item(name, new_amount)
+        es.update_item(name, new_amount)
+        ex.update_item(name, new_amount)
+
+
+def bench_transition(args):
+    """Compare the old multi-call take-out sequence with one Apply_Transition call."""
+    kms = LocalKMS()
+    lambda_client = local_lambda_for(dynamodb=LocalDynamoDB(), kms=kms)
+    lambda_client.invoke(FunctionName="editUsersData", Payload=json.dumps({"user_name": "benchmark_user"}))
+
+    clients = {"lambda_client": lambda_client, "kms_client": kms}
+    Is = InStock("in_stock_list", "benchmark_user", **clients)
+    es = ExpiringSoon("expiring_soon_list", "benchmark_user", **clients)
+    ex = Expired("expired_list", "benchmark_user", **clients)
+    sh = Shopping("shopping_list", "benchmark_user", **clients)
+    snapshot = UserSnapshot("benchmark_user", lambda_client=lambda_client)
+    snapshot.register(Is, es, ex, sh)
+
+    def restock():
+        # Put the item back in stock with an expiring-soon copy and an empty shopping list
+        for manager in (Is, es, ex, sh):
+            while manager.remove_item_by_name("Milk").get("statusCode") == 200:
+                pass
+        Is.add_item("Milk", "10", "N/A", "01/01/2025")
+        es.add_item("Milk", "10", "N/A", "01/01/2025")
+        snapshot.refresh()  # Warm caches, as after a GUI refresh tick
+
+    print(f"{args.lambda_delay * 1000:.0f} ms per Lambda call, {args.rounds} rounds")
+    for label, amount in (("take 2 of 10", 2), ("take all", None)):
+        for method in ("sequence", "transition"):
+            timings = []
+            calls = []
+            for _ in range(args.rounds):
+                restock()
+                lambda_client.latency = args.lambda_delay
+                calls_before = lambda_client.calls
+                start = time.perf_counter()
+                if method == "sequence":
+                    legacy_take_out(Is, es, ex, sh, "Milk", amount)
+                else:
+                    Is.apply_transition("Milk", amount)
+                timings.append(time.perf_counter() - start)
+                calls.append(lambda_client.calls - calls_before)
+                lambda_client.latency = 0.0
+            print(f"  {label:>12} {method:>10}: avg {sum(timings) / len(timings) * 1000:8.1f} ms, "
+                  f"{sum(calls) / len(calls):4.1f} Lambda calls")
+
+
+def bench_startup(args):
+    """Time-to-first-list of GUI.py: one client per manager vs. the shared client registry."""
+    kms = LocalKMS()
+    lambda_client = local_lambda_for(dynamodb=LocalDynamoDB(), kms=kms, latency=args.lambda_delay)
+    lambda_client.invoke(FunctionName="editUsersData", Payload=json.dumps({"user_name": "benchmark_user"}))
+    seed = InStock("in_stock_list", "benchmark_user", lambda_client=lambda_client, kms_client=kms)
+    for i in range(args.items):
+        seed.add_item(f"Item {i}", str(i % 9 + 1), "N/A", "01/01/2025")
+
+    def new_session():
+        # A fresh session per round, so every round pays for loading the service models
+        return boto3.session.Session(aws_access_key_id="benchmark", aws_secret_access_key="benchmark",
+                                     region_name="eu-north-1")
+
+    def start_per_manager(endpoint_url):
+        # What GUI.py did before: every manager built its own Lambda and KMS clients
+        session = new_session()
+
+        def clients():
+            return {"lambda_client": session.client("lambda", endpoint_url=endpoint_url),
+                    "kms_client": session.client("kms", endpoint_url=endpoint_url)}
+        managers = [InStock("in_stock_list", "benchmark_user", **clients()),
+                    ExpiringSoon("expiring_soon_list", "benchmark_user", **clients()),
+                    Expired("expired_list", "benchmark_user", **clients()),
+                    Shopping("shopping_list", "benchmark_user", **clients()),
+                    DefaultList("benchmark_user", lambda_client=session.client("lambda", endpoint_url=endpoint_url))]
+        return managers, managers[0].lambda_client
+
+    def start_shared(endpoint_url):
+        aws_clients.configure_clients(session=new_session(), endpoint_url=endpoint_url)
+        managers = [InStock("in_stock_list", "benchmark_user"),
+                    ExpiringSoon("expiring_soon_list", "benchmark_user"),
+                    Expired("expired_list", "benchmark_user"),
+                    Shopping("shopping_list", "benchmark_user"),
+                    DefaultList("benchmark_user")]
+        return managers, None
+
+    print(f"{args.items} items in stock, {args.lambda_delay * 1000:.0f} ms per Lambda call, {args.rounds} rounds")
+    with LocalAWSServer(lambda_client, kms) as server:
+        for label, start in (("per manager", start_per_manager), ("shared", start_shared)):
+            timings = []
+            for _ in range(args.rounds):
+                item_manager.clear_decrypt_caches()
+                begin = time.perf_counter()
+                managers, snapshot_client = start(server.endpoint_url)
+                snapshot = UserSnapshot("benchmark_user", lambda_client=snapshot_client)
+                snapshot.register(*managers)
+                snapshot.refresh()
+                managers[0].get_items()
+                timings.append(time.perf_counter() - begin)
+            print(f"  {label:>12}: avg {sum(timings) / len(timings) * 1000:8.1f} ms, best {min(timings) * 1000:8.1f} ms")
+
+
+def bench_resilience(args):
+    """Refresh ticks against a Lambda that is throttled, failing, slow or down."""
+    kms = LocalKMS()
+    backend = local_lambda_for(dynamodb=LocalDynamoDB(), kms=kms)
+    backend.invoke(FunctionName="editUsersData", Payload=json.dumps({"user_name": "benchmark_user"}))
+    faulty = FaultyLambda(backend, seed=1)
+    Is = InStock("in_stock_list", "benchmark_user", lambda_client=faulty, kms_client=kms)
+    Is.add_item("Milk", "2", "N/A", "01/01/2025")
+    snapshot = UserSnapshot("benchmark_user", lambda_client=faulty)
+    snapshot.register(Is)
+
+    resilience = item_manager.lambda_resilience
+    resilience.breaker.cooldown = args.cooldown
+    deadlines = dict(item_manager.LAMBDA_DEADLINES)
+    scenarios = (
+        ("healthy", {}),
+        ("30% throttled", {"throttle_rate": 0.3}),
+        ("20% 5xx + 10% unhandled", {"error_rate": 0.2, "function_error_rate": 0.1}),
+        ("slower than deadline", {"latency": 0.3}),
+        ("outage", {"outage": True}),
+        ("recovered", {})
+    )
+
+    print(f"{args.ticks} ticks per scenario, {args.tick * 1000:.0f} ms apart, breaker cooldown {args.cooldown} s")
+    for label, faults in scenarios:
+        faulty.latency = faults.get("latency", 0.0)
+        faulty.throttle_rate = faults.get("throttle_rate", 0.0)
+        faulty.error_rate = faults.get("error_rate", 0.0)
+        faulty.function_error_rate = faults.get("function_error_rate", 0.0)
+        faulty.outage = faults.get("outage", False)
+        for function_name in ("Get_User_Snapshot", "Get_Changes_Since"):
+            item_manager.LAMBDA_DEADLINES[function_name] = 0.2 if "latency" in faults else deadlines.get(function_name)
+        calls_before, retries_before, rejected_before = faulty.calls, resilience.retries, resilience.rejected
+        refreshed = stale = 0
+        timings = []
+        for _ in range(args.ticks):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):  # Drop the managers' error prints
+                if snapshot.refresh():
+                    refreshed += 1
+                elif Is.get_items():
+                    stale += 1  # The GUI keeps showing the last known list
+            timings.append(time.perf_counter() - start)
+            time.sleep(args.tick)
+        timings.sort()
+        print(f"  {label:>24}: {refreshed:3d} refreshed, {stale:3d} stale, "
+              f"{faulty.calls - calls_before:3d} Lambda calls, {resilience.retries - retries_before:3d} retries, "
+              f"{resilience.rejected - rejected_before:3d} rejected, p95 tick {timings[int(0.95 * (len(timings) - 1))] * 1000:6.1f} ms, "
+              f"breaker {resilience.breaker.state}")
+    item_manager.LAMBDA_DEADLINES.clear()
+    item_manager.LAMBDA_DEADLINES.update(deadlines)
+
+
+def bench_offline(args):
+    """Latency of GUI writes: ItemManager calls vs. the offline store's outbox, and the time to sync it."""
+    kms = LocalKMS()
+    backend = local_lambda_for(dynamodb=LocalDynamoDB(), kms=kms, latency=args.lambda_delay)
+    backend.invoke(FunctionName="editUsersData", Payload=json.dumps({"user_name": "benchmark_user"}))
+    names = [f"Item {i}" for i in range(args.items)]
+
+    def run(manager):
+        timings = []
+        for name in names:
+            start = time.perf_counter()
+            manager.add_item(name, "3", "N/A", "01/01/2025")
+            manager.apply_transition(name, 1)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        return timings
+
+    Is = InStock("in_stock_list", "benchmark_user", lambda_client=backend, kms_client=kms)
+    remote = run(Is)
+    for name in names:
+        Is.remove_item_by_name(name)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = OfflineStore("benchmark_user", path=os.path.join(directory, "lists.db"),
+                             lambda_client=backend, kms_client=kms)
+        store.pull()
+        local = run(store.list_manager("in_stock_list"))
+        start = time.perf_counter()
+        store.sync()
+        sync_time = time.perf_counter() - start
+        store.close()
+
+    print(f"{args.items} add + take-out pairs, {args.lambda_delay * 1000:.0f} ms per Lambda call")
+    for label, timings in (("ItemManager", remote), ("offline store", local)):
+        print(f"  {label:>14}: p50 {timings[len(timings) // 2] * 1000:7.2f} ms, "
+              f"p95 {timings[int(0.95 * (len(timings) - 1))] * 1000:7.2f} ms per pair")
+    print(f"  background sync of {2 * args.items} queued writes: {sync_time * 1000:.0f} ms")
+
+
+def bench_changes(args):
+    """App edits reaching a fridge: periodic_update polling every second vs. the change channel."""
+    kms = LocalKMS()
+    backend = local_lambda_for(dynamodb=LocalDynamoDB(), kms=kms, latency=args.lambda_delay)
+
+    def run(user_name, use_channel):
+        backend.invoke(FunctionName="editUsersData", Payload=json.dumps({"user_name": user_name}))
+        Is = InStock("in_stock_list", user_name, lambda_client=backend, kms_client=kms)
+        snapshot = UserSnapshot(user_name, lambda_client=backend, use_changes=use_channel)
+        snapshot.register(Is)
+        snapshot.refresh()
+        seen = []
+
+        def on_change(list_names):
+            seen.append(time.perf_counter())
+
+        item_manager.metrics.reset()
+        calls_before = backend.calls
+        if use_channel:
+            channel = ChangeChannel(snapshot, on_change=on_change, wait=args.wait, lambda_client=backend).start()
+        else:
+            stop = threading.Event()
+
+            def poll():
+                while not stop.is_set():
+                    if snapshot.refresh() and snapshot.changed_lists:
+                        on_change(snapshot.changed_lists)
+                    stop.wait(1.0)  # root.after(1000, periodic_update)
+            threading.Thread(target=poll, daemon=True).start()
+
+        latencies = []
+        rng = random.Random(1)
+        begin = time.perf_counter()
+        edits = 0
+        while time.perf_counter() - begin < args.duration:
+            time.sleep(rng.uniform(0.5, 1.5) * args.edit_interval)  # Not in step with the polling
+            seen.clear()
+            edited = time.perf_counter()
+            backend.invoke(FunctionName="Add_Item", Payload=json.dumps({"user_name": user_name, "list_name": "in_stock_list", "item": {
+                "name": f"Item {edits}", "amount": kms.encrypt_amount("1"), "expiration_date": "N/A", "entry_date": "01/01/2025"}}))
+            edits += 1
+            while not seen and time.perf_counter() - edited < args.wait + 2:
+                time.sleep(0.005)
+            if seen:
+                latencies.append(seen[0] - edited)
+        elapsed = time.perf_counter() - begin
+        if use_channel:
+            channel.stop()
+        else:
+            stop.set()
+        calls = backend.calls - calls_before - edits
+        received = sum(stats["received_bytes"] for stats in item_manager.metrics.snapshot()["calls"].values())
+        latencies.sort()
+        label = "change channel" if use_channel else "1 s polling"
+        print(f"  {label:>15}: {calls * 60 / elapsed:6.1f} Lambda calls/min, {received / elapsed:8.0f} bytes/s received, "
+              f"edit visible after p50 {latencies[len(latencies) // 2] * 1000:6.0f} ms, max {latencies[-1] * 1000:6.0f} ms")
+
+    print(f"{args.duration:.0f} s per mode, one app edit every ~{args.edit_interval} s, "
+          f"{args.lambda_delay * 1000:.0f} ms per Lambda call, long poll wait {args.wait} s")
+    run("benchmark_polling", False)
+    run("benchmark_channel", True)
+
+
+def bench_treeview(args):
+    """Cost of a list redraw: deleting and reinserting every row vs. TreeviewBinder vs. VirtualTreeview."""
+    import tkinter as tk
+    from tkinter import ttk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Error opening Tk (no display?): {e}")
+        return
+    root.withdraw()
+    columns = ["item", "amount", "expiration_date", "entry_date"]
+
+    def rebuild(treeview, items):
+        # update_InStockList before TreeviewBinder
+        for row in treeview.get_children():
+            treeview.delete(row)
+        for item in items:
+            treeview.insert("", "end", values=item_row(item))
+
+    def scenarios(count):
+        items = [{"name": f"Item {i}", "amount": "3", "expiration_date": "N/A", "entry_date": "01/01/2025"}
+                 for i in range(count)]
+        changed = list(items)
+        changed[count // 2] = dict(changed[count // 2], amount="2")
+        added = items + [{"name": "New item", "amount": "1", "expiration_date": "N/A", "entry_date": "01/01/2025"}]
+        return items, [("unchanged", list(items)), ("one amount", changed), ("one added", added),
+                       ("one removed", items[:count // 2] + items[count // 2 + 1:])]
+
+    print(f"ms per redraw, mean of {args.rounds} rounds (Tk calls plus update_idletasks)")
+    print(f"  {'rows':>6}  {'scenario':<12}{'rebuild':>10}{'binder':>10}{'virtual':>10}")
+    for count in args.rows:
+        base, cases = scenarios(count)
+        for label, items in cases:
+            timings = {}
+            for mode in ("rebuild", "binder", "virtual"):
+                treeview = ttk.Treeview(root, columns=columns, show="headings")
+                binder = TreeviewBinder(treeview) if mode == "binder" else VirtualTreeview(treeview)
+                total = 0.0
+                for _ in range(args.rounds):
+                    # Show the previous list first, as the last tick left it
+                    if mode == "rebuild":
+                        rebuild(treeview, base)
+                    else:
+                        binder.update(list(base))
+                    root.update_idletasks()
+                    start = time.perf_counter()
+                    if mode == "rebuild":
+                        rebuild(treeview, items)
+                    else:
+                        binder.update(list(items))  # A new list, as the caches hand out
+                    root.update_idletasks()
+                    total += time.perf_counter() - start
+                timings[mode] = total / args.rounds
+                treeview.destroy()
+            print(f"  {count:>6}  {label:<12}{timings['rebuild'] * 1000:>10.2f}{timings['binder'] * 1000:>10.2f}"
+                  f"{timings['virtual'] * 1000:>10.2f}")
+    root.destroy()
+
+
+def bench_refresh(args):
+    """Main-loop stalls while the lists refresh: ticks inside the loop vs. the refresh worker."""
+    kms = LocalKMS()
+    backend = local_lambda_for(dynamodb=LocalDynamoDB(), kms=kms)
+    backend.invoke(FunctionName="editUsersData", Payload=json.dumps({"user_name": "benchmark_user"}))
+    clients = {"lambda_client": backend, "kms_client": kms}
+    managers = [InStock("in_stock_list", "benchmark_user", **clients),
+                ExpiringSoon("expiring_soon_list", "benchmark_user", **clients),
+                Expired("expired_list", "benchmark_user", **clients),
+                Shopping("shopping_list", "benchmark_user", **clients),
+                DefaultList("benchmark_user", lambda_client=backend)]
+    snapshot = UserSnapshot("benchmark_user", lambda_client=backend, use_changes=False)
+    snapshot.register(*managers)
+
+    def refresh_tick():
+        # The network part of the old periodic_update: reload the lists
+        start = time.perf_counter()
+        snapshot.refresh()
+        lists = tuple((manager.list_name, manager.get_items()) for manager in managers)
+        return RefreshResult(lists, (), time.perf_counter() - start)
+
+    def main_loop(tick_inline, worker):
+        # Stand-in for Tk's mainloop: an input event every 10 ms, a refresh tick every second
+        gaps = []
+        next_tick = time.perf_counter()
+        last = time.perf_counter()
+        end = last + args.duration
+        while last < end:
+            now = time.perf_counter()
+            if tick_inline and now >= next_tick:
+                refresh_tick()
+                next_tick = time.perf_counter() + 1.0
+            elif worker is not None:
+                worker.drain(lambda result: None)
+            time.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last - 0.01)
+            last = now
+        gaps.sort()
+        return gaps
+
+    print(f"Input handling delay over {args.duration:.0f} s, one refresh per second")
+    print(f"  {'Lambda ms':>10}{'mode':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for delay in args.lambda_delay:
+        backend.latency = delay
+        for mode in ("inline", "worker"):
+            worker = RefreshWorker(refresh_tick).start() if mode == "worker" else None
+            gaps = main_loop(mode == "inline", worker)
+            if worker is not None:
+                worker.stop()
+            print(f"  {delay * 1000:>10.0f}{mode:>10}{gaps[len(gaps) // 2] * 1000:>10.1f}"
+                  f"{gaps[int(0.99 * (len(gaps) - 1))] * 1000:>10.1f}{gaps[-1] * 1000:>10.1f}")
+
+
+def legacy_expiry_scan(in_stock_items, expiring_soon_items):
+    """The date parsing and list scans update_expiring_soon and check_and_move_expired_items did every tick."""
+    today = datetime.now().date()
+
+    def expiration_of(item):
+        entry_date = datetime.strptime(item["entry_date"], "%d/%m/%Y").date()
+        if item["expiration_date"].lower() == "n/a":
+            return entry_date + timedelta(days=10)
+        return datetime.strptime(item["expiration_date"], "%d/%m/%Y").date()
+
+    for item in in_stock_items:
+        if 0 < (expiration_of(item) - today).days <= 5:
+            any(es_item["name"] == item["name"] and es_item["expiration_date"] == item["expiration_date"]
+                for es_item in expiring_soon_items)
+    for es_item in expiring_soon_items:
+        today >= expiration_of(es_item)
+
+
+def bench_expiry(args):
+    """Cost of the expiry check per tick: scanning every list vs. ExpiryScheduler."""
+
+    class ListStub:
+        # Holds a list the way a manager's cache does; nothing is due, so nothing is written
+        def __init__(self, list_name, items):
+            self.list_name = list_name
+            self.items = items
+
+        def get_items(self):
+            return self.items
+
+        def get_item_list(self):
+            self._item_list = ItemList.of(self.items, getattr(self, "_item_list", None))
+            return self._item_list
+
+    today = datetime.now().date()
+    print(f"ms per tick, {args.ticks} ticks, one list change every {args.change_every} ticks")
+    print(f"  {'items':>7}{'scan':>10}{'scheduler, list changed':>25}{'scheduler, unchanged':>22}")
+    for count in args.items:
+        def dated(i, days):
+            return {"name": f"Item {i}", "amount": "1", "entry_date": today.strftime("%d/%m/%Y"),
+                    "expiration_date": (today + timedelta(days=days)).strftime("%d/%m/%Y")}
+        in_stock = ListStub("in_stock_list", [dated(i, 6 + i % 30) for i in range(count)])
+        expiring_soon = ListStub("expiring_soon_list", [dated(i, 1 + i % 5) for i in range(count // 10)])
+        scheduler = ExpiryScheduler(in_stock, expiring_soon, ListStub("expired_list", []), ListStub("shopping_list", []))
+
+        timings = {"scan": [], "changed": [], "unchanged": []}
+        for mode in ("scan", "scheduler"):
+            for tick in range(args.ticks):
+                changed = tick % args.change_every == 0
+                if changed:
+                    in_stock.items = list(in_stock.items)  # An edit replaces the cached list
+                start = time.perf_counter()
+                if mode == "scan":
+                    legacy_expiry_scan(in_stock.items, expiring_soon.items)
+                else:
+                    scheduler.run(today)
+                elapsed = time.perf_counter() - start
+                timings["scan" if mode == "scan" else "changed" if changed else "unchanged"].append(elapsed)
+        average = {key: sum(values) / len(values) * 1000 for key, values in timings.items()}
+        print(f"  {count:>7}{average['scan']:>10.3f}{average['changed']:>25.3f}{average['unchanged']:>22.4f}")
+
+
+def bench_notifications(args):
+    """Tk objects and main-loop time for a burst of expiry notifications: a Toplevel each vs. NotificationManager."""
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Error opening Tk (no display?): {e}")
+        return
+    root.withdraw()
+
+    def legacy_notification(message, font_color):
+        # show_notification before NotificationManager, without the icon
+        window = tk.Toplevel(root)
+        window.overrideredirect(True)
+        window.attributes("-topmost", True)
+        tk.Label(window, text=message, fg=font_color, font=("Helvetica", 16, "bold")).pack(expand=True, fill=tk.BOTH)
+        window.after(6000, window.destroy)
+
+    def widget_count(widget):
+        return sum(1 + widget_count(child) for child in widget.winfo_children())
+
+    def pending_timers():
+        return len(root.tk.call("after", "info"))
+
+    print(f"  {'burst':>6}{'mode':>10}{'Tk objects':>12}{'timers':>8}{'ms in loop':>12}")
+    for burst in args.burst:
+        for mode in ("Toplevel", "manager"):
+            manager = NotificationManager(root) if mode == "manager" else None
+            root.update()
+            start = time.perf_counter()
+            for i in range(burst):
+                if manager is not None:
+                    manager.notify("expired", f"Item {i}")
+                else:
+                    legacy_notification(f"Item 'Item {i}' has expired!", "red")
+            root.update()  # Runs the manager's flush, due at once
+            elapsed = time.perf_counter() - start
+            print(f"  {burst:>6}{mode:>10}{widget_count(root):>12}{pending_timers():>8}{elapsed * 1000:>12.1f}")
+            for child in root.winfo_children():
+                child.destroy()
+            for after_id in root.tk.call("after", "info"):
+                root.after_cancel(after_id)
+    root.destroy()
+
+
+# Images opened at launch by InitialGUI.py and GUI.py, at the sizes they are shown
+LAUNCH_ASSETS = [
+    ("icons/background.jpeg", (1024, 600)), ("icons/smart.png", (90, 90)),
+    ("icons/expired.png", (30, 30)), ("icons/default_list.png", (64, 64)),
+    ("icons/in_stock.png", (64, 64)), ("icons/soon_expired.png", (64, 64)),
+    ("icons/expired.png", (64, 64)), ("icons/shopping_list.png", (64, 64)),
+    ("icons/in.png", (200, 200)), ("icons/out.png", (160, 160)), ("icons/logout.png", (40, 40)),
+]
+
+
+def sample_assets(directory):
+    """Stand-ins for the files of LAUNCH_ASSETS (a camera-sized background, 512x512 icons) in directory."""
+    from PIL import Image
+    paths = {}
+    for path, _ in LAUNCH_ASSETS:
+        if path in paths:
+            continue
+        target = os.path.join(directory, os.path.basename(path))
+        if path.endswith(".jpeg"):
+            size = (1920, 1080)
+            noise = Image.effect_noise(size, 40)
+            gradient = Image.linear_gradient("L").resize(size)
+            Image.merge("RGB", (gradient, noise, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT))).save(target, quality=90)
+        else:
+            size = (512, 512)
+            shape = Image.radial_gradient("L").resize(size)
+            Image.merge("RGBA", (shape, Image.effect_noise(size, 20), shape, shape.point(lambda v: 255 - v))).save(target)
+        paths[path] = target
+    return paths
+
+
+def bench_assets(args):
+    """Launch-time image loading: open and resize every launch vs. the asset cache."""
+    import tkinter as tk
+    from PIL import Image, ImageTk
+    import asset_cache
+    with tempfile.TemporaryDirectory() as directory:
+        if all(os.path.exists(path) for path, _ in LAUNCH_ASSETS):
+            paths = {path: path for path, _ in LAUNCH_ASSETS}
+            print("Using the images in icons/")
+        else:
+            paths = sample_assets(directory)
+            print("icons/ not found; using generated stand-ins")
+        assets = [(paths[path], size) for path, size in LAUNCH_ASSETS]
+        cache_dir = os.path.join(directory, "asset_cache")
+
+        try:
+            root = tk.Tk()
+            root.withdraw()
+        except tk.TclError as e:
+            print(f"Error opening Tk (no display?): {e}")
+            print("Timing the image work without PhotoImages")
+            root = None
+
+        def legacy():
+            for path, size in assets:
+                image = asset_cache.resize(path, size)
+                if root is not None:
+                    ImageTk.PhotoImage(image)
+                else:
+                    image.load()
+
+        def cached():
+            for path, size in assets:
+                if root is not None:
+                    asset_cache.load_image(path, size, cache_dir=cache_dir)
+                else:
+                    Image.open(asset_cache.cached_file(path, size, cache_dir)).load()
+
+        def cold():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            asset_cache.clear()
+            cached()
+
+        def new_process():
+            asset_cache.clear()  # Files on disk, nothing decoded yet
+            cached()
+
+        modes = [("resize each launch", legacy), ("cache, first launch", cold), ("cache, next launches", new_process)]
+        if root is not None:
+            modes.append(("cache, next screen", cached))
+        print(f"  {len(assets)} images per launch, {args.rounds} rounds")
+        print(f"  {'mode':<24}{'ms per launch':>14}")
+        for name, run in modes:
+            cached()  # Leaves the process memo warm for "next screen"
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                run()
+            elapsed = (time.perf_counter() - start) / args.rounds
+            print(f"  {name:<24}{elapsed * 1000:>14.1f}")
+        entries = os.listdir(cache_dir)
+        size = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in entries)
+        print(f"  cache: {len(entries)} files, {size / 1024:.0f} KiB")
+        asset_cache.clear()
+        if root is not None:
+            root.destroy()
+
+
+def bench_bus(args):
+    """Signal-to-handler latency: marker files polled in sleep loops vs. the message bus."""
+    def summary(name, latencies):
+        latencies = sorted(latencies)
+        median = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"  {name:<22}{median * 1000:>10.2f}{p95 * 1000:>10.2f}{latencies[-1] * 1000:>10.2f}")
+
+    print(f"  {args.signals} signals per mode, sent at random times")
+    print(f"  {'mode':<22}{'median ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for interval in args.poll_interval:
+            # The loops of management.main and InitialGUI.check_gui_closed before the bus
+            marker = os.path.join(directory, "GUI_closed.txt")
+            received = threading.Event()
+            stop = threading.Event()
+            seen = []
+
+            def poll():
+                while not stop.is_set():
+                    if os.path.exists(marker):
+                        os.remove(marker)
+                        seen.append(time.perf_counter())
+                        received.set()
+                    time.sleep(interval)
+
+            poller = threading.Thread(target=poll, daemon=True)
+            poller.start()
+            latencies = []
+            for _ in range(args.signals):
+                time.sleep(random.uniform(0, interval))
+                received.clear()
+                sent = time.perf_counter()
+                with open(marker, "w") as f:
+                    f.write("GUI closed")
+                received.wait()
+                latencies.append(seen[-1] - sent)
+            stop.set()
+            poller.join()
+            summary(f"file, {interval * 1000:.0f} ms poll", latencies)
+
+        bus = MessageBus(os.path.join(directory, "bus.sock")).start()
+        received = threading.Event()
+        seen = []
+
+        def on_message(message):
+            seen.append(time.perf_counter())
+            received.set()
+
+        receiver = BusClient(bus.path)
+        receiver.subscribe(GUI_CLOSED, on_message)
+        sender = BusClient(bus.path)
+        receiver.connect()
+        sender.connect()
+        time.sleep(0.1)  # Let the bus register both connections
+        latencies = []
+        for _ in range(args.signals):
+            time.sleep(random.uniform(0, 0.05))
+            received.clear()
+            sent = time.perf_counter()
+            sender.publish(GUI_CLOSED)
+            received.wait()
+            latencies.append(seen[-1] - sent)
+        summary("message bus", latencies)
+        sender.close()
+        receiver.close()
+        bus.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Smart Refrigerator benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    decrypt_parser = subparsers.add_parser("decrypt", help="list-load latency with batched decryption")
+    decrypt_parser.add_argument("--items", type=int, default=40)
+    decrypt_parser.add_argument("--kms-delay", type=float, default=0.05, help="seconds per KMS call")
+    decrypt_parser.add_argument("--rounds", type=int, default=5)
+    decrypt_parser.set_defaults(func=bench_decrypt)
+
+    transition_parser = subparsers.add_parser("transition", help="take-out latency: call sequence vs. Apply_Transition")
+    transition_parser.add_argument("--lambda-delay", type=float, default=0.05, help="seconds per Lambda call")
+    transition_parser.add_argument("--rounds", type=int, default=5)
+    transition_parser.set_defaults(func=bench_transition)
+
+    startup_parser = subparsers.add_parser("startup", help="time-to-first-list: per-manager clients vs. shared registry")
+    startup_parser.add_argument("--items", type=int, default=20)
+    startup_parser.add_argument("--lambda-delay", type=float, default=0.0, help="seconds per Lambda call")
+    startup_parser.add_argument("--rounds", type=int, default=5)
+    startup_parser.set_defaults(func=bench_startup)
+
+    resilience_parser = subparsers.add_parser("resilience", help="refresh ticks under injected Lambda faults")
+    resilience_parser.add_argument("--ticks", type=int, default=20)
+    resilience_parser.add_argument("--tick", type=float, default=0.05, help="seconds between refresh ticks")
+    resilience_parser.add_argument("--cooldown", type=float, default=0.5, help="circuit breaker cooldown in seconds")
+    resilience_parser.set_defaults(func=bench_resilience)
+
+    offline_parser = subparsers.add_parser("offline", help="GUI write latency: Lambda calls vs. offline store outbox")
+    offline_parser.add_argument("--items", type=int, default=20)
+    offline_parser.add_argument("--lambda-delay", type=float, default=0.05, help="seconds per Lambda call")
+    offline_parser.set_defaults(func=bench_offline)
+
+    changes_parser = subparsers.add_parser("changes", help="app edits reaching the fridge: 1 s polling vs. change channel")
+    changes_parser.add_argument("--duration", type=float, default=20.0, help="seconds per mode")
+    changes_parser.add_argument("--edit-interval", type=float, default=4.0, help="seconds between app edits")
+    changes_parser.add_argument("--wait", type=float, default=20.0, help="long poll wait in seconds")
+    changes_parser.add_argument("--lambda-delay", type=float, default=0.02, help="seconds per Lambda call")
+    changes_parser.set_defaults(func=bench_changes)
+
+    treeview_parser = subparsers.add_parser("treeview", help="list redraw: full rebuild vs. TreeviewBinder vs. VirtualTreeview")
+    treeview_parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    treeview_parser.add_argument("--rounds", type=int, default=20)
+    treeview_parser.set_defaults(func=bench_treeview)
+
+    refresh_parser = subparsers.add_parser("refresh", help="main-loop stalls: refresh inside the loop vs. refresh worker")
+    refresh_parser.add_argument("--duration", type=float, default=5.0, help="seconds per mode and delay")
+    refresh_parser.add_argument("--lambda-delay", type=float, nargs="+", default=[0.05, 0.2, 0.5],
+                                help="seconds per Lambda call")
+    refresh_parser.set_defaults(func=bench_refresh)
+
+    expiry_parser = subparsers.add_parser("expiry", help="expiry check per tick: list scans vs. ExpiryScheduler")
+    expiry_parser.add_argument("--items", type=int, nargs="+", default=[20, 200, 2000], help="items in stock")
+    expiry_parser.add_argument("--ticks", type=int, default=200)
+    expiry_parser.add_argument("--change-every", type=int, default=20, help="ticks between list changes")
+    expiry_parser.set_defaults(func=bench_expiry)
+
+    notifications_parser = subparsers.add_parser("notifications", help="notification burst: Toplevel each vs. NotificationManager")
+    notifications_parser.add_argument("--burst", type=int, nargs="+", default=[20, 200], help="items expiring at once")
+    notifications_parser.set_defaults(func=bench_notifications)
+
+    assets_parser = subparsers.add_parser("assets", help="launch-time image loading: resize each launch vs. asset cache")
+    assets_parser.add_argument("--rounds", type=int, default=5)
+    assets_parser.set_defaults(func=bench_assets)
+
+    bus_parser = subparsers.add_parser("bus", help="signal-to-handler latency: marker-file polling vs. message bus")
+    bus_parser.add_argument("--signals", type=int, default=20)
+    bus_parser.add_argument("--poll-interval", type=float, nargs="+", default=[1.0, 0.1],
+                            help="seconds between checks of the marker file")
+    bus_parser.set_defaults(func=bench_bus)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
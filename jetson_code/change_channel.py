@@ -0,0 +1,100 @@
+import threading
+import time
+
+from aws_clients import get_client
+
+# Change notifications for one user's record. Get_Changes_Since called with a
+# wait holds the request until the change log (filled from the property table's
+# DynamoDB stream) has something after our version, so an edit made from the
+# Android app reaches the fridge within about a second without the fridge asking
+# every second. Only the lists that changed are updated.
+#
+# While the channel is down (Lambda unavailable or Get_Changes_Since not
+# deployed) the lists are re-read with a slow poll instead.
+
+LONG_POLL_WAIT = 20  # Seconds Get_Changes_Since holds a request without changes
+SLOW_POLL_INTERVAL = 30  # Seconds between refreshes while the channel is down
+CHANNEL_RETRY_INTERVAL = 120  # Seconds before a failed channel is tried again
+
+
+def long_poll_client():
+    """Shared Lambda client whose read timeout outlasts a long poll."""
+    return get_client('lambda', read_timeout=LONG_POLL_WAIT + 10)
+
+
+class ChangeChannel:
+    """
+    Keeps the managers of a UserSnapshot current from a background thread.
+
+        channel = ChangeChannel(snapshot, on_change=lambda lists: print(lists)).start()
+
+    on_change is called from the channel thread with the set of list names that
+    changed; it must not touch Tk (GUI.py only asks the refresh worker for a tick).
+    """
+
+    def __init__(self, snapshot, on_change=None, wait=LONG_POLL_WAIT, slow_poll_interval=SLOW_POLL_INTERVAL,
+                 retry_interval=CHANNEL_RETRY_INTERVAL, lambda_client=None):
+        """
+        Args:
+            snapshot (UserSnapshot): Snapshot whose registered managers are kept up to date.
+            on_change: Called with the set of changed list names after each update.
+            wait (float): Seconds a long poll may wait for a change.
+            slow_poll_interval (float): Seconds between refreshes while the channel is down.
+            retry_interval (float): Seconds before the channel is tried again after failing.
+            lambda_client: Client for the long polls (default: long_poll_client()).
+        """
+        self.snapshot = snapshot
+        self.on_change = on_change
+        self.wait = wait
+        self.slow_poll_interval = slow_poll_interval
+        self.retry_interval = retry_interval
+        self.lambda_client = lambda_client or long_poll_client()
+        self.connected = False  # True while long polls are answered
+        self.updates = 0  # Updates that changed at least one list
+        self._retry_at = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def poll_once(self):
+        """
+        Wait for changes with one long poll, or refresh at once if the channel is down.
+
+        Returns:
+            bool: True if the lists were brought up to date.
+        """
+        use_channel = self.snapshot.use_changes and time.monotonic() >= self._retry_at
+        if use_channel and self.snapshot.has_lists():
+            updated = self.snapshot.refresh_changes(wait=self.wait, lambda_client=self.lambda_client)
+            if updated is None:
+                updated = self.snapshot.refresh_snapshot()  # Change log too short, start over
+            self.connected = updated and self.snapshot.use_changes
+        else:
+            updated = self.snapshot.refresh()  # First load, or the slow poll
+            self.connected = updated and use_channel and self.snapshot.use_changes
+        if use_channel and not self.connected:
+            self._retry_at = time.monotonic() + self.retry_interval
+            print("Change channel down, polling every", self.slow_poll_interval, "s")
+
+        if updated and self.snapshot.changed_lists:
+            self.updates += 1
+            if self.on_change is not None:
+                try:
+                    self.on_change(set(self.snapshot.changed_lists))
+                except Exception as e:
+                    print(f"Error handling list changes: {e}")
+        return updated
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.poll_once()
+            if not self.connected:
+                self._stop.wait(self.slow_poll_interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="change-channel", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop after the current poll; a long poll in flight is not waited for."""
+        self._stop.set()
@@ -0,0 +1,102 @@
+import base64
+import os
+import threading
+import time
+from aws_clients import get_client
+
+try:
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:  # Only needed when envelope encryption is turned on
+    AESGCM = None
+    InvalidTag = None
+
+# Envelope-encrypted amounts are stored as "env1:<wrapped data key>:<nonce + ciphertext>",
+# both parts Base64. Amounts without the prefix are plain KMS ciphertexts.
+ENVELOPE_PREFIX = "env1:"
+ENVELOPE_AAD = b"amount"
+
+DATA_KEY_MAX_AGE = 3600  # Seconds a data key is used for encryption before a new one is generated
+DATA_KEY_MAX_MESSAGES = 1000  # Amounts encrypted with one data key before a new one is generated
+UNWRAPPED_KEY_CACHE_SIZE = 32  # Wrapped data keys kept unwrapped for decryption
+
+
+def is_envelope(encrypted_data):
+    """Return True if an encrypted amount was produced by EnvelopeCipher."""
+    return isinstance(encrypted_data, str) and encrypted_data.startswith(ENVELOPE_PREFIX)
+
+
+class EnvelopeCipher:
+    def __init__(self, kms_client=None, key_id='alias/MyEncryptionKey',
+                 max_age=DATA_KEY_MAX_AGE, max_messages=DATA_KEY_MAX_MESSAGES):
+        if AESGCM is None:
+            raise RuntimeError("Envelope encryption requires the 'cryptography' package")
+        self.kms_client = kms_client or get_client('kms')
+        self.key_id = key_id
+        self.max_age = max_age
+        self.max_messages = max_messages
+        self._lock = threading.Lock()
+        self._data_key = None  # [plaintext key, wrapped key, created at, messages encrypted]
+        self._unwrapped_keys = {}  # wrapped key -> (plaintext key, unwrapped at)
+
+    def _encryption_key(self):
+        """Return the current data key, generating a new one when it is too old or overused."""
+        now = time.monotonic()
+        key = self._data_key
+        if key is None or now - key[2] >= self.max_age or key[3] >= self.max_messages:
+            response = self.kms_client.generate_data_key(KeyId=self.key_id, KeySpec='AES_256')
+            key = [response['Plaintext'], response['CiphertextBlob'], now, 0]
+            self._data_key = key
+            self._remember_unwrapped(key[1], key[0], now)
+        key[3] += 1
+        return key[0], key[1]
+
+    def _remember_unwrapped(self, wrapped_key, plaintext_key, now):
+        if len(self._unwrapped_keys) >= UNWRAPPED_KEY_CACHE_SIZE:
+            oldest = min(self._unwrapped_keys, key=lambda k: self._unwrapped_keys[k][1])
+            del self._unwrapped_keys[oldest]
+        self._unwrapped_keys[wrapped_key] = (plaintext_key, now)
+
+    def _decryption_key(self, wrapped_key):
+        """Return the plaintext data key for a wrapped key, asking KMS only on a cache miss."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._unwrapped_keys.get(wrapped_key)
+            if cached is not None and now - cached[1] < self.max_age:
+                return cached[0]
+        # Unwrap outside the lock so parallel decryptions are not serialized on KMS
+        plaintext_key = self.kms_client.decrypt(CiphertextBlob=wrapped_key)['Plaintext']
+        with self._lock:
+            self._remember_unwrapped(wrapped_key, plaintext_key, now)
+        return plaintext_key
+
+    def encrypt(self, data):
+        """Encrypt a string locally with AES-GCM and return the stored envelope format."""
+        with self._lock:
+            plaintext_key, wrapped_key = self._encryption_key()
+        nonce = os.urandom(12)
+        ciphertext = AESGCM(plaintext_key).encrypt(nonce, data.encode('utf-8'), ENVELOPE_AAD)
+        return (ENVELOPE_PREFIX
+                + base64.b64encode(wrapped_key).decode('utf-8') + ":"
+                + base64.b64encode(nonce + ciphertext).decode('utf-8'))
+
+    def decrypt(self, encrypted_data):
+        """Decrypt a value produced by encrypt."""
+        try:
+            wrapped_part, sealed_part = encrypted_data[len(ENVELOPE_PREFIX):].split(":", 1)
+            wrapped_key = base64.b64decode(wrapped_part)
+            sealed = base64.b64decode(sealed_part)
+        except ValueError:
+            raise ValueError("Malformed envelope-encrypted value")
+        plaintext_key = self._decryption_key(wrapped_key)
+        try:
+            plaintext = AESGCM(plaintext_key).decrypt(sealed[:12], sealed[12:], ENVELOPE_AAD)
+        except InvalidTag:
+            raise ValueError("Envelope-encrypted value failed authentication")
+        return plaintext.decode('utf-8')
+
+    def clear(self):
+        """Forget all data keys, e.g. on logout."""
+        with self._lock:
+            self._data_key = None
+            self._unwrapped_keys.clear()
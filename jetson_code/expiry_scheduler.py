@@ -0,0 +1,192 @@
+import heapq
+from collections import namedtuple
+from datetime import date
+
+# Moves items between the lists as they get close to or past their expiration
+# date. GUI.py used to re-parse every date and re-scan the in-stock and
+# expiring-soon lists every second, although an item's status only changes at
+# midnight or when the lists change. The scheduler keeps a min-heap of the next
+# day each item crosses a threshold and does nothing until the head is due or
+# one of the lists was replaced (the managers hand out a new ItemList on every
+# change, so an identity check is enough). Dates are the day ordinals the
+# Items were built with; nothing is parsed per tick.
+#
+# A changed list is diffed against the one the heap knows: an ItemList keeps
+# the Item objects of the entries a write did not touch, so only the new Items
+# are pushed, and entries of Items that left the list are skipped when they
+# come due. The heap is only rebuilt when most of it is stale.
+
+EXPIRING_SOON_DAYS = 5  # An in-stock item is expiring soon this many days before it expires
+STALE_RATIO = 2  # Rebuild once the heap holds this many entries per item still in the lists
+
+# Result of a run: the list moves applied, as (action, list name, Item) with
+# action "add" or "remove", and the (kind, item name) events for the
+# NotificationManager, kind "expiring_soon" or "expired"
+ExpiryBatch = namedtuple("ExpiryBatch", ["moves", "notifications"])
+
+_EXPIRING_SOON = 0
+_EXPIRED = 1
+
+
+class ExpiryScheduler:
+    """
+    Moves in-stock items to expiring soon, and expiring-soon items to expired
+    and the shopping list, when their dates come.
+
+        scheduler = ExpiryScheduler(Is, es, ex, sh)
+        batch = scheduler.run()  # Every tick; cheap unless something is due
+    """
+
+    def __init__(self, in_stock, expiring_soon, expired, shopping):
+        """
+        Args:
+            in_stock, expiring_soon, expired, shopping: The list managers of the user.
+        """
+        self.in_stock = in_stock
+        self.expiring_soon = expiring_soon
+        self.expired = expired
+        self.shopping = shopping
+        self._heap = []  # (day ordinal due, sequence, kind, Item)
+        self._lists = None  # Item lists the heap follows
+        self._live = [{}, {}]  # Per kind: id(Item) -> Item of the Items still in their list
+        self._sequence = 0
+        self.rebuilds = 0
+        self.updates = 0  # Changed lists applied to the heap without a rebuild
+
+    def _entry(self, kind, item, today):
+        """Heap entry of an item, or None if it never crosses that threshold."""
+        # Items without a readable date never expire
+        if item.expires is None:
+            return None
+        if kind == _EXPIRING_SOON:
+            if item.expires <= today:  # Already past its date: never expiring soon
+                return None
+            due = item.expires - EXPIRING_SOON_DAYS
+        else:
+            due = item.expires
+        self._sequence += 1
+        return (due, self._sequence, kind, item)
+
+    def _rebuild(self, lists, today):
+        heap = []
+        for kind, items in ((_EXPIRING_SOON, lists[0]), (_EXPIRED, lists[1])):
+            for item in items:
+                entry = self._entry(kind, item, today)
+                if entry is not None:
+                    heap.append(entry)
+        heapq.heapify(heap)
+        self._heap = heap
+        self._live = [{id(item): item for item in items} for items in lists[:2]]
+        self._lists = lists
+        self.rebuilds += 1
+
+    def _update(self, lists, today):
+        """Follow changed lists: push the entries of new Items, forget the ones that left."""
+        if self._lists is None or len(self._heap) > STALE_RATIO * (len(lists[0]) + len(lists[1])):
+            self._rebuild(lists, today)
+            return
+        for kind in (_EXPIRING_SOON, _EXPIRED):
+            if lists[kind] is self._lists[kind]:
+                continue
+            known = self._live[kind]
+            live = {}
+            for item in lists[kind]:
+                live[id(item)] = item
+                if id(item) not in known:
+                    self._push(kind, item, today)
+            self._live[kind] = live
+        if lists[1] is not self._lists[1] or lists[2] is not self._lists[2]:
+            # Entries popped on an earlier day whose move no longer holds (e.g. a copy
+            # was removed, or the name matched another item) are due again, as after a rebuild
+            copies = {(item.name, item.expiration_date) for item in lists[1]}
+            for item in lists[0]:
+                if item.expires is not None and item.expires - EXPIRING_SOON_DAYS <= today < item.expires \
+                        and (item.name, item.expiration_date) not in copies:
+                    self._push(_EXPIRING_SOON, item, today)
+            for item in lists[1]:
+                if item.expires is not None and item.expires <= today:
+                    self._push(_EXPIRED, item, today)
+        self._lists = lists
+        self.updates += 1
+
+    def _push(self, kind, item, today):
+        entry = self._entry(kind, item, today)
+        if entry is not None:
+            heapq.heappush(self._heap, entry)
+
+    def next_due(self):
+        """Date of the next threshold crossing, or None if no item has one."""
+        return date.fromordinal(self._heap[0][0]) if self._heap else None
+
+    def _current_lists(self):
+        return (self.in_stock.get_item_list(), self.expiring_soon.get_item_list(), self.expired.get_item_list())
+
+    def run(self, today=None):
+        """
+        Compute and apply the moves that are due.
+
+        Args:
+            today (date): The current date (default: date.today()).
+
+        Returns:
+            ExpiryBatch: The moves applied and the notifications to show; empty
+            if nothing was due.
+        """
+        today = (today or date.today()).toordinal()
+        lists = self._current_lists()
+        if self._lists is None or any(new is not old for new, old in zip(lists, self._lists)):
+            self._update(lists, today)
+        if not self._heap or self._heap[0][0] > today:
+            return ExpiryBatch((), ())
+
+        due = []
+        seen = set()
+        while self._heap and self._heap[0][0] <= today:
+            entry = heapq.heappop(self._heap)
+            kind, item = entry[2], entry[3]
+            if self._live[kind].get(id(item)) is item and (kind, id(item)) not in seen:  # Still in its list
+                seen.add((kind, id(item)))
+                due.append(entry)
+        if not due:
+            return ExpiryBatch((), ())
+        # Moves in list order, expiring soon first
+        positions = tuple({id(item): position for position, item in enumerate(items)} for items in lists[:2])
+        due.sort(key=lambda entry: (entry[2], positions[entry[2]][id(entry[3])]))
+        batch = self._plan(due, lists, today)
+        self._apply(batch.moves)
+        return batch
+
+    def _plan(self, due, lists, today):
+        _, expiring_soon_items, expired_items = lists
+        expiring_soon_keys = {(item.name, item.expiration_date) for item in expiring_soon_items}
+        expired_keys = {(item.name, item.amount, item.expiration_date) for item in expired_items}
+        moves = []
+        notifications = []
+        for _, _, kind, item in due:
+            if kind == _EXPIRING_SOON:
+                key = (item.name, item.expiration_date)
+                # Expires after today (checked when the heap was built, but the day may have changed since)
+                if item.expires <= today or key in expiring_soon_keys:
+                    continue
+                expiring_soon_keys.add(key)
+                moves.append(("add", self.expiring_soon.list_name, item))
+                notifications.append(("expiring_soon", item.name))
+            else:
+                key = (item.name, item.amount, item.expiration_date)
+                if key not in expired_keys:
+                    expired_keys.add(key)
+                    moves.append(("add", self.expired.list_name, item))
+                    moves.append(("add", self.shopping.list_name, item))
+                    notifications.append(("expired", item.name))
+                moves.append(("remove", self.expiring_soon.list_name, item))
+        return ExpiryBatch(tuple(moves), tuple(notifications))
+
+    def _apply(self, moves):
+        managers = {manager.list_name: manager
+                    for manager in (self.in_stock, self.expiring_soon, self.expired, self.shopping)}
+        for action, list_name, item in moves:
+            manager = managers[list_name]
+            if action == "add":
+                manager.add_item(item.name, item.amount, item.expiration_date, item.entry_date)
+            else:
+                manager.remove_item_by_name(item.name)
@@ -6,11 +6,11 @@ import os
 from jetson_inference import imageNet
 from jetson_utils import videoSource, videoOutput, cudaFont, Log
 
+from message_bus import BusClient, RECOGNITION_RESULT
+
 # Specify the input and output URIs here
 input_uri = "v4l2:///dev/video0"
 output_uri = "display://0"
-output_file = "recognized_item.txt"  # File to save the recognized item's name
-signal_file = "recognition_terminated.txt"  # Signal file to indicate recognition termination
 
 # load the recognition network
 net = imageNet("googlenet", sys.argv)
@@ -51,17 +51,16 @@ while time.time() - start_time < 10:  # Run for 5 seconds
     if not input.IsStreaming() or not output.IsStreaming():
         break
 
-# Save the recognized item's name to a file
-if recognized_item:
-    with open(output_file, "w") as f:
-        f.write(recognized_item)
-        
-# Create a signal file to indicate recognition termination
-with open(signal_file, "w") as signal:
-    signal.write("Recognition terminated")
+# Send the recognized item's name (None if nothing was recognized) to the GUI
+bus = BusClient()
+published = bus.connect() and bus.publish(RECOGNITION_RESULT, item=recognized_item)
+bus.close()
 
 # Close the camera window
 output.glfwDestroyWindow()
 
+# A failed exit tells management.py to answer the GUI in our place
+sys.exit(0 if published else 1)
+
 
 
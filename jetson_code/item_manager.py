@@ -1,38 +1,579 @@
-import boto3
 import json
 from botocore.exceptions import ClientError
 import base64
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime
 from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from envelope_encryption import EnvelopeCipher, is_envelope
+from aws_clients import get_client
+from resilience import ResilientCaller, ServiceUnavailable, FunctionError
+from item_model import ItemList
+
+# Upper bound on concurrent KMS decrypt calls made while loading a list
+MAX_DECRYPT_WORKERS = 8
+
+# Lambda functions behind each list operation, per storage layout:
+# "record" keeps all lists inside the user's item in the property table,
+# "rows" keeps one property_items row per item (see Migrate_To_Item_Rows)
+LIST_FUNCTIONS = {
+    "record": {"get": "Get_Items", "add": "Add_Item", "remove": "Remove_Item", "update": "Update_Item"},
+    "rows": {"get": "Get_List_Items", "add": "Put_List_Item", "remove": "Delete_List_Item", "update": "Update_List_Item"}
+}
+DEFAULT_LIST_FUNCTIONS = {
+    "record": {"get": "Get_Default_Items", "add": "Add_Item_To_Default_List", "remove": "Remove_Item_From_Default_List"},
+    "rows": {"get": "Get_List_Items", "add": "Put_List_Item", "remove": "Delete_List_Item"}
+}
+
+# Lambdas that only read and may be retried after a server error or timeout
+IDEMPOTENT_FUNCTIONS = {
+    "Get_Items", "Get_Default_Items", "Get_User_Snapshot", "Get_List_Items", "Check_Item_Existence",
+    "Get_Changes_Since"
+}
+# Seconds a call may take including retries (resilience.DEFAULT_DEADLINE for the rest)
+LAMBDA_DEADLINES = {
+    "Get_User_Snapshot": 8.0,
+    "Apply_Transition": 8.0
+}
+LONG_POLL_GRACE = 5.0  # Seconds a long poll may take beyond the wait it asked for
+
+# Apply_Transition calls per take-out when the record changed since the amount was read
+TRANSITION_ATTEMPTS = 2
+
+# Decrypted amounts remembered per user, keyed by their ciphertext
+DECRYPT_CACHE_SIZE = 1024
+DECRYPT_CACHE_TTL = 6 * 3600  # Seconds
+
+
+class DecryptCache:
+    """Bounded LRU of ciphertext -> decrypted amount with a time-to-live."""
+
+    def __init__(self, max_size=DECRYPT_CACHE_SIZE, ttl=DECRYPT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # ciphertext -> (plaintext, stored at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, ciphertext):
+        """Return the cached plaintext for a ciphertext, or None."""
+        with self._lock:
+            entry = self._entries.get(ciphertext)
+            if entry is not None and time.monotonic() - entry[1] >= self.ttl:
+                del self._entries[ciphertext]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(ciphertext)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, ciphertext, plaintext):
+        """Remember a decrypted amount, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[ciphertext] = (plaintext, time.monotonic())
+            self._entries.move_to_end(ciphertext)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """Return the size and hit/miss counters of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+
+
+_decrypt_caches = {}  # user_name -> DecryptCache shared by all of the user's list managers
+_decrypt_caches_lock = threading.Lock()
+
+
+def get_decrypt_cache(user_name):
+    """Return the decrypt cache shared by all list managers of a user."""
+    with _decrypt_caches_lock:
+        if user_name not in _decrypt_caches:
+            _decrypt_caches[user_name] = DecryptCache()
+        return _decrypt_caches[user_name]
+
+
+def clear_decrypt_caches(user_name=None):
+    """Clear the decrypt cache of one user, or of every user (e.g. on logout)."""
+    with _decrypt_caches_lock:
+        if user_name is None:
+            caches = list(_decrypt_caches.values())
+        else:
+            caches = [_decrypt_caches[user_name]] if user_name in _decrypt_caches else []
+    for cache in caches:
+        cache.clear()
+
+
+# Latency samples kept per call name for the percentiles (the most recent ones)
+METRICS_SAMPLES = 1024
+METRICS_FLUSH_INTERVAL = 60  # Seconds between writes of the metrics file
+METRICS_PREFIX = "smart_fridge"
+
+
+class Metrics:
+    """
+    Call-level counters and latencies of Lambda, KMS and GUI actions.
+
+    Calls are grouped by kind ("lambda", "kms", "envelope", "gui") and name
+    (e.g. the Lambda function name). For each group the call count, error
+    count, total time, payload bytes and a window of recent latencies for
+    p50/p95/p99 are kept.
+    """
+
+    def __init__(self, max_samples=METRICS_SAMPLES):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._calls = {}  # (kind, name) -> call statistics
+        self._counters = {}  # (kind, name) -> count
+
+    def _call_stats(self, kind, name):
+        key = (kind, name)
+        if key not in self._calls:
+            self._calls[key] = {
+                "count": 0,
+                "errors": 0,
+                "seconds": 0.0,
+                "max_seconds": 0.0,
+                "sent_bytes": 0,
+                "received_bytes": 0,
+                "samples": deque(maxlen=self.max_samples)
+            }
+        return self._calls[key]
+
+    def observe(self, kind, name, seconds, error=False, sent_bytes=0, received_bytes=0):
+        """Record one call and how long it took."""
+        with self._lock:
+            stats = self._call_stats(kind, name)
+            stats["count"] += 1
+            stats["errors"] += 1 if error else 0
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["sent_bytes"] += sent_bytes
+            stats["received_bytes"] += received_bytes
+            stats["samples"].append(seconds)
+
+    def count(self, kind, name, value=1):
+        """Increase a plain counter, e.g. ("list_cache", "hit")."""
+        with self._lock:
+            self._counters[(kind, name)] = self._counters.get((kind, name), 0) + value
+
+    @contextmanager
+    def timed(self, kind, name):
+        """Time the body of a with statement; an exception counts as an error."""
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(kind, name, time.perf_counter() - start, error=error)
+
+    def reset(self):
+        with self._lock:
+            self._calls.clear()
+            self._counters.clear()
+
+    @staticmethod
+    def _percentile(ordered, fraction):
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+    def snapshot(self):
+        """
+        Return all metrics as plain data.
+
+        Returns:
+            dict: "calls" (per "kind:name" counts, latencies in ms and payload
+            bytes), "counters", "decrypt_cache" (the user caches combined) and
+            "lambda_breaker" (circuit breaker state and retry counts).
+        """
+        with self._lock:
+            calls = {}
+            for (kind, name), stats in sorted(self._calls.items()):
+                ordered = sorted(stats["samples"])
+                calls[f"{kind}:{name}"] = {
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "avg_ms": stats["seconds"] / stats["count"] * 1000,
+                    "p50_ms": self._percentile(ordered, 0.50) * 1000,
+                    "p95_ms": self._percentile(ordered, 0.95) * 1000,
+                    "p99_ms": self._percentile(ordered, 0.99) * 1000,
+                    "max_ms": stats["max_seconds"] * 1000,
+                    "sent_bytes": stats["sent_bytes"],
+                    "received_bytes": stats["received_bytes"]
+                }
+            counters = {f"{kind}:{name}": value for (kind, name), value in sorted(self._counters.items())}
+
+        with _decrypt_caches_lock:
+            caches = list(_decrypt_caches.values())
+        cache = {"size": 0, "hits": 0, "misses": 0, "evictions": 0}
+        for cache_stats in (c.stats() for c in caches):
+            for field in cache:
+                cache[field] += cache_stats[field]
+        lookups = cache["hits"] + cache["misses"]
+        cache["hit_ratio"] = cache["hits"] / lookups if lookups else 0.0
+
+        breaker, long_poll_breaker = ({
+            "state": caller.breaker.state,
+            "retries": caller.retries,
+            "rejected": caller.rejected
+        } for caller in (lambda_resilience, long_poll_resilience))
+        return {"time": time.time(), "calls": calls, "counters": counters, "decrypt_cache": cache,
+                "lambda_breaker": breaker, "long_poll_breaker": long_poll_breaker}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """Render the metrics in the Prometheus text exposition format."""
+        data = self.snapshot()
+        lines = [
+            f"# TYPE {METRICS_PREFIX}_call_seconds summary",
+            f"# TYPE {METRICS_PREFIX}_call_errors_total counter",
+            f"# TYPE {METRICS_PREFIX}_call_sent_bytes_total counter",
+            f"# TYPE {METRICS_PREFIX}_call_received_bytes_total counter"
+        ]
+        for key, stats in data["calls"].items():
+            kind, name = key.split(":", 1)
+            labels = f'kind="{kind}",name="{name}"'
+            for quantile in ("0.5", "0.95", "0.99"):
+                field = "p" + quantile[2:].ljust(2, "0") + "_ms"
+                lines.append(f'{METRICS_PREFIX}_call_seconds{{{labels},quantile="{quantile}"}} {stats[field] / 1000:.6f}')
+            lines.append(f"{METRICS_PREFIX}_call_seconds_sum{{{labels}}} {stats['avg_ms'] * stats['count'] / 1000:.6f}")
+            lines.append(f"{METRICS_PREFIX}_call_seconds_count{{{labels}}} {stats['count']}")
+            lines.append(f"{METRICS_PREFIX}_call_errors_total{{{labels}}} {stats['errors']}")
+            lines.append(f"{METRICS_PREFIX}_call_sent_bytes_total{{{labels}}} {stats['sent_bytes']}")
+            lines.append(f"{METRICS_PREFIX}_call_received_bytes_total{{{labels}}} {stats['received_bytes']}")
+        lines.append(f"# TYPE {METRICS_PREFIX}_events_total counter")
+        for key, value in data["counters"].items():
+            kind, name = key.split(":", 1)
+            lines.append(f'{METRICS_PREFIX}_events_total{{kind="{kind}",name="{name}"}} {value}')
+        lines.append(f"# TYPE {METRICS_PREFIX}_decrypt_cache_hit_ratio gauge")
+        lines.append(f"{METRICS_PREFIX}_decrypt_cache_hit_ratio {data['decrypt_cache']['hit_ratio']:.6f}")
+        lines.append(f"# TYPE {METRICS_PREFIX}_decrypt_cache_entries gauge")
+        lines.append(f"{METRICS_PREFIX}_decrypt_cache_entries {data['decrypt_cache']['size']}")
+        lines.append(f"# TYPE {METRICS_PREFIX}_lambda_offline gauge")
+        lines.append(f"{METRICS_PREFIX}_lambda_offline {0 if data['lambda_breaker']['state'] == 'closed' else 1}")
+        lines.append(f"# TYPE {METRICS_PREFIX}_lambda_retries_total counter")
+        lines.append(f"{METRICS_PREFIX}_lambda_retries_total {data['lambda_breaker']['retries']}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()  # Process-wide metrics of all list managers
+
+
+def timed(name, kind="gui"):
+    """Time a GUI-level action, e.g. `with timed("confirm_in"): ...`."""
+    return metrics.timed(kind, name)
+
+
+class MetricsExporter:
+    """
+    Write the metrics to a file every few seconds from a background thread.
+
+    Files ending in .prom get the Prometheus text format (e.g. for the node
+    exporter's textfile collector), anything else JSON. The file is replaced
+    atomically, so readers never see a half-written file.
+    """
+
+    def __init__(self, path, interval=METRICS_FLUSH_INTERVAL, source=None):
+        self.path = path
+        self.interval = interval
+        self.source = source or metrics
+        self._stop = threading.Event()
+        self._thread = None
+
+    def flush(self):
+        """Write the current metrics to the file now."""
+        if self.path.endswith(".prom"):
+            content = self.source.to_prometheus()
+        else:
+            content = self.source.to_json()
+        temporary_path = self.path + ".tmp"
+        try:
+            with open(temporary_path, "w") as metrics_file:
+                metrics_file.write(content)
+            os.replace(temporary_path, self.path)
+        except OSError as e:
+            print(f"Error writing metrics file: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the thread and write the final values."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self.flush()
+
+
+# Retries, deadlines and the circuit breaker shared by every Lambda call of the process.
+# lambda_resilience.breaker.is_open tells the GUI that the device is offline.
+lambda_resilience = ResilientCaller()
+
+# Long polls (Get_Changes_Since with a wait) trip and probe a breaker of their own:
+# a half-open trial that may legitimately hang for the whole wait must not hold
+# back every other call, and a dead change channel must not mark the device offline.
+long_poll_resilience = ResilientCaller()
+
+
+def invoke_lambda(lambda_client, function_name, payload, deadline=None, caller=None):
+    """
+    Invoke a Lambda function synchronously and return its decoded response payload.
+
+    Throttling and server errors are retried with backoff within the function's
+    deadline. If Lambda stays unavailable, or the circuit breaker is open, a
+    {"statusCode": 503} payload is returned instead of raising, so callers can
+    fall back to their cached lists. Every attempt is recorded in metrics under
+    ("lambda", function_name). deadline overrides LAMBDA_DEADLINES for this call,
+    caller the ResilientCaller used (default lambda_resilience).
+    """
+    request = json.dumps(payload)
+
+    def attempt():
+        start = time.perf_counter()
+        response_bytes = b""
+        error = True
+        try:
+            response = lambda_client.invoke(
+                FunctionName=function_name,
+                InvocationType='RequestResponse',
+                Payload=request
+            )
+            response_bytes = response['Payload'].read()
+            # Unhandled errors inside the function come back as a payload with FunctionError set
+            error = 'FunctionError' in response
+        finally:
+            metrics.observe("lambda", function_name, time.perf_counter() - start, error=error,
+                            sent_bytes=len(request), received_bytes=len(response_bytes))
+        if error:
+            raise FunctionError(response_bytes.decode())
+        return json.loads(response_bytes.decode())
+
+    try:
+        return (caller or lambda_resilience).call(
+            function_name,
+            attempt,
+            idempotent=function_name in IDEMPOTENT_FUNCTIONS,
+            deadline=deadline or LAMBDA_DEADLINES.get(function_name)
+        )
+    except ServiceUnavailable as e:
+        metrics.count("lambda_unavailable", function_name)
+        print(f"Lambda unavailable: {e}")
+        return {"statusCode": 503, "body": json.dumps({"error": str(e)})}
+
+
+class RecordVersion:
+    """
+    Server-side version of a user's property record, shared by the user's list managers.
+
+    Every write Lambda increments the version by one. A write that moves it from
+    the last known value to exactly the next one is our own change, so the writing
+    manager can apply it to its cache. Any other jump means the record was also
+    changed elsewhere (e.g. from the Android app) and the user's caches are dropped.
+
+    The managers' caches are written from the Tk thread, the refresh worker
+    (expiry moves) and the change channel, so every read-modify-write of a cache
+    holds cache_lock, together with the version check that allows it.
+    """
+
+    def __init__(self):
+        self.value = None
+        self.managers = weakref.WeakSet()  # List managers whose caches follow this record
+        self.cache_lock = threading.RLock()
+        self._lock = threading.Lock()
+
+    def observe_read(self, version, reader=None):
+        """Record the version a list was read at, dropping the other caches if it moved."""
+        if version is None:
+            return
+        with self._lock:
+            moved = self.value is not None and version != self.value
+            self.value = version
+        if moved:
+            self.invalidate(keep=reader)
+
+    def observe_write(self, version):
+        """Return True if a write is the only change to the record since the last known version."""
+        with self._lock:
+            if version is not None and self.value is not None and version == self.value + 1:
+                self.value = version
+                return True
+            self.value = version
+        self.invalidate()
+        return False
+
+    def claim(self, version):
+        """
+        Claim a version fetched from the change log (Get_Changes_Since) for applying.
+
+        Returns:
+            str: "apply" if it is the next version, "seen" if the caches already
+            include it (e.g. our own write), "gap" if versions are missing.
+        """
+        with self._lock:
+            if self.value is not None and version <= self.value:
+                return "seen"
+            if self.value is None or version != self.value + 1:
+                return "gap"
+            self.value = version
+            return "apply"
+
+    def invalidate(self, keep=None):
+        """Drop the cache of every list manager except keep."""
+        with self.cache_lock:
+            for manager in list(self.managers):
+                if manager is not keep:
+                    manager._cache = None
+
+    def load(self, lists, version):
+        """Load a complete copy of the record (list_name -> items) into every list manager."""
+        with self.cache_lock:
+            with self._lock:
+                self.value = version
+            for manager in list(self.managers):
+                if manager.list_name in lists:
+                    manager.load_items(lists[manager.list_name])
+                else:
+                    manager._cache = None
+
+
+_record_versions = {}  # user_name -> RecordVersion
+_record_versions_lock = threading.Lock()
+
+
+def get_record_version(user_name):
+    """Return the record version tracker shared by all list managers of a user."""
+    with _record_versions_lock:
+        if user_name not in _record_versions:
+            _record_versions[user_name] = RecordVersion()
+        return _record_versions[user_name]
 
 
 class ItemManager:
-    def __init__(self, list_name, user_name):
+    def __init__(self, list_name, user_name, lambda_client=None, kms_client=None, envelope=None, schema="record"):
         self.list_name = list_name
         self.user_name = user_name
-        self.lambda_client = boto3.client('lambda')
-        self.kms_client = boto3.client('kms', region_name='eu-north-1')
+        self.schema = schema
+        self.functions = LIST_FUNCTIONS[schema]
+        self.lambda_client = lambda_client or get_client('lambda')
+        self.kms_client = kms_client or get_client('kms')
+        self.envelope = envelope  # Shared EnvelopeCipher when envelope encryption is on, otherwise None
+        self._envelope_reader = None  # Created on demand to read envelope records when the mode is off
+        self.decrypt_cache = get_decrypt_cache(user_name)
+        self._items = None
+        self._last_items = []  # Last loaded items, served while Lambda is unavailable
+        self._index = None  # Lowercase name -> first item with that name, built from the cache
         self._cache = None  # Cache to store items
+        self._item_list = None  # ItemList of the cached items, built on demand
+        self.record_version = get_record_version(user_name)
+        self.record_version.managers.add(self)
+        self.decrypt_failures = []  # (index, name, error) for items that failed to decrypt on the last load
+
+    @property
+    def _cache(self):
+        return self._items
+
+    @_cache.setter
+    def _cache(self, items):
+        # Any change to the cached items makes the name index stale
+        self._items = items
+        self._index = None
+        if items is not None:
+            self._last_items = items
+
+    def _name_index(self):
+        """Return the lowercase-name index of the cached items, building it if needed."""
+        if self._index is None:
+            index = {}
+            for item in self._items or []:
+                index.setdefault(item['name'].lower(), item)  # First match wins, like the Lambdas
+            self._index = index
+        return self._index
 
     def encrypt_data(self, data):
-        """Encrypt data using AWS KMS."""
-        try:
-            response = self.kms_client.encrypt(
-                KeyId='alias/MyEncryptionKey',
-                Plaintext=data.encode('utf-8')
-            )
-            return base64.b64encode(response['CiphertextBlob']).decode('utf-8')  # Encode as Base64
-        except ClientError as e:
-            print(f"Encryption error: {e}")
-            raise
+        """Encrypt data using AWS KMS (or the cached data key in envelope mode)."""
+        if self.envelope is not None:
+            with metrics.timed("envelope", "encrypt"):
+                encrypted_data = self.envelope.encrypt(data)
+        else:
+            try:
+                with metrics.timed("kms", "encrypt"):
+                    response = self.kms_client.encrypt(
+                        KeyId='alias/MyEncryptionKey',
+                        Plaintext=data.encode('utf-8')
+                    )
+                encrypted_data = base64.b64encode(response['CiphertextBlob']).decode('utf-8')  # Encode as Base64
+            except ClientError as e:
+                print(f"Encryption error: {e}")
+                raise
+        # Our own writes come back from Get_Items unchanged, so never decrypt them again
+        self.decrypt_cache.put(encrypted_data, data)
+        return encrypted_data
 
     def decrypt_data(self, encrypted_data):
+        """Decrypt data, reusing earlier results for the same ciphertext."""
+        data = self.decrypt_cache.get(encrypted_data)
+        if data is None:
+            data = self._decrypt_uncached(encrypted_data)
+            self.decrypt_cache.put(encrypted_data, data)
+        return data
+
+    def _decrypt_uncached(self, encrypted_data):
         """Decrypt data using AWS KMS."""
+        if is_envelope(encrypted_data):
+            # Envelope-encrypted amounts are readable in either mode
+            if self.envelope is None and self._envelope_reader is None:
+                self._envelope_reader = EnvelopeCipher(self.kms_client)
+            try:
+                with metrics.timed("envelope", "decrypt"):
+                    return (self.envelope or self._envelope_reader).decrypt(encrypted_data)
+            except (ClientError, ValueError) as e:
+                print(f"Decryption error: {e}")
+                raise
         try:
             # Decode the Base64-encoded encrypted data
             encrypted_bytes = base64.b64decode(encrypted_data)
-            response = self.kms_client.decrypt(
-                CiphertextBlob=encrypted_bytes
-            )
+            with metrics.timed("kms", "decrypt"):
+                response = self.kms_client.decrypt(
+                    CiphertextBlob=encrypted_bytes
+                )
             return response['Plaintext'].decode('utf-8')
         except ClientError as e:
             print(f"Decryption error: {e}")
@@ -47,18 +588,13 @@ class ItemManager:
                 item['amount'] = self.encrypt_data(str(item['amount']))
             payload['item'] = item
 
-        response = self.lambda_client.invoke(
-            FunctionName=function_name,
-            InvocationType='RequestResponse',
-            Payload=json.dumps(payload)
-        )
-        response_payload = json.loads(response['Payload'].read().decode())
+        response_payload = invoke_lambda(self.lambda_client, function_name, payload)
 
         # Decrypt only the 'amount' field in the response if needed
         if 'body' in response_payload:
             body = json.loads(response_payload['body'])
             if isinstance(body, list):
-                decrypted_items = [self.decrypt_item(item) for item in body]  # Sequential decryption
+                decrypted_items = self.decrypt_items(body)  # Parallel decryption
                 response_payload['body'] = json.dumps(decrypted_items)
 
         return response_payload
@@ -69,16 +605,44 @@ class ItemManager:
             item['amount'] = self.decrypt_data(item['amount'])
         return item
 
+    def decrypt_items(self, items):
+        """
+        Decrypt the 'amount' field of every item using a bounded thread pool.
+
+        The original order of the items is kept. An item whose amount cannot be
+        decrypted gets its amount set to None and is recorded in
+        self.decrypt_failures instead of failing the whole list.
+
+        Args:
+            items (list): Items as returned by the Lambda, with encrypted amounts.
+
+        Returns:
+            list: The same items with decrypted amounts.
+        """
+        self.decrypt_failures = []
+        pending = [(index, item) for index, item in enumerate(items) if 'amount' in item and item['amount']]
+        if not pending:
+            return items
+
+        workers = min(MAX_DECRYPT_WORKERS, len(pending))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self.decrypt_data, item['amount']) for _, item in pending]
+
+        for (index, item), future in zip(pending, futures):
+            try:
+                item['amount'] = future.result()
+            except Exception as e:
+                item['amount'] = None
+                self.decrypt_failures.append((index, item.get('name'), str(e)))
+
+        if self.decrypt_failures:
+            print(f"Failed to decrypt {len(self.decrypt_failures)} of {len(items)} items in {self.list_name}")
+        return items
+
     def call_lambda_remove(self, function_name, payload):
         """Call AWS Lambda and handle encryption/decryption for remove_item_by_name."""
         try:
-            response = self.lambda_client.invoke(
-                FunctionName=function_name,
-                InvocationType='RequestResponse',
-                Payload=json.dumps(payload)
-            )
-            response_payload = json.loads(response['Payload'].read().decode())
-            return response_payload
+            return invoke_lambda(self.lambda_client, function_name, payload)
         except Exception as e:
             print(f"Error invoking Lambda function: {e}")
             raise
@@ -86,7 +650,9 @@ class ItemManager:
     def get_items(self):
         """Retrieve and decrypt the items from the list."""
         if self._cache is not None:
+            metrics.count("list_cache", "hit")
             return self._cache  # Return cached items if available
+        metrics.count("list_cache", "miss")
 
         payload = {
             "user_name": self.user_name,
@@ -94,14 +660,66 @@ class ItemManager:
         }
 
         # Call the Lambda function to get the encrypted items
-        response = self.call_lambda('Get_Items', payload)
+        response = self.call_lambda(self.functions['get'], payload)
+        if response.get('statusCode') != 200:
+            # Show the last known list rather than nothing (e.g. while offline)
+            return self._last_items
 
         # Decrypt the items before returning them
         encrypted_items = json.loads(response['body'])
-        self._cache = encrypted_items  # Cache the items
+        with self.record_version.cache_lock:
+            self.record_version.observe_read(response.get('version'), reader=self)
+            self._cache = encrypted_items  # Cache the items
         return encrypted_items
 
-    def add_item(self, name, amount=None, expiration_date=None, entry_date=None):
+    def load_items(self, items):
+        """Fill the cache from items fetched elsewhere (e.g. a UserSnapshot), decrypting their amounts."""
+        # Decrypted on copies, other managers of the same list may be loaded from the same items
+        decrypted = self.decrypt_items([dict(item) for item in items])
+        with self.record_version.cache_lock:
+            self._cache = decrypted
+        return decrypted
+
+    def apply_change(self, change):
+        """
+        Apply one list change from Get_Changes_Since to the cached items.
+
+        Args:
+            change (dict): At change['index'], remove change['remove'] items and
+                insert change['items'] (amounts encrypted).
+
+        Returns:
+            bool: False if there is no cache or the change does not fit it.
+        """
+        inserted = self.decrypt_items([dict(item) for item in change['items']])
+        with self.record_version.cache_lock:
+            items = self._cache
+            if items is None or change['index'] + change['remove'] > len(items):
+                return False
+            self._cache = items[:change['index']] + inserted + items[change['index'] + change['remove']:]
+        return True
+
+    def _apply_write(self, response, change):
+        """
+        Apply a successful write to the cached items instead of refetching the list.
+
+        change receives the cached items and returns the updated list. If the
+        write failed or the record version shows other changes, the cache is
+        dropped and the next get_items refetches.
+        """
+        with self.record_version.cache_lock:
+            if response.get('statusCode') != 200:
+                self._cache = None
+                return
+            if response.get('duplicate') and response.get('version') is not None:
+                # A replayed write the Lambda applied before (e.g. its response was lost):
+                # caches at the version it returns already hold it, older ones are dropped
+                self.record_version.observe_read(response.get('version'))
+                return
+            if self.record_version.observe_write(response.get('version')) and self._cache is not None:
+                self._cache = change(self._cache)
+
+    def add_item(self, name, amount=None, expiration_date=None, entry_date=None, idempotency_key=None):
         item = {
             "name": name,
             "amount": amount,
@@ -113,16 +731,21 @@ class ItemManager:
             "list_name": self.list_name,
             "item": item
         }
+        if idempotency_key:
+            payload["idempotency_key"] = idempotency_key  # Lets the Lambda drop a replayed write
+
+        # Keep a plaintext copy for the cache, call_lambda encrypts the amount in place
+        cached_item = dict(item, amount=str(amount) if amount else amount)
 
         # Call the Lambda function to add the item
-        response = self.call_lambda('Add_Item', payload)
+        response = self.call_lambda(self.functions['add'], payload)
 
-        # Invalidate the cache to reflect the new item
-        self._cache = None
+        # Append the new item to the cache
+        self._apply_write(response, lambda items: items + [cached_item])
 
         return response
 
-    def remove_item_by_name(self, name):
+    def remove_item_by_name(self, name, idempotency_key=None):
         payload = {
             "user_name": self.user_name,
             "list_name": self.list_name,
@@ -130,40 +753,154 @@ class ItemManager:
                 "name": name  # No need to encrypt the name
             }
         }
+        if idempotency_key:
+            payload["idempotency_key"] = idempotency_key
 
         # Call the Lambda function to remove the item
-        response = self.call_lambda_remove('Remove_Item', payload)
+        response = self.call_lambda_remove(self.functions['remove'], payload)
+
+        def remove_first_match(items):
+            # Same rule as the Lambda: the first case-insensitive match is removed
+            for index, item in enumerate(items):
+                if item['name'].lower() == name.lower():
+                    return items[:index] + items[index + 1:]
+            return items
 
-        # Invalidate the cache to reflect the removed item
-        self._cache = None
+        # Remove the item from the cache
+        self._apply_write(response, remove_first_match)
 
         return response
 
-    def update_item(self, name, new_amount):
+    def update_item(self, name, new_amount, idempotency_key=None):
         items = self.get_items()
         for index, item in enumerate(items):
             if item['name'] == name:
-                # Create a copy of the item and update the amount
-                updated_item = item.copy()
-                updated_item['amount'] = self.encrypt_data(str(new_amount))  # Encrypt the new amount
-
-                # Prepare the payload
-                payload = {
-                    "user_name": self.user_name,
-                    "list_name": self.list_name,
-                    "item_index": index,
-                    "updated_item": updated_item
-                }
+                if self.schema == "rows":
+                    # Rows are addressed by name, call_lambda encrypts the amount
+                    payload = {
+                        "user_name": self.user_name,
+                        "list_name": self.list_name,
+                        "item": {"name": name, "amount": str(new_amount)}
+                    }
+                else:
+                    # Create a copy of the item and update the amount
+                    updated_item = item.copy()
+                    updated_item['amount'] = self.encrypt_data(str(new_amount))  # Encrypt the new amount
+
+                    # Prepare the payload
+                    payload = {
+                        "user_name": self.user_name,
+                        "list_name": self.list_name,
+                        "item_index": index,
+                        "updated_item": updated_item
+                    }
+                if idempotency_key:
+                    payload["idempotency_key"] = idempotency_key
 
                 # Call the Lambda function to update the item
-                response = self.call_lambda('Update_Item', payload)
+                response = self.call_lambda(self.functions['update'], payload)
 
-                # Invalidate the cache to reflect the updated item
-                self._cache = None
+                def replace_amount(items, index=index):
+                    updated = list(items)
+                    updated[index] = dict(items[index], amount=str(new_amount))
+                    return updated
+
+                # Update the amount in the cache
+                self._apply_write(response, replace_amount)
+
+                return response
 
+    def apply_transition(self, name, amount=None, entry_date=None, idempotency_key=None):
+        """
+        Take an item out of this list in a single Apply_Transition call.
+
+        The Lambda updates the item and its expiring-soon/expired copies with one
+        conditional DynamoDB write, and puts the item on the shopping list when
+        it is used up. The updated lists come back in the response and are loaded
+        into all list managers of the user, so no further calls are needed.
+
+        The remaining amount is computed from the cached amount, so the record
+        version the cache was read at goes along; if the record has moved on, the
+        Lambda refuses with 409 and the amount is computed again from a fresh read.
+
+        Args:
+            name (str): The name of the item.
+            amount (int): How many to take out, or None to take out all of it.
+            entry_date (str): Entry date for the shopping list item, defaults to today.
+            idempotency_key (str): "<device id>:<sequence>" of a write replayed from an outbox.
+
+        Returns:
+            dict: The Lambda response payload.
+        """
+        for attempt in range(TRANSITION_ATTEMPTS):
+            new_amount = None
+            if amount is not None:
+                current_amount = self.get_item_amount(name)
+                if current_amount is not None and int(current_amount) - int(amount) > 0:
+                    new_amount = int(current_amount) - int(amount)
+
+            payload = {
+                "user_name": self.user_name,
+                "list_name": self.list_name,
+                "item_name": name,  # No need to encrypt the name
+                "new_amount": None,
+                "shopping_item": None,
+                "schema": self.schema
+            }
+            if self._cache is not None and self.record_version.value is not None:
+                payload["expected_version"] = self.record_version.value  # The version the amount was read at
+            if idempotency_key:
+                payload["idempotency_key"] = idempotency_key
+            if new_amount is not None:
+                payload["new_amount"] = self.encrypt_data(str(new_amount))
+            else:
+                # Added to the shopping list by the Lambda unless it is already there
+                payload["shopping_item"] = {
+                    "name": name,
+                    "amount": self.encrypt_data("1"),
+                    "expiration_date": "N/A",
+                    "entry_date": entry_date or datetime.now().strftime("%d/%m/%Y")
+                }
+
+            response = self.call_lambda_remove('Apply_Transition', payload)
+
+            if response.get('statusCode') == 200:
+                self.record_version.load(json.loads(response['body']), response.get('version'))
+                return response
+            self.record_version.invalidate()
+            if response.get('statusCode') != 409:
                 return response
+            metrics.count("transition", "conflict")
+        return response
+
+    def find_item(self, name):
+        """Return the cached item with this name (case-insensitive), or None."""
+        self.get_items()  # Loads the cache if it is not valid
+        return self._name_index().get(name.lower())
+
+    def get_item_list(self):
+        """The cached items as an ItemList, converted once per change of the list."""
+        self._item_list = ItemList.of(self.get_items(), self._item_list)
+        return self._item_list
+
+    def has_item(self, name, verify=False):
+        """
+        Check if an item is in the list (case-insensitive).
+
+        Args:
+            name (str): The name of the item.
+            verify (bool): Ask the server (Check_Item_Existence) instead of the local cache.
+
+        Returns:
+            bool: True if the item exists.
+        """
+        if not verify:
+            return self.find_item(name) is not None
+        if self.schema == "rows":
+            # Reading the list is a keyed query in the row layout
+            self._cache = None
+            return self.find_item(name) is not None
 
-    def has_item(self, name):
         payload = {
             "user_name": self.user_name,
             "list_name": self.list_name,
@@ -172,6 +909,8 @@ class ItemManager:
 
         # Call the Lambda function to check if the item exists
         response = self.call_lambda('Check_Item_Existence', payload)
+        if response.get('statusCode') != 200:
+            return self.find_item(name) is not None  # Fall back to the cached list
         return json.loads(response['body'])
 
     def get_item_amount(self, name):
@@ -184,38 +923,43 @@ class ItemManager:
         Returns:
             str: The amount of the item if found, otherwise None.
         """
-        # Get all items in the list
-        items = self.get_items()
-
-        # Search for the item by name (case-insensitive comparison)
-        for item in items:
-            if item['name'].lower() == name.lower():  # Case-insensitive comparison
-                return item['amount']
+        # Look the item up by name (case-insensitive)
+        item = self.find_item(name)
 
         # If the item is not found, return None
-        return None
+        return item['amount'] if item is not None else None
 
 class DefaultListManager:
-    def __init__(self, user_name):
+    list_name = "default_list"
+
+    def __init__(self, user_name, lambda_client=None, schema="record"):
         self.user_name = user_name
-        self.lambda_client = boto3.client('lambda')
+        self.lambda_client = lambda_client or get_client('lambda')
+        self.schema = schema
+        self.functions = DEFAULT_LIST_FUNCTIONS[schema]
+        self._cache = None  # Filled by a UserSnapshot, updated when the list changes
+        self._last_items = []  # Last loaded items, served while Lambda is unavailable
+        self.record_version = get_record_version(user_name)
+        self.record_version.managers.add(self)
 
     def call_lambda(self, function_name, payload):
         """Call AWS Lambda."""
-        response = self.lambda_client.invoke(
-            FunctionName=function_name,
-            InvocationType='RequestResponse',
-            Payload=json.dumps(payload)
-        )
-        response_payload = json.loads(response['Payload'].read().decode())
-        return response_payload
+        return invoke_lambda(self.lambda_client, function_name, payload)
 
     def get_items(self):
         """Retrieve the default list items."""
+        if self._cache is not None:
+            metrics.count("list_cache", "hit")
+            return self._cache  # Return the items of the last snapshot if available
+        metrics.count("list_cache", "miss")
+
         payload = {
-            "user_name": self.user_name
+            "user_name": self.user_name,
+            "list_name": self.list_name
         }
-        response = self.call_lambda('Get_Default_Items', payload)
+        response = self.call_lambda(self.functions['get'], payload)
+        if response.get('statusCode') == 503:
+            return self._last_items  # Lambda unavailable, show the last known list
 
         # Check if the response contains an error
         if "error" in response:
@@ -224,19 +968,62 @@ class DefaultListManager:
 
         # Get the items from the response
         items = json.loads(response['body'])
+        self._last_items = items
+        return items
+
+    def load_items(self, items):
+        """Fill the cache from items fetched elsewhere (e.g. a UserSnapshot)."""
+        with self.record_version.cache_lock:
+            self._cache = items
+            self._last_items = items
         return items
 
-    def add_item(self, item_name):
+    def apply_change(self, change):
+        """Apply one list change from Get_Changes_Since, see ItemManager.apply_change."""
+        with self.record_version.cache_lock:
+            items = self._cache
+            if items is None or change['index'] + change['remove'] > len(items):
+                return False
+            self._cache = items[:change['index']] + change['items'] + items[change['index'] + change['remove']:]
+            self._last_items = self._cache
+        return True
+
+    def _apply_write(self, response, change):
+        """Apply a successful write to the cached items, see ItemManager._apply_write."""
+        with self.record_version.cache_lock:
+            if response.get('statusCode') != 200:
+                self._cache = None
+                return
+            if response.get('duplicate') and response.get('version') is not None:
+                self.record_version.observe_read(response.get('version'))
+                return
+            if self.record_version.observe_write(response.get('version')) and self._cache is not None:
+                self._cache = change(self._cache)
+
+    def _item_payload(self, item_name):
+        """Payload addressing one default list item in the current storage layout."""
+        if self.schema == "rows":
+            return {
+                "user_name": self.user_name,
+                "list_name": self.list_name,
+                "item": {"name": item_name}
+            }
+        return {
+            "user_name": self.user_name,
+            "item_name": item_name  # No encryption needed for item name
+        }
+
+    def add_item(self, item_name, idempotency_key=None):
         """Add an item to the default list."""
         try:
             # Prepare the payload for the Lambda function
-            payload = {
-                "user_name": self.user_name,
-                "item_name": item_name  # No encryption needed for item name
-            }
+            payload = self._item_payload(item_name)
+            if idempotency_key:
+                payload["idempotency_key"] = idempotency_key  # Lets the Lambda drop a replayed write
 
             # Call the Lambda function
-            response = self.call_lambda('Add_Item_To_Default_List', payload)
+            response = self.call_lambda(self.functions['add'], payload)
+            self._apply_write(response, lambda items: items + [item_name])
 
             return response
         except Exception as e:
@@ -245,17 +1032,17 @@ class DefaultListManager:
                 "body": json.dumps({"error": str(e)})
             }
 
-    def remove_item(self, item_name):
+    def remove_item(self, item_name, idempotency_key=None):
         """Remove an item from the default list."""
         try:
             # Prepare the payload for the Lambda function
-            payload = {
-                "user_name": self.user_name,
-                "item_name": item_name  # No encryption needed for item name
-            }
+            payload = self._item_payload(item_name)
+            if idempotency_key:
+                payload["idempotency_key"] = idempotency_key  # Lets the Lambda drop a replayed write
 
             # Call the Lambda function
-            response = self.call_lambda('Remove_Item_From_Default_List', payload)
+            response = self.call_lambda(self.functions['remove'], payload)
+            self._apply_write(response, lambda items: [item for item in items if item != item_name])
 
             return response
         except Exception as e:
@@ -264,26 +1051,154 @@ class DefaultListManager:
                 "body": json.dumps({"error": str(e)})
             }
 
+class UserSnapshot:
+    """
+    Fetch all lists of a user with one Get_User_Snapshot call (one DynamoDB read)
+    and hand each registered list manager its slice.
+
+    Once every registered manager holds its list, refresh asks Get_Changes_Since
+    for the changes after the known record version instead, which is a few bytes
+    when nothing changed.
+    """
+
+    def __init__(self, user_name, lambda_client=None, schema="record", use_changes=True):
+        self.user_name = user_name
+        self.lambda_client = lambda_client or get_client('lambda')
+        self.schema = schema
+        self.use_changes = use_changes and schema == "record"  # The change log follows the property table
+        self.record_version = get_record_version(user_name)
+        self._managers = {}  # list_name -> ItemManager / DefaultListManager
+        self.changed_lists = set()  # Names of the lists the last refresh changed
+        self._apply_lock = threading.Lock()  # One refresh at a time updates the managers
+
+    def register(self, *managers):
+        """Register the list managers that should be filled by refresh."""
+        for manager in managers:
+            self._managers[manager.list_name] = manager
+
+    def refresh(self):
+        """
+        Bring every registered manager up to date in a single round-trip.
+
+        Returns:
+            bool: True if the lists are up to date, False if the Lambda reported an error.
+        """
+        if self.use_changes and self.has_lists():
+            updated = self.refresh_changes()
+            if updated is not None:
+                return updated
+        return self.refresh_snapshot()
+
+    def has_lists(self):
+        """True once every registered manager holds its list at a known record version."""
+        return self.record_version.value is not None and \
+            all(manager._cache is not None for manager in self._managers.values())
+
+    def refresh_changes(self, wait=0, lambda_client=None):
+        """
+        Apply the changes made since the known record version (Get_Changes_Since).
+
+        Args:
+            wait (float): Seconds the Lambda may hold the request until a change
+                arrives (long poll), 0 to answer at once.
+            lambda_client: Client for the call, e.g. one with a read timeout
+                longer than the wait (default: the snapshot's client).
+
+        Returns:
+            bool: True if the lists are up to date, False if Lambda is unavailable,
+            None if a full snapshot is needed (the change log does not reach back
+            far enough or a change did not fit a cached list).
+        """
+        payload = {"user_name": self.user_name, "cursor": self.record_version.value}
+        if wait:
+            payload["wait"] = wait
+        try:
+            if wait:
+                response_payload = invoke_lambda(lambda_client or self.lambda_client, 'Get_Changes_Since', payload,
+                                                 deadline=wait + LONG_POLL_GRACE, caller=long_poll_resilience)
+            else:
+                response_payload = invoke_lambda(lambda_client or self.lambda_client, 'Get_Changes_Since', payload)
+        except Exception as e:
+            print(f"Change log unavailable, reading full snapshots: {e}")
+            self.use_changes = False  # E.g. the function is not deployed
+            return None
+        status = response_payload.get('statusCode')
+        if status == 503:
+            return False
+        if status != 200:
+            if status != 410:
+                print("Changes error:", response_payload.get('body'))
+            return None
+        with self._apply_lock, self.record_version.cache_lock:
+            return self._apply_changes(json.loads(response_payload['body'])['changes'])
+
+    def _apply_changes(self, entries):
+        self.changed_lists = set()
+        changed = False
+        for entry in entries:
+            claim = self.record_version.claim(entry['version'])
+            if claim == "seen":
+                continue  # Already in the caches, e.g. a write made by this device
+            if claim == "gap":
+                return None
+            changed = True
+            for change in entry['changes']:
+                manager = self._managers.get(change['list_name'])
+                if manager is not None:
+                    if not manager.apply_change(change):
+                        return None
+                    self.changed_lists.add(change['list_name'])
+        if changed:
+            # Managers outside this snapshot do not follow the change log
+            for manager in list(self.record_version.managers):
+                if self._managers.get(manager.list_name) is not manager:
+                    manager._cache = None
+        return True
+
+    def refresh_snapshot(self):
+        """
+        Fetch every list in a single round-trip and load each registered manager.
+
+        Returns:
+            bool: True if the snapshot was loaded, False if the Lambda reported an error.
+        """
+        response_payload = invoke_lambda(self.lambda_client, 'Get_User_Snapshot',
+                                         {"user_name": self.user_name, "schema": self.schema})
+        if response_payload.get('statusCode') != 200:
+            print("Snapshot error:", response_payload.get('body'))
+            return False
+
+        lists = json.loads(response_payload['body'])
+        with self._apply_lock, self.record_version.cache_lock:
+            self.record_version.observe_read(response_payload.get('version'))
+            self.changed_lists = set()
+            for list_name, manager in self._managers.items():
+                previous = manager._cache
+                if manager.load_items(lists.get(list_name, [])) != previous:
+                    self.changed_lists.add(list_name)
+        return True
+
+
 class Expired(ItemManager):
-    def __init__(self, list_name="expired_list", user_name=None):
-        super().__init__(list_name, user_name)
+    def __init__(self, list_name="expired_list", user_name=None, **kwargs):
+        super().__init__(list_name, user_name, **kwargs)
 
 
 class ExpiringSoon(ItemManager):
-    def __init__(self, list_name="expiring_soon_list", user_name=None):
-        super().__init__(list_name, user_name)
+    def __init__(self, list_name="expiring_soon_list", user_name=None, **kwargs):
+        super().__init__(list_name, user_name, **kwargs)
 
 
 class InStock(ItemManager):
-    def __init__(self, list_name="in_stock_list", user_name=None):
-        super().__init__(list_name, user_name)
+    def __init__(self, list_name="in_stock_list", user_name=None, **kwargs):
+        super().__init__(list_name, user_name, **kwargs)
 
 
 class Shopping(ItemManager):
-    def __init__(self, list_name="shopping_list", user_name=None):
-        super().__init__(list_name, user_name)
+    def __init__(self, list_name="shopping_list", user_name=None, **kwargs):
+        super().__init__(list_name, user_name, **kwargs)
 
 
 class DefaultList(DefaultListManager):
-    def __init__(self, user_name=None):
-        super().__init__(user_name)
\ No newline at end of file
+    def __init__(self, user_name=None, **kwargs):
+        super().__init__(user_name, **kwargs)
\ No newline at end of file
@@ -0,0 +1,164 @@
+from datetime import datetime
+
+# Typed view of the items the Lambdas return. The managers keep their caches
+# as the dicts of the Lambda JSON payloads; an ItemList is built from such a
+# list once, when it changes, so per-tick code (the refresh worker, the expiry
+# scheduler, name lookups) reads normalized fields instead of parsing date
+# strings and lowering names again every second.
+
+DATE_FORMAT = "%d/%m/%Y"
+DEFAULT_SHELF_LIFE_DAYS = 10  # Expiration of items entered without a date ("N/A")
+FIELDS = ("name", "amount", "expiration_date", "entry_date")
+
+
+def parse_ordinal(text):
+    """Day ordinal of a dd/mm/yyyy date, or None for "N/A", empty or malformed dates."""
+    if not text or text.lower() == "n/a":
+        return None
+    try:
+        return datetime.strptime(text, DATE_FORMAT).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_quantity(amount):
+    """Amount as an int, or None if it is not a whole number (e.g. still encrypted)."""
+    try:
+        return int(amount)
+    except (TypeError, ValueError):
+        return None
+
+
+class Item:
+    """
+    One list entry. The original fields are kept as they came so the item
+    converts back to exactly the same payload; the derived fields are:
+
+        key       lowercase name, the key the Lambdas match names by
+        quantity  amount as an int, or None
+        entry     entry date as a day ordinal, or None
+        expires   expiration date as a day ordinal, entry + 10 days for "N/A",
+                  or None if neither date can be read
+
+    Items can be read like the dicts they replace (item['name']).
+    """
+
+    __slots__ = ("name", "amount", "expiration_date", "entry_date", "extra", "absent",
+                 "key", "quantity", "entry", "expires")
+
+    def __init__(self, name, amount=None, expiration_date=None, entry_date=None, extra=None, absent=()):
+        self.name = name
+        self.amount = amount
+        self.expiration_date = expiration_date
+        self.entry_date = entry_date
+        self.extra = extra  # Any other keys of the payload, or None
+        self.absent = absent  # Fields the payload did not have, left out of to_dict
+        self.key = name.lower()
+        self.quantity = parse_quantity(amount)
+        self.entry = parse_ordinal(entry_date)
+        self.expires = parse_ordinal(expiration_date)
+        if self.expires is None and self.entry is not None and (not expiration_date or expiration_date.lower() == "n/a"):
+            self.expires = self.entry + DEFAULT_SHELF_LIFE_DAYS  # Same rule as the GUI's default expiration
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build an item from a Lambda payload dict."""
+        extra = {key: value for key, value in data.items() if key not in FIELDS} or None
+        absent = tuple(field for field in FIELDS if field not in data)
+        return cls(data['name'], data.get('amount'), data.get('expiration_date'), data.get('entry_date'), extra, absent)
+
+    def to_dict(self):
+        """The Lambda payload dict the item was built from."""
+        data = {"name": self.name, "amount": self.amount,
+                "expiration_date": self.expiration_date, "entry_date": self.entry_date}
+        for field in self.absent:
+            del data[field]
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def expiration(self):
+        """Expiration as a date, or None."""
+        return datetime.fromordinal(self.expires).date() if self.expires is not None else None
+
+    def __getitem__(self, key):
+        if key in FIELDS and key not in self.absent:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        if not isinstance(other, Item):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __hash__(self):
+        return hash((self.name, self.amount, self.expiration_date, self.entry_date))
+
+    def __repr__(self):
+        return f"Item({self.name!r}, {self.amount!r}, {self.expiration_date!r}, {self.entry_date!r})"
+
+
+class ItemList:
+    """
+    The Items of one cached list, with its name index. Build it with
+    ItemList.of so an unchanged list is not converted again:
+
+        self._item_list = ItemList.of(self.get_items(), self._item_list)
+    """
+
+    __slots__ = ("source", "items", "_index")
+
+    def __init__(self, source, previous=None):
+        """
+        Args:
+            source (list): Item dicts as cached by a manager; never changed in place.
+            previous (ItemList): List of an earlier cache; the Items of the dicts
+                both lists hold (the managers copy only the dicts a write changes)
+                are taken over instead of being parsed again.
+        """
+        self.source = source
+        # previous.source keeps its dicts alive, so their ids cannot be reused meanwhile
+        known = {id(data): item for data, item in zip(previous.source, previous.items)} if previous is not None else {}
+        self.items = tuple(known.get(id(data)) or Item.from_dict(data) for data in source)
+        self._index = None
+
+    @classmethod
+    def of(cls, source, previous=None):
+        """previous if it was built from this very list, otherwise a new ItemList sharing its unchanged Items."""
+        if previous is not None and previous.source is source:
+            return previous
+        return cls(source, previous)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def index_of(self, name):
+        """Index of the first item with this name (case-insensitive), or None."""
+        if self._index is None:
+            index = {}
+            for position, item in enumerate(self.items):
+                index.setdefault(item.key, position)  # First match wins, like the Lambdas
+            self._index = index
+        return self._index.get(name.lower())
+
+    def find(self, name):
+        """First item with this name (case-insensitive), or None."""
+        position = self.index_of(name)
+        return self.items[position] if position is not None else None
+
+    def to_dicts(self):
+        return [item.to_dict() for item in self.items]
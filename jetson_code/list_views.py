@@ -0,0 +1,254 @@
+from item_model import Item
+
+# Keeps the GUI's list Treeviews in step with the list managers. Instead of
+# deleting and reinserting every row on each tick, the new items are compared
+# with the rows on screen by name and only the differences are applied, so an
+# unchanged list costs no Tk calls and scroll position and selection survive.
+
+
+def item_row(item):
+    """Row values of an item list entry (in stock, expiring soon, expired, shopping)."""
+    return (item['name'], item['amount'], item['expiration_date'], item['entry_date'])
+
+
+def name_row(item):
+    """Row values of a default list entry (a plain name)."""
+    return (item,)
+
+
+class TreeviewBinder:
+    """
+    Reconciles a ttk.Treeview with a list of items.
+
+    Every row's iid is the item's name; a repeated name gets "#2", "#3", ...
+    appended, like the Lambdas the first match is the one addressed by name.
+
+        in_stock_view = TreeviewBinder(in_stock_treeview, item_row)
+        in_stock_view.update(Is.get_items())
+    """
+
+    def __init__(self, treeview, row_values=item_row):
+        """
+        Args:
+            treeview (ttk.Treeview): The view to fill; all its rows are owned by the binder.
+            row_values: Function turning an item into the tuple of row values.
+        """
+        self.treeview = treeview
+        self.row_values = row_values
+        self._items = None  # Item list shown, caches hand out a new list on every change
+        self._fingerprint = None
+        self._keys = []  # Row iids in display order
+        self._values = {}  # iid -> row values shown
+
+    def _keyed_rows(self, rows):
+        keys = []
+        seen = {}
+        for values in rows:
+            name = str(values[0])
+            count = seen.get(name, 0) + 1
+            seen[name] = count
+            keys.append(name if count == 1 else f"{name}#{count}")
+        return keys
+
+    def update(self, items):
+        """
+        Show items, changing only the rows that differ.
+
+        Returns:
+            bool: False if the list was unchanged and nothing was done.
+        """
+        if items is self._items:
+            return False
+        rows = [self.row_values(item) for item in items]
+        fingerprint = hash(tuple(rows))
+        if fingerprint == self._fingerprint and rows == [self._values[key] for key in self._keys]:
+            self._items = items
+            return False
+
+        keys = self._keyed_rows(rows)
+        new_values = dict(zip(keys, rows))
+
+        # Rows that are gone
+        removed = [key for key in self._keys if key not in new_values]
+        if removed:
+            self.treeview.delete(*removed)
+        current = [key for key in self._keys if key in new_values]
+
+        # New rows, moved rows and rows with new values, in display order
+        for index, (key, values) in enumerate(zip(keys, rows)):
+            if key not in self._values:
+                self.treeview.insert("", index, iid=key, values=values)
+                current.insert(index, key)
+                continue
+            if current[index] != key:
+                self.treeview.move(key, "", index)
+                current.remove(key)
+                current.insert(index, key)
+            if self._values[key] != values:
+                self.treeview.item(key, values=values)
+
+        self._keys = keys
+        self._values = new_values
+        self._items = items
+        self._fingerprint = fingerprint
+        return True
+
+    def clear(self):
+        """Remove all rows, e.g. before the view is filled for another user."""
+        if self._keys:
+            self.treeview.delete(*self._keys)
+        self._items = self._fingerprint = None
+        self._keys = []
+        self._values = {}
+
+
+# Rows materialized below the visible ones, so scrolling a row or two only
+# swaps rows at the edges
+WINDOW_MARGIN = 2
+DEFAULT_ROW_HEIGHT = 20  # Pixels, ttk's default Treeview row height
+SORT_ARROWS = {False: " ▲", True: " ▼"}
+
+
+def sort_value(item, column):
+    """Sort key of an item for a column: names case-insensitively, dates by day, unknown dates last."""
+    if isinstance(item, str):
+        return item.lower()  # Default list entries are plain names
+    if isinstance(item, dict):
+        item = Item.from_dict(item)
+    if column == "expiration_date":
+        return (item.expires is None, item.expires or 0)
+    if column == "entry_date":
+        return (item.entry is None, item.entry or 0)
+    if column == "amount":
+        return (item.quantity is None, item.quantity or 0)
+    return item.key
+
+
+class VirtualTreeview:
+    """
+    Shows a list of any length in a ttk.Treeview that only holds the rows in view.
+
+    The items stay in the cached list; scrolling moves a window over it and the
+    TreeviewBinder swaps the rows that enter and leave the window. A heading
+    click sorts by that column; the order is computed once per list change.
+
+        in_stock_view = VirtualTreeview(in_stock_treeview, scrollbar=scrollbar_IS)
+        in_stock_view.update(Is.get_item_list())
+    """
+
+    def __init__(self, treeview, row_values=item_row, scrollbar=None, sortable=("item", "expiration_date"),
+                 row_height=DEFAULT_ROW_HEIGHT):
+        """
+        Args:
+            treeview (ttk.Treeview): The view to fill; its own scrolling is not used.
+            row_values: Function turning an item into the tuple of row values.
+            scrollbar (ttk.Scrollbar): Scrollbar to drive the window with.
+            sortable: Columns whose heading sorts the list when clicked.
+            row_height (int): Row height in pixels (the Treeview style's rowheight).
+        """
+        self.treeview = treeview
+        self.binder = TreeviewBinder(treeview, row_values)
+        self.scrollbar = scrollbar
+        self.items = []
+        self.offset = 0  # Index (in display order) of the first row in view
+        self.visible_rows = int(treeview.cget("height"))
+        self.row_height = row_height
+        self.sort_column = None
+        self.sort_reverse = False
+        self._order = None  # Item indexes in display order, None for list order
+
+        treeview.configure(yscrollcommand="")
+        if scrollbar is not None:
+            scrollbar.configure(command=self.yview)
+        for event in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            treeview.bind(event, self._on_wheel)
+        treeview.bind("<Configure>", self._on_configure, add="+")
+        self._headings = {}
+        for column in sortable:
+            if column in treeview["columns"]:
+                self._headings[column] = treeview.heading(column, "text")
+                treeview.heading(column, command=lambda column=column: self.sort_by(column))
+
+    def update(self, items):
+        """
+        Show a new version of the list, keeping the scroll position.
+
+        Returns:
+            bool: False if the list was unchanged and nothing was done.
+        """
+        if items is self.items:
+            return False
+        self.items = items
+        self._sort()
+        return self._render()
+
+    def sort_by(self, column):
+        """Sort by a column; sorting by the same column again reverses the order."""
+        self.sort_reverse = not self.sort_reverse if column == self.sort_column else False
+        self.sort_column = column
+        for name, text in self._headings.items():
+            self.treeview.heading(name, text=text + (SORT_ARROWS[self.sort_reverse] if name == column else ""))
+        self._sort()
+        self.offset = 0
+        self._render()
+
+    def _sort(self):
+        if self.sort_column is None:
+            self._order = None
+            return
+        column = self.sort_column
+        items = self.items
+        self._order = sorted(range(len(items)), key=lambda index: sort_value(items[index], column),
+                             reverse=self.sort_reverse)
+
+    def _window(self):
+        end = self.offset + self.visible_rows + WINDOW_MARGIN
+        if self._order is None:
+            return self.items[self.offset:end]
+        return [self.items[index] for index in self._order[self.offset:end]]
+
+    def _render(self):
+        self.offset = max(0, min(self.offset, len(self.items) - self.visible_rows))
+        changed = self.binder.update(list(self._window()))
+        if self.scrollbar is not None:
+            total = len(self.items)
+            if total > self.visible_rows:
+                self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.visible_rows) / total))
+            else:
+                self.scrollbar.set(0.0, 1.0)
+        return changed
+
+    def scroll_to(self, offset):
+        if offset != self.offset:
+            self.offset = offset
+            self._render()
+
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", count, "units" or "pages")."""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.items)))
+        elif args[0] == "scroll":
+            step = self.visible_rows if args[2] == "pages" else 1
+            self.scroll_to(self.offset + int(args[1]) * step)
+
+    def _on_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.yview("scroll", -3, "units")
+        else:
+            self.yview("scroll", 3, "units")
+        return "break"  # The Treeview's own scrolling would move inside the window
+
+    def _on_configure(self, event):
+        # Show as many rows as fit; the heading takes about one row
+        visible_rows = max(1, event.height // self.row_height - 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self._render()
+
+    def clear(self):
+        self.items = []
+        self._order = None
+        self.offset = 0
+        self.binder.clear()
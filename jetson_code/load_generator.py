@@ -0,0 +1,261 @@
+import argparse
+import heapq
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import item_manager
+import resilience
+from item_manager import InStock, ExpiringSoon, Expired, Shopping, DefaultList, UserSnapshot, Metrics
+from local_backends import LocalKMS, LocalDynamoDB, local_lambda_for
+from resilience import CircuitBreaker, ResilientCaller
+
+# Load test of the Lambda set and the property table. A fleet of simulated
+# fridges runs the real ItemManager code (one periodic_update refresh per tick
+# plus occasional user actions) while app clients call the public Lambdas.
+# Everything runs in-process against the stand-ins from local_backends.py.
+#
+#   python3 load_generator.py --fridges 500 --apps 100 --duration 30
+#   python3 load_generator.py --fridge-mix refresh=80,add=10,take_out=10 --lambda-latency 0.02
+
+ITEM_NAMES = ["Milk", "Eggs", "Butter", "Cheese", "Yogurt", "Chicken", "Tomato", "Lettuce", "Apple", "Orange Juice"]
+
+
+def parse_mix(text):
+    """Parse "name=weight,name=weight" into a list of (name, weight)."""
+    mix = []
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix.append((name.strip(), float(weight or 1)))
+    return mix
+
+
+class Fridge:
+    """One Jetson: the five list managers of a user and the snapshot GUI.py refreshes every tick."""
+
+    def __init__(self, user_name, lambda_client, kms, rng):
+        self.rng = rng
+        clients = {"lambda_client": lambda_client, "kms_client": kms}
+        self.Is = InStock("in_stock_list", user_name, **clients)
+        self.sh = Shopping("shopping_list", user_name, **clients)
+        self.snapshot = UserSnapshot(user_name, lambda_client=lambda_client)
+        self.snapshot.register(
+            self.Is,
+            ExpiringSoon("expiring_soon_list", user_name, **clients),
+            Expired("expired_list", user_name, **clients),
+            self.sh,
+            DefaultList(user_name, lambda_client=lambda_client)
+        )
+
+    def refresh(self):
+        return self.snapshot.refresh()
+
+    def add(self):
+        name = self.rng.choice(ITEM_NAMES)
+        if self.Is.has_item(name):
+            return True  # confirm_in stops here as well
+        response = self.Is.add_item(name, str(self.rng.randint(1, 6)), "N/A", time.strftime("%d/%m/%Y"))
+        return response.get('statusCode') == 200
+
+    def take_out(self):
+        items = self.Is.get_items()
+        if not items:
+            return True
+        response = self.Is.apply_transition(self.rng.choice(items)['name'], 1)
+        return response.get('statusCode') in (200, 404, 409)
+
+
+class AppClient:
+    """An Android app session calling the public Lambdas through API Gateway."""
+
+    def __init__(self, user_name, lambda_client, rng):
+        self.user_name = user_name
+        self.lambda_client = lambda_client
+        self.rng = rng
+
+    def _invoke(self, function_name, body):
+        # API Gateway passes the request body as a string
+        response = self.lambda_client.invoke(FunctionName=function_name,
+                                             Payload=json.dumps({"body": json.dumps(body)}))
+        return json.loads(response['Payload'].read())
+
+    def get(self):
+        list_name = self.rng.choice(["in_stock_list", "shopping_list"])
+        response = self._invoke("Get_Items_Public", {"user_name": self.user_name, "list_name": list_name})
+        return response.get('statusCode') == 200
+
+    def delete(self):
+        response = self._invoke("Delete_Item_Public", {
+            "user_name": self.user_name,
+            "list_name": "shopping_list",
+            "item": {"name": self.rng.choice(ITEM_NAMES)}
+        })
+        return response.get('statusCode') in (200, 404)  # 404: nothing to delete
+
+
+class LoadGenerator:
+    """
+    Schedules fridge ticks and app requests on a thread pool and records their latencies.
+
+    Every actor reschedules itself a fixed delay after its previous action
+    finished, like root.after in periodic_update. If the pool cannot keep up,
+    actions start late; that delay is recorded as scheduling lag.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.results = Metrics(max_samples=1000000)
+        self.kms = LocalKMS(delay=args.kms_latency)
+        self.dynamodb = LocalDynamoDB()
+        self.lambda_client = local_lambda_for(dynamodb=self.dynamodb, kms=self.kms)
+        self.fridge_mix = parse_mix(args.fridge_mix)
+        self.app_mix = parse_mix(args.app_mix)
+        self._queue = []  # (due time, sequence, actor kind, actor)
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+        # Each simulated fridge would be its own process with its own breaker;
+        # here they share one, so keep it closed and let errors show in the report
+        item_manager.lambda_resilience = ResilientCaller(CircuitBreaker(failure_threshold=float("inf")))
+        resilience.MAX_CONCURRENT_CALLS = max(resilience.MAX_CONCURRENT_CALLS, args.workers)
+
+    def setup(self):
+        """Create the users, put a few items in every fridge and reset the counters."""
+        self.fridges = []
+        for i in range(self.args.fridges):
+            user_name = f"load_user_{i}"
+            self.lambda_client.invoke(FunctionName="editUsersData", Payload=json.dumps({"user_name": user_name}))
+            fridge = Fridge(user_name, self.lambda_client, self.kms, random.Random(self.rng.random()))
+            for name in self.rng.sample(ITEM_NAMES, self.args.items):
+                fridge.Is.add_item(name, str(self.rng.randint(1, 6)), "N/A", "01/01/2025")
+            self.fridges.append(fridge)
+        self.apps = [AppClient(f"load_user_{i % self.args.fridges}", self.lambda_client, random.Random(self.rng.random()))
+                     for i in range(self.args.apps)]
+
+        # Only the load itself is measured
+        table = self.dynamodb.Table("property")
+        table.read_units = table.write_units = 0.0
+        table.units_by_partition.clear()
+        table.requests = 0
+        changes = self.dynamodb.Table("property_changes")
+        changes.read_units = changes.write_units = 0.0
+        changes.requests = 0
+        self.lambda_client.calls = 0
+        self.lambda_client.calls_by_function.clear()
+        self.lambda_client.latency = self.args.lambda_latency
+        table.latency = self.args.dynamo_latency
+
+    def _schedule(self, due, kind, actor):
+        with self._lock:
+            self._sequence += 1
+            heapq.heappush(self._queue, (due, self._sequence, kind, actor))
+        self._wakeup.set()
+
+    def _pick(self, mix):
+        return self.rng.choices([name for name, _ in mix], weights=[weight for _, weight in mix])[0]
+
+    def _run_action(self, due, kind, actor):
+        start = time.perf_counter()
+        self.results.observe("lag", kind, max(0.0, start - due))
+        action = self._pick(self.fridge_mix if kind == "fridge" else self.app_mix)
+        try:
+            ok = getattr(actor, action)()
+        except Exception:
+            ok = False
+        finished = time.perf_counter()
+        self.results.observe(kind, action, finished - start, error=not ok)
+        if finished < self.stop_at:
+            interval = self.args.tick if kind == "fridge" else self.args.app_interval
+            self._schedule(finished + interval, kind, actor)
+
+    def run(self):
+        """Run the load for the configured duration and return the wall time used."""
+        begin = time.perf_counter()
+        self.stop_at = begin + self.args.duration
+        # Spread the first actions over one interval so the fleet does not start in lockstep
+        for fridge in self.fridges:
+            self._schedule(begin + self.rng.uniform(0, self.args.tick), "fridge", fridge)
+        for app in self.apps:
+            self._schedule(begin + self.rng.uniform(0, self.args.app_interval), "app", app)
+
+        with ThreadPoolExecutor(max_workers=self.args.workers) as executor:
+            while time.perf_counter() < self.stop_at:
+                with self._lock:
+                    now = time.perf_counter()
+                    due_events = []
+                    while self._queue and self._queue[0][0] <= now:
+                        due_events.append(heapq.heappop(self._queue))
+                    next_due = self._queue[0][0] if self._queue else now + 0.05
+                for due, _, kind, actor in due_events:
+                    executor.submit(self._run_action, due, kind, actor)
+                self._wakeup.clear()
+                self._wakeup.wait(max(0.0, min(next_due, self.stop_at) - time.perf_counter()))
+        return time.perf_counter() - begin
+
+    def report(self, elapsed):
+        args = self.args
+        data = self.results.snapshot()["calls"]
+        actions = {key: stats for key, stats in data.items() if not key.startswith("lag:")}
+        total = sum(stats["count"] for stats in actions.values())
+
+        print(f"{args.fridges} fridges every {args.tick} s, {args.apps} app clients every {args.app_interval} s, "
+              f"{elapsed:.1f} s, {args.workers} workers")
+        print(f"Injected latency: Lambda {args.lambda_latency * 1000:.0f} ms, "
+              f"DynamoDB {args.dynamo_latency * 1000:.0f} ms, KMS {args.kms_latency * 1000:.0f} ms")
+        print(f"Throughput: {total} actions, {total / elapsed:.1f} actions/s")
+        print(f"  {'action':<16}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for key, stats in actions.items():
+            print(f"  {key:<16}{stats['count']:>8}{stats['errors']:>8}{stats['p50_ms']:>10.1f}"
+                  f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}")
+        for kind in ("fridge", "app"):
+            lag = data.get(f"lag:{kind}")
+            if lag:
+                print(f"  scheduling lag {kind}: p95 {lag['p95_ms']:.1f} ms, max {lag['max_ms']:.1f} ms")
+
+        print("Lambda invocations:")
+        for function_name, calls in sorted(self.lambda_client.calls_by_function.items(), key=lambda f: -f[1]):
+            print(f"  {function_name:<28}{calls:>8}{calls / elapsed:>10.1f}/s")
+
+        table = self.dynamodb.Table("property")
+        users = [units for user, units in table.units_by_partition.items() if user.startswith("load_user_")]
+        print(f"DynamoDB property: {table.requests} requests, {table.read_units:.0f} RCU, {table.write_units:.0f} WCU "
+              f"({table.read_units / elapsed:.1f} RCU/s, {table.write_units / elapsed:.1f} WCU/s)")
+        if users:
+            reads = sorted(units[0] / elapsed for units in users)
+            writes = sorted(units[1] / elapsed for units in users)
+            print(f"  per user: RCU/s avg {sum(reads) / len(reads):.2f} max {reads[-1]:.2f}, "
+                  f"WCU/s avg {sum(writes) / len(writes):.3f} max {writes[-1]:.3f}")
+        changes = self.dynamodb.Table("property_changes")
+        print(f"DynamoDB property_changes: {changes.requests} requests, {changes.read_units:.0f} RCU, "
+              f"{changes.write_units:.0f} WCU ({changes.read_units / elapsed:.1f} RCU/s, "
+              f"{changes.write_units / elapsed:.1f} WCU/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Smart Refrigerator load generator")
+    parser.add_argument("--fridges", type=int, default=200)
+    parser.add_argument("--apps", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load")
+    parser.add_argument("--tick", type=float, default=1.0, help="seconds between periodic_update ticks of a fridge")
+    parser.add_argument("--app-interval", type=float, default=2.0, help="seconds between requests of an app client")
+    parser.add_argument("--fridge-mix", default="refresh=94,add=3,take_out=3")
+    parser.add_argument("--app-mix", default="get=90,delete=10")
+    parser.add_argument("--items", type=int, default=5, help="items in stock per fridge at the start")
+    parser.add_argument("--lambda-latency", type=float, default=0.0, help="seconds per Lambda invoke")
+    parser.add_argument("--dynamo-latency", type=float, default=0.0, help="seconds per DynamoDB request")
+    parser.add_argument("--kms-latency", type=float, default=0.0, help="seconds per KMS call")
+    parser.add_argument("--workers", type=int, default=64, help="concurrent actions")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    generator = LoadGenerator(args)
+    generator.setup()
+    generator.report(generator.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,918 @@
+import base64
+import copy
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import types
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+# In-process stand-ins for the AWS services used by item_manager.py.
+# They expose the same method names and response shapes as the boto3 clients,
+# so they can be passed to ItemManager instead of the real clients to run
+# benchmarks and offline experiments without an AWS account.
+
+LOCAL_KMS_MAGIC = b"LKMS"
+
+
+class LocalKMS:
+    def __init__(self, delay=0.0, secret=b"local-kms-secret"):
+        self.delay = delay  # Simulated network round-trip per call, in seconds
+        self.secret = secret
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _count_call(self):
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+
+    def _keystream(self, nonce, length):
+        stream = b""
+        counter = 0
+        while len(stream) < length:
+            stream += hashlib.sha256(self.secret + nonce + counter.to_bytes(4, "big")).digest()
+            counter += 1
+        return stream[:length]
+
+    def _wrap(self, plaintext):
+        nonce = os.urandom(12)
+        body = bytes(a ^ b for a, b in zip(plaintext, self._keystream(nonce, len(plaintext))))
+        return LOCAL_KMS_MAGIC + nonce + body
+
+    def encrypt(self, KeyId, Plaintext, **kwargs):
+        """Encrypt data the way kms.encrypt does (non-deterministic ciphertext)."""
+        self._count_call()
+        return {"CiphertextBlob": self._wrap(Plaintext), "KeyId": KeyId}
+
+    def generate_data_key(self, KeyId, KeySpec="AES_256", NumberOfBytes=None, **kwargs):
+        """Return a random data key in plaintext and wrapped under the local master key."""
+        self._count_call()
+        data_key = os.urandom(NumberOfBytes or (16 if KeySpec == "AES_128" else 32))
+        return {"Plaintext": data_key, "CiphertextBlob": self._wrap(data_key), "KeyId": KeyId}
+
+    def decrypt(self, CiphertextBlob, **kwargs):
+        """Decrypt a blob produced by encrypt."""
+        self._count_call()
+        if not CiphertextBlob.startswith(LOCAL_KMS_MAGIC):
+            raise ClientError(
+                {"Error": {"Code": "InvalidCiphertextException", "Message": "Not a local KMS ciphertext"}},
+                "Decrypt"
+            )
+        nonce = CiphertextBlob[4:16]
+        body = CiphertextBlob[16:]
+        plaintext = bytes(a ^ b for a, b in zip(body, self._keystream(nonce, len(body))))
+        return {"Plaintext": plaintext}
+
+    def encrypt_amount(self, amount):
+        """Encrypt an amount exactly as ItemManager.encrypt_data stores it (Base64)."""
+        response = self.encrypt(KeyId="alias/MyEncryptionKey", Plaintext=str(amount).encode("utf-8"))
+        return base64.b64encode(response["CiphertextBlob"]).decode("utf-8")
+
+
+class LocalLambda:
+    def __init__(self, handlers=None, latency=0.0):
+        self.handlers = dict(handlers or {})  # Function name -> lambda_handler(event, context)
+        self.latency = latency  # Simulated network round-trip per invoke, in seconds
+        self.calls = 0
+        self.calls_by_function = {}
+        self._lock = threading.Lock()
+
+    def register(self, function_name, handler):
+        """Register a handler for a function name."""
+        self.handlers[function_name] = handler
+
+    def invoke(self, FunctionName, Payload, InvocationType="RequestResponse", **kwargs):
+        """Run the registered handler and wrap its result like lambda.invoke does."""
+        with self._lock:
+            self.calls += 1
+            self.calls_by_function[FunctionName] = self.calls_by_function.get(FunctionName, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        if FunctionName not in self.handlers:
+            raise ClientError(
+                {"Error": {"Code": "ResourceNotFoundException", "Message": f"Function not found: {FunctionName}"}},
+                "Invoke"
+            )
+        try:
+            result = self.handlers[FunctionName](json.loads(Payload), None)
+        except Exception as e:
+            # An unhandled exception in the function is reported in the payload, like Lambda does
+            return {
+                "StatusCode": 200,
+                "FunctionError": "Unhandled",
+                "Payload": io.BytesIO(json.dumps({"errorMessage": str(e), "errorType": type(e).__name__}).encode("utf-8"))
+            }
+        return {
+            "StatusCode": 200,
+            "Payload": io.BytesIO(json.dumps(result).encode("utf-8"))
+        }
+
+
+class FaultyLambda:
+    """
+    Wraps a Lambda client and injects latency and failures, to exercise retries,
+    deadlines and the circuit breaker.
+
+    Each invoke first sleeps for latency seconds, then fails with the given
+    probabilities: throttling (HTTP 429), a service error (HTTP 500) or an
+    unhandled error inside the function. While outage is True every call fails
+    with a connection error without reaching the function.
+    """
+
+    def __init__(self, lambda_client, latency=0.0, throttle_rate=0.0, error_rate=0.0,
+                 function_error_rate=0.0, seed=None):
+        self.lambda_client = lambda_client
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.function_error_rate = function_error_rate
+        self.outage = False
+        self.calls = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _error(self, code, status, message):
+        with self._lock:
+            self.failures += 1
+        return ClientError(
+            {"Error": {"Code": code, "Message": message}, "ResponseMetadata": {"HTTPStatusCode": status}},
+            "Invoke"
+        )
+
+    def invoke(self, FunctionName, Payload, **kwargs):
+        with self._lock:
+            self.calls += 1
+            roll = self._random.random()
+        if self.outage:
+            with self._lock:
+                self.failures += 1
+            raise EndpointConnectionError(endpoint_url="https://lambda.local")
+        if self.latency:
+            time.sleep(self.latency)
+        if roll < self.throttle_rate:
+            raise self._error("TooManyRequestsException", 429, "Rate exceeded")
+        roll -= self.throttle_rate
+        if roll < self.error_rate:
+            raise self._error("ServiceException", 500, "Internal service error")
+        roll -= self.error_rate
+        if roll < self.function_error_rate:
+            with self._lock:
+                self.failures += 1
+            return {
+                "StatusCode": 200,
+                "FunctionError": "Unhandled",
+                "Payload": io.BytesIO(json.dumps({"errorMessage": "Injected failure"}).encode("utf-8"))
+            }
+        return self.lambda_client.invoke(FunctionName=FunctionName, Payload=Payload, **kwargs)
+
+
+# --- DynamoDB -------------------------------------------------------------
+# LocalTable understands the subset of the expression language used by the
+# Lambdas in lambda_functions/: SET (with list_append / if_not_exists / +),
+# REMOVE, ADD and DELETE update actions, and conditions built from
+# comparisons, attribute_exists, attribute_not_exists, contains, begins_with,
+# AND, OR, NOT and parentheses.
+
+_MISSING = object()
+_TOKEN = re.compile(r"\s*(?:(?P<value>:[A-Za-z0-9_]+)|(?P<name>#?[A-Za-z_][A-Za-z0-9_]*)"
+                    r"|(?P<number>\d+)|(?P<op><>|<=|>=|[=<>(),.\[\]+-]))")
+_UPDATE_CLAUSES = ("SET", "REMOVE", "ADD", "DELETE")
+
+
+def _dynamo_value(value):
+    """Convert Python numbers to Decimal the way boto3 stores them."""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return Decimal(str(value))
+    if isinstance(value, dict):
+        return {key: _dynamo_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_dynamo_value(item) for item in value]
+    if isinstance(value, set):
+        return {_dynamo_value(item) for item in value}
+    return value
+
+
+def _client_error(code, message, operation):
+    return ClientError({"Error": {"Code": code, "Message": message}}, operation)
+
+
+class _Expression:
+    def __init__(self, text, names=None, values=None):
+        self.tokens = []
+        position = 0
+        text = text.strip()
+        while position < len(text):
+            match = _TOKEN.match(text, position)
+            if not match or match.end() == position:
+                raise _client_error("ValidationException", f"Cannot parse expression: {text}", "Expression")
+            kind = match.lastgroup
+            self.tokens.append((kind, match.group(kind)))
+            position = match.end()
+        self.position = 0
+        self.names = names or {}
+        self.values = values or {}
+
+    def peek(self, offset=0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def take(self, expected=None):
+        token = self.peek()
+        if expected is not None and token[1] != expected:
+            raise _client_error("ValidationException", f"Expected {expected!r}, got {token[1]!r}", "Expression")
+        self.position += 1
+        return token
+
+    def at_keyword(self, *keywords):
+        kind, text = self.peek()
+        return kind == "name" and text.upper() in keywords
+
+    def parse_path(self):
+        kind, text = self.take()
+        if kind != "name":
+            raise _client_error("ValidationException", f"Expected an attribute name, got {text!r}", "Expression")
+        path = [self.names[text] if text.startswith("#") else text]
+        while self.peek()[1] in (".", "["):
+            if self.take()[1] == ".":
+                name = self.take()[1]
+                path.append(self.names[name] if name.startswith("#") else name)
+            else:
+                path.append(int(self.take()[1]))
+                self.take("]")
+        return path
+
+    def parse_operand(self):
+        kind, text = self.peek()
+        if kind == "value":
+            self.take()
+            operand = ("value", self.values[text])
+        elif kind == "name" and self.peek(1)[1] == "(":
+            self.take()
+            self.take("(")
+            args = [self.parse_operand()]
+            while self.peek()[1] == ",":
+                self.take()
+                args.append(self.parse_operand())
+            self.take(")")
+            operand = ("call", text, args)
+        else:
+            operand = ("path", self.parse_path())
+        if self.peek()[1] in ("+", "-"):
+            op = self.take()[1]
+            operand = ("arith", op, operand, self.parse_operand())
+        return operand
+
+    def parse_update(self):
+        actions = []
+        while self.peek()[0] is not None:
+            clause = self.take()[1].upper()
+            if clause not in _UPDATE_CLAUSES:
+                raise _client_error("ValidationException", f"Unknown update clause {clause}", "UpdateItem")
+            while True:
+                path = self.parse_path()
+                if clause == "SET":
+                    self.take("=")
+                    actions.append((clause, path, self.parse_operand()))
+                elif clause == "REMOVE":
+                    actions.append((clause, path, None))
+                else:
+                    actions.append((clause, path, self.parse_operand()))
+                if self.peek()[1] != ",":
+                    break
+                self.take()
+        return actions
+
+    def parse_condition(self):
+        condition = self.parse_and()
+        while self.at_keyword("OR"):
+            self.take()
+            condition = ("or", condition, self.parse_and())
+        return condition
+
+    def parse_and(self):
+        condition = self.parse_not()
+        while self.at_keyword("AND"):
+            self.take()
+            condition = ("and", condition, self.parse_not())
+        return condition
+
+    def parse_not(self):
+        if self.at_keyword("NOT"):
+            self.take()
+            return ("not", self.parse_not())
+        if self.peek()[1] == "(":
+            self.take()
+            condition = self.parse_condition()
+            self.take(")")
+            return condition
+        left = self.parse_operand()
+        if left[0] == "call":
+            return left
+        op = self.take()[1]
+        return ("compare", op, left, self.parse_operand())
+
+
+def _get_path(item, path):
+    value = item
+    for key in path:
+        if isinstance(key, int):
+            if not isinstance(value, list) or key >= len(value):
+                return _MISSING
+        elif not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+    return value
+
+
+def _set_path(item, path, new_value):
+    parent = _get_path(item, path[:-1])
+    key = path[-1]
+    if isinstance(key, int):
+        if not isinstance(parent, list):
+            raise _client_error("ValidationException", "The document path provided in the update expression is invalid for update", "UpdateItem")
+        if key >= len(parent):
+            parent.append(new_value)  # DynamoDB appends when the index is past the end
+        else:
+            parent[key] = new_value
+    else:
+        if not isinstance(parent, dict):
+            raise _client_error("ValidationException", "The document path provided in the update expression is invalid for update", "UpdateItem")
+        parent[key] = new_value
+
+
+def _remove_path(item, path):
+    parent = _get_path(item, path[:-1])
+    key = path[-1]
+    if isinstance(key, int):
+        if isinstance(parent, list) and key < len(parent):
+            del parent[key]
+    elif isinstance(parent, dict):
+        parent.pop(key, None)
+
+
+def _evaluate(item, operand):
+    kind = operand[0]
+    if kind == "value":
+        return operand[1]
+    if kind == "path":
+        return _get_path(item, operand[1])
+    if kind == "arith":
+        left, right = _evaluate(item, operand[2]), _evaluate(item, operand[3])
+        return left + right if operand[1] == "+" else left - right
+    function, args = operand[1], operand[2]
+    if function == "list_append":
+        return _evaluate(item, args[0]) + _evaluate(item, args[1])
+    if function == "if_not_exists":
+        value = _evaluate(item, args[0])
+        return _evaluate(item, args[1]) if value is _MISSING else value
+    if function == "attribute_exists":
+        return _evaluate(item, args[0]) is not _MISSING
+    if function == "attribute_not_exists":
+        return _evaluate(item, args[0]) is _MISSING
+    if function == "contains":
+        container = _evaluate(item, args[0])
+        return container is not _MISSING and _evaluate(item, args[1]) in container
+    if function == "begins_with":
+        value = _evaluate(item, args[0])
+        return isinstance(value, str) and value.startswith(_evaluate(item, args[1]))
+    if function == "size":
+        value = _evaluate(item, args[0])
+        return 0 if value is _MISSING else len(value)
+    raise _client_error("ValidationException", f"Unsupported function {function}", "Expression")
+
+
+def _check(item, condition):
+    kind = condition[0]
+    if kind == "and":
+        return _check(item, condition[1]) and _check(item, condition[2])
+    if kind == "or":
+        return _check(item, condition[1]) or _check(item, condition[2])
+    if kind == "not":
+        return not _check(item, condition[1])
+    if kind == "call":
+        return bool(_evaluate(item, condition))
+    op, left, right = condition[1], _evaluate(item, condition[2]), _evaluate(item, condition[3])
+    if left is _MISSING or right is _MISSING:
+        return op == "<>"
+    return {
+        "=": left == right, "<>": left != right, "<": left < right,
+        "<=": left <= right, ">": left > right, ">=": left >= right
+    }[op]
+
+
+def item_size(item):
+    """Approximate stored size of an item in bytes."""
+    return len(json.dumps(item, default=str).encode("utf-8"))
+
+
+class LocalTable:
+    def __init__(self, name, key_names=("user_name",), latency=0.0):
+        self.name = name
+        self.key_names = tuple(key_names)
+        self.latency = latency  # Simulated network round-trip per request, in seconds
+        self.items = {}  # key tuple -> item
+        self.read_units = 0.0  # Consumed capacity, counted like on-demand DynamoDB
+        self.write_units = 0.0
+        self.units_by_partition = {}  # Partition key value -> [read units, write units]
+        self.requests = 0
+        # Called with a DynamoDB stream event (NEW_AND_OLD_IMAGES) after every write.
+        # Unlike a real stream, delivery is synchronous and in the writer's thread.
+        self.stream_handlers = []
+        self._lock = threading.RLock()
+
+    def _key(self, key):
+        try:
+            return tuple(key[name] for name in self.key_names)
+        except KeyError:
+            raise _client_error("ValidationException", "The provided key element does not match the schema", "GetItem")
+
+    def _consume(self, read_bytes=0, write_bytes=0, reads=0, writes=0, consistent=True, partition=None):
+        self.requests += 1
+        read_units = write_units = 0
+        if reads:
+            read_units = max(reads, -(-read_bytes // 4096))
+            read_units = read_units if consistent else read_units / 2
+        if writes:
+            write_units = max(writes, -(-write_bytes // 1024))
+        self.read_units += read_units
+        self.write_units += write_units
+        if partition is not None:
+            units = self.units_by_partition.setdefault(partition, [0.0, 0.0])
+            units[0] += read_units
+            units[1] += write_units
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _emit(self, old, new):
+        """Pass a write to the stream handlers, with images in DynamoDB JSON like a real stream."""
+        if not self.stream_handlers:
+            return
+        serializer = TypeSerializer()
+        change = {"Keys": {name: serializer.serialize((new or old)[name]) for name in self.key_names}}
+        if old:
+            change["OldImage"] = {name: serializer.serialize(value) for name, value in old.items()}
+        if new:
+            change["NewImage"] = {name: serializer.serialize(value) for name, value in new.items()}
+        event_name = "MODIFY" if old and new else ("INSERT" if new else "REMOVE")
+        event = {"Records": [{"eventName": event_name, "eventSource": "aws:dynamodb", "dynamodb": change}]}
+        for handler in self.stream_handlers:
+            handler(event)
+
+    def get_item(self, Key, ConsistentRead=False, **kwargs):
+        self._wait()
+        with self._lock:
+            key = self._key(Key)
+            item = self.items.get(key)
+            self._consume(read_bytes=item_size(item) if item else 0, reads=1, consistent=ConsistentRead,
+                          partition=key[0])
+            return {"Item": copy.deepcopy(item)} if item is not None else {}
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeNames=None,
+                 ExpressionAttributeValues=None, **kwargs):
+        self._wait()
+        with self._lock:
+            key = self._key(Item)
+            existing = self.items.get(key, {})
+            if ConditionExpression:
+                expression = _Expression(ConditionExpression, ExpressionAttributeNames, _dynamo_value(ExpressionAttributeValues))
+                if not _check(existing, expression.parse_condition()):
+                    self._consume(writes=1, partition=key[0])
+                    raise _client_error("ConditionalCheckFailedException", "The conditional request failed", "PutItem")
+            self.items[key] = _dynamo_value(copy.deepcopy(Item))
+            self._consume(write_bytes=max(item_size(Item), item_size(existing)), writes=1, partition=key[0])
+            self._emit(existing, self.items[key])
+            return {}
+
+    def delete_item(self, Key, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues="NONE", **kwargs):
+        self._wait()
+        with self._lock:
+            key = self._key(Key)
+            existing = self.items.get(key, {})
+            if ConditionExpression:
+                expression = _Expression(ConditionExpression, ExpressionAttributeNames, _dynamo_value(ExpressionAttributeValues))
+                if not _check(existing, expression.parse_condition()):
+                    self._consume(writes=1, partition=key[0])
+                    raise _client_error("ConditionalCheckFailedException", "The conditional request failed", "DeleteItem")
+            self.items.pop(key, None)
+            self._consume(write_bytes=item_size(existing), writes=1, partition=key[0])
+            if existing:
+                self._emit(existing, None)
+            return {"Attributes": copy.deepcopy(existing)} if ReturnValues == "ALL_OLD" and existing else {}
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues="NONE", **kwargs):
+        self._wait()
+        values = _dynamo_value(ExpressionAttributeValues or {})
+        with self._lock:
+            key = self._key(Key)
+            old = self.items.get(key)
+            item = copy.deepcopy(old) if old is not None else dict(zip(self.key_names, key))
+            if ConditionExpression:
+                condition = _Expression(ConditionExpression, ExpressionAttributeNames, values).parse_condition()
+                if not _check(old or {}, condition):
+                    self._consume(writes=1, partition=key[0])
+                    raise _client_error("ConditionalCheckFailedException", "The conditional request failed", "UpdateItem")
+
+            actions = _Expression(UpdateExpression, ExpressionAttributeNames, values).parse_update()
+            # Every value is computed from the item as it was before the update
+            resolved = [(clause, path, None if operand is None else _evaluate(item, operand))
+                        for clause, path, operand in actions]
+            removals = [path for clause, path, _ in resolved if clause == "REMOVE"]
+            for clause, path, value in resolved:
+                if clause == "SET":
+                    _set_path(item, path, copy.deepcopy(value))
+                elif clause == "ADD":
+                    current = _get_path(item, path)
+                    if current is _MISSING:
+                        _set_path(item, path, copy.deepcopy(value))
+                    elif isinstance(current, set):
+                        current |= value
+                    else:
+                        _set_path(item, path, current + value)
+                elif clause == "DELETE":
+                    current = _get_path(item, path)
+                    if isinstance(current, set):
+                        current -= value
+            # Remove list elements from the highest index down so earlier removals do not shift later ones
+            for path in sorted(removals, key=lambda p: [k if isinstance(k, int) else -1 for k in p], reverse=True):
+                _remove_path(item, path)
+
+            self.items[key] = item
+            self._consume(write_bytes=max(item_size(item), item_size(old or {})), writes=1, partition=key[0])
+            self._emit(old, item)
+
+            if ReturnValues == "ALL_NEW":
+                return {"Attributes": copy.deepcopy(item)}
+            if ReturnValues == "ALL_OLD":
+                return {"Attributes": copy.deepcopy(old)} if old is not None else {}
+            if ReturnValues == "UPDATED_NEW":
+                touched = {path[0] for _, path, _ in resolved}
+                return {"Attributes": {name: copy.deepcopy(item[name]) for name in touched if name in item}}
+            return {}
+
+    def _page(self, items, Limit=None, ExclusiveStartKey=None):
+        """Return one page of items in key order, with LastEvaluatedKey when there are more."""
+        keys = sorted(items)
+        if ExclusiveStartKey is not None:
+            start = self._key(ExclusiveStartKey)
+            keys = [key for key in keys if key > start]
+        page = keys[:Limit] if Limit else keys
+        result = {"Items": [copy.deepcopy(items[key]) for key in page], "Count": len(page)}
+        if Limit and len(keys) > Limit:
+            result["LastEvaluatedKey"] = dict(zip(self.key_names, page[-1]))
+        return result
+
+    def query(self, KeyConditionExpression, ExpressionAttributeNames=None, ExpressionAttributeValues=None,
+              FilterExpression=None, Limit=None, ExclusiveStartKey=None, ScanIndexForward=True,
+              ConsistentRead=False, **kwargs):
+        self._wait()
+        values = _dynamo_value(ExpressionAttributeValues or {})
+        key_condition = _Expression(KeyConditionExpression, ExpressionAttributeNames, values).parse_condition()
+        with self._lock:
+            matches = {key: item for key, item in self.items.items() if _check(item, key_condition)}
+            result = self._page(matches, Limit, ExclusiveStartKey)
+            if not ScanIndexForward:
+                result["Items"].reverse()
+            partition = next(iter(matches))[0] if matches else None  # Queries stay within one partition
+            self._consume(read_bytes=sum(item_size(item) for item in result["Items"]), reads=1,
+                          consistent=ConsistentRead, partition=partition)
+        if FilterExpression:
+            condition = _Expression(FilterExpression, ExpressionAttributeNames, values).parse_condition()
+            result["Items"] = [item for item in result["Items"] if _check(item, condition)]
+            result["Count"] = len(result["Items"])
+        return result
+
+    def scan(self, Limit=None, ExclusiveStartKey=None, FilterExpression=None, ExpressionAttributeNames=None,
+             ExpressionAttributeValues=None, **kwargs):
+        self._wait()
+        with self._lock:
+            result = self._page(self.items, Limit, ExclusiveStartKey)
+            self._consume(read_bytes=sum(item_size(item) for item in result["Items"]), reads=1, consistent=False)
+        if FilterExpression:
+            values = _dynamo_value(ExpressionAttributeValues or {})
+            condition = _Expression(FilterExpression, ExpressionAttributeNames, values).parse_condition()
+            result["Items"] = [item for item in result["Items"] if _check(item, condition)]
+            result["Count"] = len(result["Items"])
+        return result
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        return _LocalBatchWriter(self)
+
+
+class _LocalBatchWriter:
+    """Stand-in for Table.batch_writer(): buffers writes and flushes them 25 at a time."""
+
+    def __init__(self, table):
+        self.table = table
+        self.pending = []
+
+    def put_item(self, Item):
+        self.pending.append(("put", Item))
+        if len(self.pending) >= 25:
+            self.flush()
+
+    def delete_item(self, Key):
+        self.pending.append(("delete", Key))
+        if len(self.pending) >= 25:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        self.table._wait()  # One BatchWriteItem round-trip per flush
+        latency, self.table.latency = self.table.latency, 0.0
+        try:
+            for action, value in self.pending:
+                if action == "put":
+                    self.table.put_item(Item=value)
+                else:
+                    self.table.delete_item(Key=value)
+        finally:
+            self.table.latency = latency
+        self.pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+
+# Key schema of the tables used by the Lambdas
+TABLE_KEYS = {
+    "property": ("user_name",),
+    "property_items": ("user_name", "item_key"),
+    "property_changes": ("user_name", "version")
+}
+
+
+class LocalDynamoDBClient:
+    """
+    Stand-in for the client of a DynamoDB resource (dynamodb.meta.client). Like
+    the resource's own client it takes plain Python values, not DynamoDB JSON.
+    """
+
+    def __init__(self, dynamodb):
+        self.dynamodb = dynamodb
+        self.transactions = 0
+
+    def transact_write_items(self, TransactItems, **kwargs):
+        """Check every condition first, then apply all writes or none of them."""
+        writes = []
+        for entry in TransactItems:
+            (action, params), = entry.items()
+            table = self.dynamodb.Table(params['TableName'])
+            writes.append((action, table, params, table._key(params.get('Key') or params.get('Item'))))
+        tables = sorted({id(table): table for _, table, _, _ in writes}.values(), key=lambda table: table.name)
+
+        if self.dynamodb.latency:
+            time.sleep(self.dynamodb.latency)  # One round-trip for the whole transaction
+        for table in tables:
+            table._lock.acquire()
+        try:
+            reasons = []
+            for action, table, params, key in writes:
+                reason = {"Code": "None"}
+                if params.get('ConditionExpression'):
+                    condition = _Expression(params['ConditionExpression'], params.get('ExpressionAttributeNames'),
+                                            _dynamo_value(params.get('ExpressionAttributeValues') or {}))
+                    if not _check(table.items.get(key) or {}, condition.parse_condition()):
+                        reason = {"Code": "ConditionalCheckFailed", "Message": "The conditional request failed"}
+                reasons.append(reason)
+            if any(reason["Code"] != "None" for reason in reasons):
+                error = _client_error("TransactionCanceledException", "Transaction cancelled", "TransactWriteItems")
+                error.response["CancellationReasons"] = reasons
+                raise error
+
+            saved = [(table, table.latency) for table in tables]
+            for table in tables:
+                table.latency = 0.0
+            try:
+                for action, table, params, key in writes:
+                    if action == "Put":
+                        table.put_item(Item=params['Item'])
+                    elif action == "Update":
+                        table.update_item(Key=params['Key'], UpdateExpression=params['UpdateExpression'],
+                                          ExpressionAttributeNames=params.get('ExpressionAttributeNames'),
+                                          ExpressionAttributeValues=params.get('ExpressionAttributeValues'))
+                    elif action == "Delete":
+                        table.delete_item(Key=params['Key'])
+                    # ConditionCheck only takes part in the checks above
+            finally:
+                for table, latency in saved:
+                    table.latency = latency
+            self.transactions += 1
+            return {}
+        finally:
+            for table in reversed(tables):
+                table._lock.release()
+
+
+class LocalDynamoDB:
+    """Stand-in for boto3.resource('dynamodb') holding LocalTable instances."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.tables = {}
+        self.meta = types.SimpleNamespace(client=LocalDynamoDBClient(self))
+
+    def create_table(self, name, key_names=None):
+        self.tables[name] = LocalTable(name, key_names or TABLE_KEYS.get(name, ("user_name",)), latency=self.latency)
+        return self.tables[name]
+
+    def Table(self, name):
+        if name not in self.tables:
+            self.create_table(name)
+        return self.tables[name]
+
+
+# --- Lambda functions -----------------------------------------------------
+
+LAMBDA_FUNCTIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_functions")
+_loader_lock = threading.Lock()
+
+
+def load_lambda_handler(function_name, dynamodb, kms=None, directory=LAMBDA_FUNCTIONS_DIR, quiet=True):
+    """
+    Load lambda_handler from a file in lambda_functions/ with its boto3 resources
+    pointing at the given local stand-ins. With quiet=True the function's debug
+    prints are discarded.
+    """
+    path = os.path.join(directory, function_name)
+    with open(path, "r") as source_file:
+        source = source_file.read()
+
+    local_boto3 = types.ModuleType("boto3")
+    local_boto3.resource = lambda service_name, **kwargs: dynamodb
+    local_boto3.client = lambda service_name, **kwargs: kms if service_name == "kms" else None
+
+    module = types.ModuleType(function_name)
+    module.__file__ = path
+    if quiet:
+        module.print = lambda *args, **kwargs: None
+    with _loader_lock:
+        saved_boto3 = sys.modules.get("boto3")
+        sys.modules["boto3"] = local_boto3
+        try:
+            exec(compile(source, path, "exec"), module.__dict__)
+        finally:
+            if saved_boto3 is not None:
+                sys.modules["boto3"] = saved_boto3
+            else:
+                del sys.modules["boto3"]
+    return module.lambda_handler
+
+
+def lambda_function_files(directory=LAMBDA_FUNCTIONS_DIR):
+    """
+    Return the Lambda source files in lambda_functions/, keyed by function name.
+
+    The sources are plain files without an extension, so directories (e.g. a
+    __pycache__ left by an editor), names with a dot (README.md, .gitkeep,
+    backups and swap files) and Python cache names are skipped.
+    """
+    files = {}
+    for file_name in sorted(os.listdir(directory)):
+        if "." in file_name or file_name.startswith("__") or not os.path.isfile(os.path.join(directory, file_name)):
+            continue
+        # "Delete_Item_Public (App)" and "Get_Items_Public(App)" are deployed without the suffix
+        files[file_name.split("(")[0].strip()] = file_name
+    return files
+
+
+def local_lambda_for(function_names=None, dynamodb=None, kms=None, latency=0.0, directory=LAMBDA_FUNCTIONS_DIR):
+    """Return a LocalLambda running the real handlers of the given functions (default: all of them)."""
+    dynamodb = dynamodb if dynamodb is not None else LocalDynamoDB()
+    files = lambda_function_files(directory)
+    handlers = {name: load_lambda_handler(files[name], dynamodb, kms, directory)
+                for name in (function_names or files)}
+    if "Record_Changes" in handlers:
+        # Feed the change log from the property table's stream, like the deployed trigger
+        record_changes = handlers["Record_Changes"]
+        dynamodb.Table("property").stream_handlers.append(lambda event: record_changes(event, None))
+    return LocalLambda(handlers, latency=latency)
+
+
+# --- HTTP endpoint --------------------------------------------------------
+# Real boto3 clients can be pointed at LocalAWSServer with endpoint_url, so a
+# benchmark also covers client construction, request signing and connection reuse.
+
+_INVOKE_PATH = re.compile(r"^/2015-03-31/functions/(?P<name>[^/]+)/invocations")
+_KMS_OPERATIONS = {
+    "TrentService.Encrypt": ("encrypt", ("Plaintext",), ("CiphertextBlob",)),
+    "TrentService.Decrypt": ("decrypt", ("CiphertextBlob",), ("Plaintext",)),
+    "TrentService.GenerateDataKey": ("generate_data_key", (), ("Plaintext", "CiphertextBlob"))
+}
+
+
+class _LocalAWSRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the AWS endpoints
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with self.server.lock:
+            self.server.requests += 1
+        match = _INVOKE_PATH.match(self.path)
+        if match:
+            self._invoke(unquote(match.group("name")), body)
+        elif self.headers.get("X-Amz-Target") in _KMS_OPERATIONS:
+            self._kms(self.headers["X-Amz-Target"], body)
+        else:
+            self._reply(404, json.dumps({"message": f"Unsupported request {self.path}"}).encode("utf-8"))
+
+    def _invoke(self, function_name, body):
+        try:
+            response = self.server.lambda_client.invoke(FunctionName=function_name, Payload=body or b"{}")
+        except ClientError as e:
+            error = e.response["Error"]
+            self._reply(404, json.dumps({"Type": "User", "message": error["Message"]}).encode("utf-8"),
+                        {"x-amzn-ErrorType": error["Code"]})
+            return
+        headers = {"X-Amz-Function-Error": response["FunctionError"]} if "FunctionError" in response else None
+        self._reply(response["StatusCode"], response["Payload"].read(), headers)
+
+    def _kms(self, target, body):
+        method_name, blob_arguments, blob_results = _KMS_OPERATIONS[target]
+        arguments = json.loads(body or b"{}")
+        for name in blob_arguments:
+            arguments[name] = base64.b64decode(arguments[name])
+        try:
+            result = getattr(self.server.kms, method_name)(**arguments)
+        except ClientError as e:
+            error = e.response["Error"]
+            self._reply(400, json.dumps({"__type": error["Code"], "message": error["Message"]}).encode("utf-8"))
+            return
+        for name in blob_results:
+            result[name] = base64.b64encode(result[name]).decode("utf-8")
+        self._reply(200, json.dumps(result).encode("utf-8"))
+
+
+class LocalAWSServer:
+    """
+    HTTP server on localhost answering Lambda Invoke and KMS Encrypt/Decrypt/GenerateDataKey
+    requests from real boto3 clients, backed by a LocalLambda and a LocalKMS.
+
+        with LocalAWSServer(local_lambda_for(), LocalKMS()) as server:
+            client = boto3.client("lambda", endpoint_url=server.endpoint_url, ...)
+    """
+
+    def __init__(self, lambda_client=None, kms=None, port=0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _LocalAWSRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.lambda_client = lambda_client or LocalLambda()
+        self.httpd.kms = kms or LocalKMS()
+        self.httpd.lock = threading.Lock()
+        self.httpd.requests = 0
+        self._thread = None
+
+    @property
+    def endpoint_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="local-aws-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
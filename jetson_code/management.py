@@ -1,39 +1,45 @@
-import time
 import os
 import subprocess
+import threading
 
-def run_image_classification():
-    os.system("python3 image_classification.py")
+from message_bus import MessageBus, RECOGNIZE_REQUEST, RECOGNITION_RESULT, GUI_CLOSED
 
-def main():
-    # Start the InitialGUI.py script
-    gui_process = subprocess.Popen(["python3.8", "InitialGUI.py"])
-    if os.path.exists("initial_gui_closed.txt"):
-        os.remove("initial_gui_closed.txt")
-    try:
-        while True:
+classification_lock = threading.Lock()
 
-            if gui_process.poll() is not None:
-                print("InitialGUI.py has terminated. Exiting...")
-                break  # Exit the loop if InitialGUI.py is no longer running
-            # Check for the initial_gui_closed.txt file
-            if os.path.exists("initial_gui_closed.txt"):
-                # Delete the initial_gui_closed.txt file
-                os.remove("initial_gui_closed.txt")
-                print("InitialGUI.py has terminated. Exiting...")
-                break  # Exit the loop
+def run_image_classification():
+    return os.system("python3 image_classification.py")
 
-            # Check for management signals
-            if os.path.exists("management_signal.txt"):
-                with open("management_signal.txt", "r") as f:
-                    signal = f.read().strip()
+def classify(bus):
+    try:
+        if run_image_classification() != 0:
+            # The classifier publishes its own result; answer for it if it failed
+            bus.publish(RECOGNITION_RESULT, item=None)
+    finally:
+        classification_lock.release()
 
-                if signal == "In button clicked" or signal == "Out button clicked":
-                    run_image_classification()
+def on_recognize_request(bus):
+    # One classification at a time; a request made meanwhile gets the running one's result
+    if classification_lock.acquire(blocking=False):
+        threading.Thread(target=classify, args=(bus,), daemon=True).start()
 
-                os.remove("management_signal.txt")
+def main():
+    # Start the message bus before the GUIs, so they find it when they connect
+    bus = MessageBus()
+    try:
+        bus.start()
+    except OSError as e:
+        print(f"Error starting the message bus: {e}")
+        return
+    closed = threading.Event()
+    bus.subscribe(RECOGNIZE_REQUEST, lambda message: on_recognize_request(bus))
+    bus.subscribe(GUI_CLOSED, lambda message: closed.set())
 
-            time.sleep(1)
+    # Start the InitialGUI.py script
+    gui_process = subprocess.Popen(["python3.8", "InitialGUI.py"])
+    threading.Thread(target=lambda: (gui_process.wait(), closed.set()), daemon=True).start()
+    try:
+        closed.wait()  # Until GUI.py is closed or InitialGUI.py exits
+        print("InitialGUI.py has terminated. Exiting...")
     except KeyboardInterrupt:
         # Handle Ctrl+C gracefully
         print("\nTerminating the application...")
@@ -42,7 +48,8 @@ def main():
         if gui_process.poll() is None:  # Check if the process is still running
             gui_process.terminate()
             gui_process.wait()  # Wait for the process to terminate
+        bus.close()
         print("Application terminated.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,297 @@
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from collections import namedtuple
+
+# Messages between management.py, the two GUIs and the classifier. They used to
+# signal each other with marker files (management_signal.txt,
+# recognition_terminated.txt, GUI_closed.txt, ...) checked in sleep loops every
+# 100 ms to 1 s, and a recognized_item.txt left by an earlier run could be read
+# as the current result. management.py now runs a MessageBus on a Unix domain
+# socket; the other processes connect a BusClient to it. Every message
+# published is passed on to all the other connections at once, as one line of
+# JSON, and nothing is written to disk.
+
+BUS_SOCKET_PATH = "fridge_bus.sock"
+CONNECT_TIMEOUT = 5.0  # Seconds a client keeps trying while the bus starts up
+
+RECOGNIZE_REQUEST = "recognize-request"  # GUI -> management: run the classifier
+RECOGNITION_RESULT = "recognition-result"  # classifier (or management) -> GUI
+GUI_CLOSED = "gui-closed"  # GUI -> InitialGUI and management: the app was closed
+LOGGED_OUT = "logged-out"  # GUI -> InitialGUI: the user logged out
+
+# Message type -> the fields it carries
+MESSAGE_FIELDS = {
+    RECOGNIZE_REQUEST: ("direction",),  # "in" or "out"
+    RECOGNITION_RESULT: ("item",),  # Label of the recognized item, or None
+    GUI_CLOSED: (),
+    LOGGED_OUT: (),
+}
+
+# A received message; sent is the time.time() it was published at
+Message = namedtuple("Message", ["type", "fields", "sent"])
+
+
+def encode(message_type, **fields):
+    """The line sent for a message; raises ValueError for unknown types or fields."""
+    expected = MESSAGE_FIELDS.get(message_type)
+    if expected is None:
+        raise ValueError(f"Unknown message type: {message_type}")
+    if set(fields) != set(expected):
+        raise ValueError(f"{message_type} carries {', '.join(expected) or 'no fields'}, got {', '.join(fields) or 'none'}")
+    return (json.dumps({"type": message_type, "sent": time.time(), "fields": fields}) + "\n").encode()
+
+
+def decode(line):
+    """Message of a received line; raises ValueError if it is not one."""
+    try:
+        data = json.loads(line)
+        message = Message(data["type"], data["fields"], data["sent"])
+    except (TypeError, KeyError, json.JSONDecodeError) as e:
+        raise ValueError(f"Malformed message: {e}")
+    if message.type not in MESSAGE_FIELDS:
+        raise ValueError(f"Unknown message type: {message.type}")
+    return message
+
+
+def _close(connection):
+    try:
+        connection.shutdown(socket.SHUT_RDWR)  # Wakes the thread reading it
+    except OSError:
+        pass
+    connection.close()
+
+
+def _call(handler, message):
+    try:
+        handler(message)
+    except Exception as e:
+        print(f"Error handling {message.type}: {e}")
+
+
+class MessageBus:
+    """
+    The bus itself, run by management.py. It serves the socket and also takes
+    handlers of its own:
+
+        bus = MessageBus().start()
+        bus.subscribe(RECOGNIZE_REQUEST, lambda message: run_classifier())
+        bus.publish(RECOGNITION_RESULT, item=None)
+
+    Handlers run on the thread reading the sender's connection.
+    """
+
+    def __init__(self, path=BUS_SOCKET_PATH):
+        self.path = path
+        self.handlers = {}
+        self.delivered = 0  # Messages received, from clients or published here
+        self._connections = []
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()  # One message at a time, so lines never interleave
+        self._server = None
+        self._inode = None
+
+    def subscribe(self, message_type, handler):
+        self.handlers.setdefault(message_type, []).append(handler)
+
+    def start(self):
+        """Listen on the socket path, taking it over from a bus that is still shutting down."""
+        if os.path.exists(self.path):
+            os.remove(self.path)  # Left by a crashed run, or by the management.py a logout replaces
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.path)
+        server.listen()
+        self._server = server
+        self._inode = os.stat(self.path).st_ino
+        threading.Thread(target=self._accept, args=(server,), name="message-bus", daemon=True).start()
+        return self
+
+    def _accept(self, server):
+        while True:
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                return  # Closed
+            with self._lock:
+                self._connections.append(connection)
+            threading.Thread(target=self._read, args=(connection,), name="message-bus-client", daemon=True).start()
+
+    def _read(self, connection):
+        try:
+            for line in connection.makefile("rb"):
+                try:
+                    message = decode(line)
+                except ValueError as e:
+                    print(f"Error reading bus message: {e}")
+                    continue
+                self._dispatch(line, message, connection)
+        except OSError:
+            pass
+        finally:
+            self._drop(connection)
+
+    def _drop(self, connection):
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+        _close(connection)
+
+    def _dispatch(self, line, message, sender=None):
+        self.delivered += 1
+        with self._lock:
+            receivers = [connection for connection in self._connections if connection is not sender]
+        with self._send_lock:
+            for connection in receivers:
+                try:
+                    connection.sendall(line)
+                except OSError:
+                    self._drop(connection)  # That process is gone
+        for handler in self.handlers.get(message.type, ()):
+            _call(handler, message)
+
+    def publish(self, message_type, **fields):
+        line = encode(message_type, **fields)
+        self._dispatch(line, decode(line))
+
+    def close(self):
+        if self._server is None:
+            return
+        server, self._server = self._server, None
+        _close(server)
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            _close(connection)
+        try:
+            # Only if it is still ours: after a logout the new management.py may own the path already
+            if os.stat(self.path).st_ino == self._inode:
+                os.remove(self.path)
+        except OSError:
+            pass
+
+
+class BusClient:
+    """
+    A connection to the bus, for GUI.py, InitialGUI.py and the classifier.
+
+        bus = BusClient()
+        bus.subscribe(LOGGED_OUT, on_logged_out)  # Called on the client's reader thread
+        bus.subscribe(RECOGNITION_RESULT)  # No handler: queued for drain()
+        bus.connect()  # Or connect_in_background() on the Tk thread
+        bus.publish(RECOGNIZE_REQUEST, direction="in")
+
+    Messages of types nobody subscribed to are ignored. A publish after the
+    connection dropped (e.g. management.py restarted) connects again first.
+    """
+
+    def __init__(self, path=BUS_SOCKET_PATH):
+        self.path = path
+        self.handlers = {}
+        self.messages = queue.Queue()
+        self._socket = None
+        self._send_lock = threading.Lock()
+        self._connect_lock = threading.Lock()  # Held for one attempt at a time, never while waiting
+
+    def subscribe(self, message_type, handler=None):
+        """
+        Args:
+            message_type (str): One of the types in MESSAGE_FIELDS.
+            handler: Called with each Message on the reader thread; without one
+                the messages wait in self.messages for drain() (e.g. on the Tk thread).
+        """
+        if message_type not in MESSAGE_FIELDS:
+            raise ValueError(f"Unknown message type: {message_type}")
+        self.handlers[message_type] = handler
+
+    def connect(self, timeout=CONNECT_TIMEOUT):
+        """Connect to the bus; returns False (and prints why) if it is not running."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._connect_lock:
+                if self._socket is not None:
+                    return True  # Connected by another thread meanwhile
+                connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    connection.connect(self.path)
+                except OSError as e:
+                    connection.close()
+                    error = e
+                else:
+                    self._socket = connection
+                    threading.Thread(target=self._read, args=(connection,), name="bus-client", daemon=True).start()
+                    return True
+            if time.monotonic() >= deadline:
+                print(f"Error connecting to the message bus at {self.path}: {error}")
+                return False
+            time.sleep(0.05)  # management.py is still starting the bus
+
+    def connect_in_background(self, timeout=CONNECT_TIMEOUT):
+        """Connect on a thread of its own, so the caller (e.g. the Tk thread) does not wait for the bus."""
+        threading.Thread(target=self.connect, args=(timeout,), name="bus-connect", daemon=True).start()
+
+    def _read(self, connection):
+        try:
+            for line in connection.makefile("rb"):
+                try:
+                    message = decode(line)
+                except ValueError as e:
+                    print(f"Error reading bus message: {e}")
+                    continue
+                if message.type not in self.handlers:
+                    continue
+                handler = self.handlers[message.type]
+                if handler is None:
+                    self.messages.put(message)
+                else:
+                    _call(handler, message)
+        except OSError:
+            pass
+        if self._socket is connection:
+            self._socket = None
+
+    def publish(self, message_type, **fields):
+        """Send a message to every other process on the bus; returns False (and prints why) if it could not."""
+        line = encode(message_type, **fields)
+        connection = self._socket
+        if connection is None and self.connect(timeout=0):  # One attempt, the caller may be the Tk thread
+            connection = self._socket
+        if connection is None:
+            print(f"Error publishing {message_type}: not connected to the message bus")
+            return False
+        try:
+            with self._send_lock:
+                connection.sendall(line)
+        except OSError as e:
+            print(f"Error publishing {message_type}: {e}")
+            return False
+        return True
+
+    def drain(self, apply):
+        """
+        Apply the queued messages on the calling (Tk) thread.
+
+        Args:
+            apply: Called with each Message.
+
+        Returns:
+            int: Number of messages applied.
+        """
+        applied = 0
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                return applied
+            try:
+                apply(message)
+            except Exception as e:
+                print(f"Error applying {message.type}: {e}")
+            applied += 1
+
+    def close(self):
+        connection, self._socket = self._socket, None
+        if connection is not None:
+            _close(connection)
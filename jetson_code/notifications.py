@@ -0,0 +1,174 @@
+import time
+import tkinter as tk
+from collections import OrderedDict
+
+# Pop-up notifications of the fridge GUI. show_notification used to open a
+# Toplevel with its own after timer per message, so a day on which 20 items
+# expired opened 20 windows in one tick. Here there is one overlay window with
+# a fixed number of message rows; events raised close together are merged into
+# one summary line ("5 items expired: Milk, Eggs, Tea, +2 more").
+
+NOTIFICATION_DURATION = 6000  # Milliseconds a message stays on screen
+MAX_VISIBLE_NOTIFICATIONS = 3  # Message rows of the overlay; older messages make way
+FLUSH_INTERVAL = 500  # Milliseconds; events raised within it are shown as one message
+MAX_NAMES = 3  # Names listed in a summary before "+N more"
+
+WINDOW_WIDTH = 450
+ROW_HEIGHT = 50
+SCREEN_WIDTH = 1024
+FONT = ("Helvetica", 16, "bold")
+
+# Kind of event -> (message for one item, summary for several, font color)
+NOTICE_KINDS = {
+    "expiring_soon": ("Item '{name}' is expiring soon !", "{count} items expiring soon: {names}", "orange"),
+    "expired": ("Item '{name}' has expired!", "{count} items expired: {names}", "red"),
+}
+
+
+def summarize(events):
+    """
+    Merge events into the lines to show, one per kind (or per distinct message).
+
+    Args:
+        events: (kind, subject) pairs. kind is a key of NOTICE_KINDS and subject
+            an item name, or kind is None and subject a (message, font color) pair.
+
+    Returns:
+        list: (message, font color) pairs, in the order their first event came.
+    """
+    groups = OrderedDict()
+    for kind, subject in events:
+        key = kind if kind is not None else subject
+        names = groups.setdefault(key, [])
+        if kind is None or subject not in names:
+            names.append(subject)
+
+    lines = []
+    for key, subjects in groups.items():
+        if key not in NOTICE_KINDS:
+            message, font_color = key
+            lines.append((message if len(subjects) == 1 else f"{message} (x{len(subjects)})", font_color))
+            continue
+        single, summary, font_color = NOTICE_KINDS[key]
+        if len(subjects) == 1:
+            lines.append((single.format(name=subjects[0]), font_color))
+            continue
+        names = ", ".join(subjects[:MAX_NAMES])
+        if len(subjects) > MAX_NAMES:
+            names += f", +{len(subjects) - MAX_NAMES} more"
+        lines.append((summary.format(count=len(subjects), names=names), font_color))
+    return lines
+
+
+class NotificationManager:
+    """
+    Shows notifications in one overlay window at the top right of the screen.
+
+        notifications = NotificationManager(root, icon=load_image("icons/expired.png", (30, 30)))
+        notifications.notify("expired", "Milk")
+        notifications.show("Item added", "green")
+
+    The window and its labels are created once; must be used from the Tk thread.
+    """
+
+    def __init__(self, root, icon=None, max_visible=MAX_VISIBLE_NOTIFICATIONS,
+                 duration=NOTIFICATION_DURATION, flush_interval=FLUSH_INTERVAL):
+        """
+        Args:
+            root (tk.Tk): The GUI's root window.
+            icon: Image shown next to every message (kept referenced here).
+            max_visible (int): Messages on screen at most.
+            duration (int): Milliseconds a message stays on screen.
+            flush_interval (int): Milliseconds over which events are merged.
+        """
+        self.root = root
+        self.icon = icon
+        self.max_visible = max_visible
+        self.duration = duration
+        self.flush_interval = flush_interval
+        self.messages = []  # [message, font color, time.monotonic() it disappears], oldest first
+        self.shown = 0  # Messages shown since start, after merging
+        self.dropped = 0  # Messages that made way for newer ones before their time
+        self._pending = []
+        self._flush_id = None
+        self._expire_id = None
+        self._last_flush = 0.0
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Notification")
+        self.window.overrideredirect(True)  # Remove window decorations
+        self.window.attributes("-topmost", True)  # Ensure it stays on top
+        self.window.withdraw()
+        self.labels = []
+        for _ in range(max_visible):
+            label = tk.Label(self.window, font=FONT, bg="#f0f0f0", image=icon, compound='left',
+                             padx=10, pady=10, wraplength=WINDOW_WIDTH - 70, anchor='w', justify='left')
+            self.labels.append(label)
+
+    def notify(self, kind, subject):
+        """Queue an event of a kind in NOTICE_KINDS, e.g. notify("expired", "Milk")."""
+        self._pending.append((kind, subject))
+        self._schedule_flush()
+
+    def show(self, message, font_color="black"):
+        """Queue a free-form message; identical ones raised together are shown once."""
+        self._pending.append((None, (message, font_color)))
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_id is not None:
+            return  # Already due; the new event joins that flush
+        wait = self._last_flush + self.flush_interval / 1000 - time.monotonic()
+        self._flush_id = self.root.after(max(0, int(wait * 1000)), self.flush)
+
+    def flush(self):
+        """Show the queued events now, merged into summary lines."""
+        self._flush_id = None
+        self._last_flush = time.monotonic()
+        events, self._pending = self._pending, []
+        expires_at = time.monotonic() + self.duration / 1000
+        for message, font_color in summarize(events):
+            self.messages.append([message, font_color, expires_at])
+            self.shown += 1
+        if len(self.messages) > self.max_visible:
+            self.dropped += len(self.messages) - self.max_visible
+            del self.messages[:-self.max_visible]
+        self._render()
+
+    def _render(self):
+        for index, label in enumerate(self.labels):
+            if index < len(self.messages):
+                message, font_color, _ = self.messages[index]
+                label.config(text=message, fg=font_color)
+                label.pack(expand=True, fill=tk.BOTH)
+            else:
+                label.pack_forget()
+        if self.messages:
+            height = ROW_HEIGHT * len(self.messages)
+            self.window.geometry(f"{WINDOW_WIDTH}x{height}+{SCREEN_WIDTH - WINDOW_WIDTH}+0")
+            self.window.deiconify()
+        else:
+            self.window.withdraw()
+        self._schedule_expiry()
+
+    def _schedule_expiry(self):
+        # One timer, for the message that disappears first
+        if self._expire_id is not None:
+            self.root.after_cancel(self._expire_id)
+            self._expire_id = None
+        if self.messages:
+            wait = min(expires_at for _, _, expires_at in self.messages) - time.monotonic()
+            self._expire_id = self.root.after(max(0, int(wait * 1000) + 1), self._expire)
+
+    def _expire(self):
+        self._expire_id = None
+        now = time.monotonic()
+        self.messages = [entry for entry in self.messages if entry[2] > now]
+        self._render()
+
+    def close(self):
+        for after_id in (self._flush_id, self._expire_id):
+            if after_id is not None:
+                self.root.after_cancel(after_id)
+        self._flush_id = self._expire_id = None
+        self.window.destroy()
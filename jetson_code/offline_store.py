@@ -0,0 +1,505 @@
+import copy
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from change_channel import ChangeChannel
+from item_manager import InStock, ExpiringSoon, Expired, Shopping, DefaultList, UserSnapshot, metrics
+from item_model import ItemList
+
+# Local replica of a user's lists. Reads are served from memory, writes are
+# appended to a durable outbox in SQLite and replayed to the Lambdas by a
+# background worker, so GUI actions never wait for the network.
+#
+# Conflicts with edits made from the Android app are resolved server-wins:
+# the lists shown are always the last server snapshot with the still-pending
+# local writes applied on top. A pending write that no longer applies on the
+# server (e.g. the app already removed the item) is dropped and logged in the
+# conflicts table.
+#
+# The SQLite file holds the lists in plaintext: server_lists.items and the
+# outbox args keep the decrypted amounts, where the cloud stores them KMS
+# encrypted. Encrypting them here would need KMS to start up or queue a write,
+# which is what the store is for doing offline, so the file relies on the
+# Jetson's disk being private to the fridge user.
+
+OFFLINE_DB_PATH = "fridge_lists.db"
+SYNC_INTERVAL = 5.0  # Seconds between pulls of the server lists
+SYNC_RETRY_DELAY = 15.0  # Seconds to wait after Lambda was unavailable
+MAX_SYNC_ATTEMPTS = 5  # Server errors before a queued write is given up as a conflict
+
+ITEM_LIST_NAMES = ["in_stock_list", "expiring_soon_list", "expired_list", "shopping_list"]
+DEFAULT_LIST_NAME = "default_list"
+# Lists holding copies of in-stock items that follow their amount (see Apply_Transition)
+COPY_LIST_NAMES = ["expiring_soon_list", "expired_list"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS server_lists (
+    user_name TEXT NOT NULL,
+    list_name TEXT NOT NULL,
+    items TEXT NOT NULL,
+    PRIMARY KEY (user_name, list_name)
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_name TEXT NOT NULL,
+    list_name TEXT NOT NULL,
+    op TEXT NOT NULL,
+    args TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE TABLE IF NOT EXISTS conflicts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_name TEXT NOT NULL,
+    list_name TEXT NOT NULL,
+    op TEXT NOT NULL,
+    args TEXT NOT NULL,
+    status_code INTEGER,
+    body TEXT,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def _find_index(items, name):
+    """Index of the first item with this name (case-insensitive), or None."""
+    for index, item in enumerate(items):
+        if item['name'].lower() == name.lower():
+            return index
+    return None
+
+
+def apply_op(lists, list_name, op, args):
+    """
+    Apply a queued write to a dict of list_name -> items, the same way the Lambdas do.
+
+    Lists are replaced, never changed in place, so lists handed out earlier stay
+    valid. A write whose item is gone is a no-op.
+    """
+    items = lists.get(list_name, [])
+    if op == "add":
+        lists[list_name] = items + [args['item']]
+    elif op == "remove":
+        index = _find_index(items, args['name'])
+        if index is not None:
+            lists[list_name] = items[:index] + items[index + 1:]
+    elif op == "update":
+        for index, item in enumerate(items):
+            if item['name'] == args['name']:  # Exact match, like ItemManager.update_item
+                lists[list_name] = items[:index] + [dict(item, amount=str(args['amount']))] + items[index + 1:]
+                break
+    elif op == "transition":
+        index = _find_index(items, args['name'])
+        if index is None:
+            return
+        new_amount = None
+        if args.get('amount') is not None and items[index].get('amount') is not None:
+            remaining = int(items[index]['amount']) - int(args['amount'])
+            new_amount = str(remaining) if remaining > 0 else None
+        copies = [name for name in COPY_LIST_NAMES if name != list_name]
+        if new_amount is None:
+            # Used up: drop it and its copies, put it on the shopping list
+            lists[list_name] = items[:index] + items[index + 1:]
+            for copy_name in copies:
+                apply_op(lists, copy_name, "remove", {'name': args['name']})
+            if _find_index(lists.get('shopping_list', []), args['name']) is None:
+                apply_op(lists, 'shopping_list', "add", {'item': {
+                    "name": args['name'],
+                    "amount": "1",
+                    "expiration_date": "N/A",
+                    "entry_date": args['entry_date']
+                }})
+        else:
+            lists[list_name] = items[:index] + [dict(items[index], amount=new_amount)] + items[index + 1:]
+            for copy_name in copies:
+                copy_items = lists.get(copy_name, [])
+                copy_index = _find_index(copy_items, args['name'])
+                if copy_index is not None:
+                    lists[copy_name] = (copy_items[:copy_index] + [dict(copy_items[copy_index], amount=new_amount)]
+                                        + copy_items[copy_index + 1:])
+    elif op == "default_add":
+        if args['name'] not in items:
+            lists[list_name] = items + [args['name']]
+    elif op == "default_remove":
+        lists[list_name] = [item for item in items if item != args['name']]
+
+
+class OfflineStore:
+    """
+    SQLite replica of one user's five lists with an outbox synced in the background.
+
+    Use list_manager() and default_list() in place of the ItemManager and
+    DefaultList instances; they have the same methods.
+    """
+
+    def __init__(self, user_name, path=OFFLINE_DB_PATH, sync_interval=SYNC_INTERVAL, **manager_kwargs):
+        """
+        Args:
+            user_name (str): The user whose lists are mirrored.
+            path (str): SQLite database file.
+            sync_interval (float): Seconds between pulls of the server lists.
+            **manager_kwargs: lambda_client, kms_client, envelope for the ItemManagers used to sync.
+        """
+        self.user_name = user_name
+        self.sync_interval = sync_interval
+        self.online = True  # False while the last sync attempt could not reach Lambda
+        self.last_sync = None  # time.time() of the last successful pull
+        self.channel = None  # ChangeChannel delivering edits made elsewhere, see start
+        self._stored = {}  # list_name -> the sync manager's items last saved (caches are replaced on change)
+        self._listeners = []
+
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")  # A queued write survives a power cut
+        self._db.executescript(SCHEMA)
+        self.device_id = self._device_id()
+
+        # Managers that talk to the Lambdas on behalf of the worker
+        lambda_client = self._lambda_client = manager_kwargs.get('lambda_client')
+        self._remote = {
+            "in_stock_list": InStock("in_stock_list", user_name, **manager_kwargs),
+            "expiring_soon_list": ExpiringSoon("expiring_soon_list", user_name, **manager_kwargs),
+            "expired_list": Expired("expired_list", user_name, **manager_kwargs),
+            "shopping_list": Shopping("shopping_list", user_name, **manager_kwargs),
+            DEFAULT_LIST_NAME: DefaultList(user_name, lambda_client=lambda_client)
+        }
+        self._snapshot = UserSnapshot(user_name, lambda_client=lambda_client or self._remote["in_stock_list"].lambda_client)
+        self._snapshot.register(*self._remote.values())
+
+        self._server = self._load_server_lists()
+        self._pending = self._load_outbox()
+        self._view = self._compute_view()
+
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- storage ------------------------------------------------------------
+
+    def _device_id(self):
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'device_id'").fetchone()
+        if row:
+            return row[0]
+        device_id = uuid.uuid4().hex
+        with self._db:
+            self._db.execute("INSERT INTO meta (key, value) VALUES ('device_id', ?)", (device_id,))
+        return device_id
+
+    def _load_server_lists(self):
+        rows = self._db.execute("SELECT list_name, items FROM server_lists WHERE user_name = ?", (self.user_name,))
+        return {list_name: json.loads(items) for list_name, items in rows}
+
+    def _load_outbox(self):
+        rows = self._db.execute(
+            "SELECT seq, list_name, op, args, attempts FROM outbox WHERE user_name = ? ORDER BY seq",
+            (self.user_name,)
+        )
+        return [{"seq": seq, "list_name": list_name, "op": op, "args": json.loads(args), "attempts": attempts}
+                for seq, list_name, op, args, attempts in rows]
+
+    def _compute_view(self):
+        """The server lists with every pending write applied on top."""
+        view = {name: self._server.get(name, []) for name in ITEM_LIST_NAMES + [DEFAULT_LIST_NAME]}
+        for entry in self._pending:
+            apply_op(view, entry['list_name'], entry['op'], entry['args'])
+        return view
+
+    # --- local API ------------------------------------------------------------
+
+    def get_list(self, list_name):
+        """Return the current items of a list (do not modify them)."""
+        return self._view.get(list_name, [])
+
+    def enqueue(self, list_name, op, args):
+        """Record a write durably, apply it to the local lists and wake the sync worker."""
+        with self._lock:
+            with self._db:
+                cursor = self._db.execute(
+                    "INSERT INTO outbox (user_name, list_name, op, args, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (self.user_name, list_name, op, json.dumps(args), time.time())
+                )
+            self._pending.append({"seq": cursor.lastrowid, "list_name": list_name, "op": op,
+                                  "args": args, "attempts": 0})
+            view = dict(self._view)
+            apply_op(view, list_name, op, args)
+            self._view = view
+        metrics.count("offline_store", "queued")
+        self._wakeup.set()
+        return {"statusCode": 202, "body": json.dumps("Queued for sync")}
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def conflicts(self, limit=20):
+        """Return the most recent writes dropped because they no longer applied on the server."""
+        rows = self._db.execute(
+            "SELECT list_name, op, args, status_code, body, created_at FROM conflicts "
+            "WHERE user_name = ? ORDER BY id DESC LIMIT ?", (self.user_name, limit)
+        )
+        return [{"list_name": list_name, "op": op, "args": json.loads(args), "status_code": status_code,
+                 "body": body, "created_at": created_at}
+                for list_name, op, args, status_code, body, created_at in rows]
+
+    def add_listener(self, callback):
+        """Call callback(list_names) from the sync threads when server changes reach the local lists."""
+        self._listeners.append(callback)
+
+    def list_manager(self, list_name):
+        return LocalListManager(self, list_name)
+
+    def default_list(self):
+        return LocalDefaultList(self)
+
+    # --- sync -------------------------------------------------------------------
+
+    def _send(self, entry):
+        """Replay one queued write through the ItemManagers and return the Lambda response."""
+        manager = self._remote[entry['list_name']]
+        args = entry['args']
+        key = f"{self.device_id}:{entry['seq']}"
+        op = entry['op']
+        if op == "add":
+            item = args['item']
+            return manager.add_item(item['name'], item['amount'], item['expiration_date'], item['entry_date'],
+                                    idempotency_key=key)
+        if op == "remove":
+            return manager.remove_item_by_name(args['name'], idempotency_key=key)
+        if op == "update":
+            response = manager.update_item(args['name'], args['amount'], idempotency_key=key)
+            return response if response is not None else {"statusCode": 404, "body": json.dumps("Item not found")}
+        if op == "transition":
+            return manager.apply_transition(args['name'], args.get('amount'), args['entry_date'],
+                                            idempotency_key=key)
+        if op == "default_add":
+            # Already present is reported as 400 and dropped
+            return manager.add_item(args['name'], idempotency_key=key)
+        if op == "default_remove":
+            return manager.remove_item(args['name'], idempotency_key=key)
+        raise ValueError(f"Unknown queued operation {op}")
+
+    def _finish(self, entry, response=None):
+        """Remove a write from the outbox, logging it as a conflict if a response is given."""
+        with self._lock:
+            with self._db:
+                self._db.execute("DELETE FROM outbox WHERE seq = ?", (entry['seq'],))
+                if response is not None:
+                    self._db.execute(
+                        "INSERT INTO conflicts (user_name, list_name, op, args, status_code, body, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (self.user_name, entry['list_name'], entry['op'], json.dumps(entry['args']),
+                         response.get('statusCode'), response.get('body'), time.time())
+                    )
+            self._pending = [pending for pending in self._pending if pending['seq'] != entry['seq']]
+
+    def push(self):
+        """
+        Replay the outbox in order.
+
+        Returns:
+            bool: True if the outbox is empty, False if Lambda was unavailable.
+        """
+        while self._pending:
+            entry = self._pending[0]
+            try:
+                with metrics.timed("sync", "push"):
+                    response = self._send(entry) or {}
+            except Exception as e:
+                response = {"statusCode": 503, "body": json.dumps(str(e))}
+            status = response.get('statusCode')
+
+            if status in (200, 201):
+                self._finish(entry)
+            elif status == 503:
+                self._record_attempt(entry, response)
+                return False
+            elif status in (409, 500) and entry['attempts'] + 1 < MAX_SYNC_ATTEMPTS:
+                # The record kept changing or the Lambda failed; try again on the next round
+                self._record_attempt(entry, response)
+                return False
+            else:
+                print(f"Dropping queued {entry['op']} on {entry['list_name']}: {response.get('body')}")
+                metrics.count("offline_store", "conflict")
+                self._finish(entry, response)
+        return True
+
+    def _record_attempt(self, entry, response):
+        entry['attempts'] += 1
+        with self._lock:
+            with self._db:
+                self._db.execute("UPDATE outbox SET attempts = ?, last_error = ? WHERE seq = ?",
+                                 (entry['attempts'], response.get('body'), entry['seq']))
+
+    def pull(self):
+        """Bring the server lists up to date (changes since the last pull, or a full snapshot)."""
+        with metrics.timed("sync", "pull"):
+            if not self._snapshot.refresh():
+                return False
+        self._store_server_lists()
+        self.last_sync = time.time()
+        return True
+
+    def _store_server_lists(self):
+        """Save the lists the sync managers changed since the last save and tell the listeners."""
+        if not self._snapshot.has_lists():
+            return set()
+        with self._lock:
+            # Called from the sync and the change-channel threads; deciding what
+            # changed under the lock keeps a list from being saved and reported twice
+            lists = {}
+            for name, manager in self._remote.items():
+                items = manager.get_items()  # Cached, no Lambda call
+                if items is not self._stored.get(name):
+                    lists[name] = items
+            if not lists:
+                return set()
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO server_lists (user_name, list_name, items) VALUES (?, ?, ?)",
+                    [(self.user_name, name, json.dumps(items)) for name, items in lists.items()]
+                )
+            self._server.update(copy.deepcopy(lists))
+            self._stored.update(lists)
+            self._view = self._compute_view()
+        for listener in list(self._listeners):
+            try:
+                listener(set(lists))
+            except Exception as e:
+                print(f"Error in offline store listener: {e}")
+        return set(lists)
+
+    def sync(self):
+        """
+        Push the outbox, then pull the server lists. With a change channel the
+        lists are only pulled after writes were pushed; other changes arrive
+        through the channel.
+
+        Returns:
+            bool: True if Lambda was reached.
+        """
+        queued = len(self._pending)
+        synced = self.push()
+        if synced and (self.channel is None or len(self._pending) < queued):
+            synced = self.pull()
+        self.online = synced
+        return synced
+
+    def _run(self):
+        while not self._stop.is_set():
+            synced = self.sync()
+            self._wakeup.wait(self.sync_interval if synced else SYNC_RETRY_DELAY)
+            self._wakeup.clear()
+
+    def start(self, use_channel=True, initial_pull=True, **channel_options):
+        """
+        Start the sync worker. On a device that never synced this user, pull once first.
+
+        Args:
+            use_channel (bool): Receive edits made elsewhere (e.g. the Android app)
+                through a ChangeChannel instead of pulling every sync_interval.
+            initial_pull (bool): Wait for that first pull; without it the lists stay
+                empty until the background threads loaded them (listeners are told).
+            **channel_options: ChangeChannel arguments, e.g. wait.
+        """
+        if initial_pull and not self._server:
+            self.online = self.pull()
+        if use_channel:
+            # A client passed in (e.g. a local stand-in) is used for the long polls too
+            channel_options.setdefault('lambda_client', self._lambda_client)
+            self.channel = ChangeChannel(self._snapshot, on_change=lambda list_names: self._store_server_lists(),
+                                         **channel_options).start()
+        self._thread = threading.Thread(target=self._run, name="offline-store-sync", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self.channel is not None:
+            self.channel.stop()
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def close(self):
+        self.stop()
+        if self._thread is None or not self._thread.is_alive():
+            self._db.close()  # Otherwise left open for the sync still in flight
+
+
+class LocalListManager:
+    """Drop-in replacement for an ItemManager that reads and writes an OfflineStore."""
+
+    def __init__(self, store, list_name):
+        self.store = store
+        self.list_name = list_name
+        self.user_name = store.user_name
+        self._item_list = None
+
+    def get_items(self):
+        return self.store.get_list(self.list_name)
+
+    def get_item_list(self):
+        self._item_list = ItemList.of(self.get_items(), self._item_list)
+        return self._item_list
+
+    def find_item(self, name):
+        item_list = self.get_item_list()
+        index = item_list.index_of(name)
+        return item_list.source[index] if index is not None else None
+
+    def has_item(self, name, verify=False):
+        return self.find_item(name) is not None
+
+    def get_item_amount(self, name):
+        item = self.find_item(name)
+        return item['amount'] if item is not None else None
+
+    def add_item(self, name, amount=None, expiration_date=None, entry_date=None):
+        item = {
+            "name": name,
+            "amount": str(amount) if amount else amount,
+            "expiration_date": expiration_date,
+            "entry_date": entry_date
+        }
+        return self.store.enqueue(self.list_name, "add", {"item": item})
+
+    def remove_item_by_name(self, name):
+        return self.store.enqueue(self.list_name, "remove", {"name": name})
+
+    def update_item(self, name, new_amount):
+        return self.store.enqueue(self.list_name, "update", {"name": name, "amount": str(new_amount)})
+
+    def apply_transition(self, name, amount=None, entry_date=None):
+        return self.store.enqueue(self.list_name, "transition", {
+            "name": name,
+            "amount": amount,
+            "entry_date": entry_date or datetime.now().strftime("%d/%m/%Y")
+        })
+
+
+class LocalDefaultList:
+    """Drop-in replacement for DefaultList that reads and writes an OfflineStore."""
+
+    list_name = DEFAULT_LIST_NAME
+
+    def __init__(self, store):
+        self.store = store
+        self.user_name = store.user_name
+
+    def get_items(self):
+        return self.store.get_list(self.list_name)
+
+    def add_item(self, item_name):
+        return self.store.enqueue(self.list_name, "default_add", {"name": item_name})
+
+    def remove_item(self, item_name):
+        return self.store.enqueue(self.list_name, "default_remove", {"name": item_name})
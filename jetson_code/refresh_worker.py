@@ -0,0 +1,119 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from item_manager import metrics
+
+# periodic_update used to run the expiry checks and reload the lists inside a
+# root.after callback, so every Lambda call behind them froze the touchscreen.
+# The refresh worker does that part on its own thread and hands the Tk thread a
+# finished result; Tk only drains the queue and redraws.
+#
+# Ticks never overlap: the next one starts after the previous result has been
+# applied on the Tk thread, and requests made meanwhile fold into one tick.
+
+REFRESH_INTERVAL = 1.0  # Seconds between ticks, like root.after(1000, periodic_update)
+IDLE_REFRESH_INTERVAL = 10.0  # Seconds between ticks while no list is on screen
+DRAIN_INTERVAL = 100  # Milliseconds between checks of the result queue on the Tk thread
+
+# What a tick hands to the Tk thread. lists holds (list name, items) pairs;
+# the managers replace their cached lists on every change instead of editing
+# them, so the items can be read on the Tk thread while the next tick runs.
+RefreshResult = namedtuple("RefreshResult", ["lists", "notifications", "duration"])
+
+
+class RefreshWorker:
+    """
+    Runs a refresh function on a background thread, one tick at a time.
+
+        worker = RefreshWorker(refresh_tick).start()
+        worker.drain(apply_refresh)  # From root.after on the Tk thread
+
+    The refresh function must not touch Tk; it returns a RefreshResult (or
+    None if there is nothing to apply).
+    """
+
+    def __init__(self, refresh, interval=REFRESH_INTERVAL):
+        """
+        Args:
+            refresh: Function run on the worker thread for every tick.
+            interval (float): Seconds between the end of one tick and the start of the next.
+        """
+        self.refresh = refresh
+        self.interval = interval
+        self.results = queue.Queue()
+        self.ticks = 0
+        self.in_flight = False  # True from the start of a tick until Tk applied its result
+        self._wakeup = threading.Event()
+        self._applied = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def request(self):
+        """Start a tick now instead of after the interval; safe to call from any thread."""
+        self._wakeup.set()
+
+    def _tick(self):
+        start = time.perf_counter()
+        failed = False
+        try:
+            result = self.refresh()
+        except Exception as e:
+            print(f"Error in refresh tick: {e}")
+            result = None
+            failed = True
+        metrics.observe("refresh", "tick", time.perf_counter() - start, error=failed)
+        return result
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                break
+            self.in_flight = True
+            self._applied.clear()
+            result = self._tick()
+            self.ticks += 1
+            if result is not None:
+                self.results.put(result)
+                # Wait for the Tk thread, so a busy screen never has results piling up
+                while not self._applied.wait(0.5) and not self._stop.is_set():
+                    pass
+            self.in_flight = False
+
+    def drain(self, apply):
+        """
+        Apply the finished results on the calling (Tk) thread.
+
+        Args:
+            apply: Called with each RefreshResult.
+
+        Returns:
+            int: Number of results applied.
+        """
+        applied = 0
+        while True:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                return applied
+            try:
+                apply(result)
+            except Exception as e:
+                print(f"Error applying refresh: {e}")
+            finally:
+                applied += 1
+                self._applied.set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="refresh-worker", daemon=True)
+        self._thread.start()
+        self.request()  # First tick right away
+        return self
+
+    def stop(self):
+        """Stop after the tick in flight; it is not waited for."""
+        self._stop.set()
+        self._wakeup.set()
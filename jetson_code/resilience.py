@@ -0,0 +1,224 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, ReadTimeoutError
+
+# Retry policy for calls to AWS. Throttled requests and requests that never
+# reached the service are always safe to retry; other server errors and
+# timeouts only for idempotent calls, since a write may already have happened.
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 0.2  # Seconds, doubled on every retry
+BACKOFF_CAP = 3.0  # Seconds
+DEFAULT_DEADLINE = 5.0  # Seconds for a call including its retries
+
+# Circuit breaker: after this many failed attempts in a row stop calling for the cooldown
+FAILURE_THRESHOLD = 5
+COOLDOWN = 30.0  # Seconds
+
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException", "TooManyRequestsException", "Throttling",
+    "RequestLimitExceeded", "ProvisionedThroughputExceededException", "EC2ThrottledException"
+}
+SERVER_ERROR_CODES = {
+    "ServiceException", "ServiceUnavailableException", "InternalFailure",
+    "InternalServerError", "ResourceNotReadyException"
+}
+
+# Threads that run individual attempts so a caller can give up at its deadline
+MAX_CONCURRENT_CALLS = 16
+
+
+class ServiceUnavailable(Exception):
+    """The service could not be reached in time; the caller should fall back to cached data."""
+
+
+class CircuitOpenError(ServiceUnavailable):
+    """The circuit breaker is open, the call was not made."""
+
+
+class DeadlineExceeded(ServiceUnavailable):
+    """The call did not finish before its deadline."""
+
+
+class FunctionError(Exception):
+    """A Lambda function failed with an unhandled error (FunctionError in the invoke response)."""
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Exponential backoff with full jitter for the given retry (1 = first retry)."""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+def classify_error(error):
+    """
+    Sort an exception from a call into how it may be handled.
+
+    Returns:
+        str: "throttled" or "unreachable" (the request was not executed, always
+        retryable), "server" (the service failed, retryable for idempotent calls)
+        or "fatal" (a client-side problem that retrying will not fix).
+    """
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        if code in THROTTLING_ERROR_CODES or status == 429:
+            return "throttled"
+        if code in SERVER_ERROR_CODES or status >= 500:
+            return "server"
+        return "fatal"
+    if isinstance(error, BotoConnectionError):
+        return "unreachable"
+    if isinstance(error, (ReadTimeoutError, FunctionError)):
+        return "server"
+    return "fatal"
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a failing service for a cooling period.
+
+    closed: calls go through. After failure_threshold transiently failed attempts
+    in a row the breaker opens and calls are rejected. Once the cooldown has passed
+    it is half-open and lets one trial call through; its outcome closes the
+    breaker again or restarts the cooldown.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and self.clock() - self._opened_at >= self.cooldown:
+                return self.HALF_OPEN
+            return self._state
+
+    @property
+    def is_open(self):
+        """True while calls are being rejected, i.e. the device should show itself offline."""
+        return self.state != self.CLOSED
+
+    def allow(self):
+        """Return True if a call may be made now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if self.clock() - self._opened_at < self.cooldown:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self.clock()
+            self._trial_in_flight = False
+
+    def reset(self):
+        self.record_success()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CALLS, thread_name_prefix="aws-call")
+        return _executor
+
+
+class ResilientCaller:
+    """Runs calls to one service with retries, backoff, deadlines and a circuit breaker."""
+
+    def __init__(self, breaker=None, max_attempts=MAX_ATTEMPTS, default_deadline=DEFAULT_DEADLINE,
+                 sleep=time.sleep):
+        self.breaker = breaker or CircuitBreaker()
+        self.max_attempts = max_attempts
+        self.default_deadline = default_deadline
+        self.sleep = sleep
+        self.retries = 0  # Attempts repeated after a transient error
+        self.rejected = 0  # Calls not made because the breaker was open
+
+    def _attempt(self, function, remaining):
+        if remaining <= 0:
+            raise DeadlineExceeded("Deadline reached before the call was made")
+        future = _get_executor().submit(function)
+        try:
+            return future.result(timeout=remaining)
+        except FutureTimeoutError:
+            # The attempt keeps running in its thread, but the caller moves on
+            raise DeadlineExceeded(f"No response within {remaining:.1f} s")
+
+    def call(self, name, function, idempotent=False, deadline=None):
+        """
+        Call function() with retries until it succeeds or the deadline passes.
+
+        Args:
+            name (str): Name of the operation, used in error messages.
+            function: Callable making one attempt.
+            idempotent (bool): The call may be repeated after a server error or timeout.
+            deadline (float): Seconds for all attempts together (default: default_deadline).
+
+        Returns:
+            The result of the first successful attempt.
+
+        Raises:
+            ServiceUnavailable: The breaker is open, the deadline passed or all
+                attempts failed with transient errors.
+            Exception: Any non-transient error of the call, unchanged.
+        """
+        give_up_at = time.monotonic() + (deadline or self.default_deadline)
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self.rejected += 1
+                raise CircuitOpenError(f"{name}: service marked offline, not calling")
+            attempt += 1
+            try:
+                result = self._attempt(function, give_up_at - time.monotonic())
+            except DeadlineExceeded as e:
+                self.breaker.record_failure()
+                raise DeadlineExceeded(f"{name}: {e}")
+            except Exception as e:
+                kind = classify_error(e)
+                if kind == "fatal":
+                    self.breaker.record_success()  # The service answered, the request was wrong
+                    raise
+                self.breaker.record_failure()
+                retryable = kind in ("throttled", "unreachable") or idempotent
+                delay = backoff_delay(attempt)
+                if not retryable or attempt >= self.max_attempts or time.monotonic() + delay >= give_up_at:
+                    raise ServiceUnavailable(f"{name}: {e}") from e
+                self.retries += 1
+                self.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
@@ -0,0 +1,72 @@
+import itertools
+import json
+import os
+import sys
+import tkinter as tk
+
+import pytest
+
+# The Jetson modules are flat scripts imported by name (as GUI.py does), so the
+# tests import them from the directory above
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import item_manager  # noqa: E402
+from local_backends import LocalKMS, LocalDynamoDB, local_lambda_for  # noqa: E402
+
+_users = itertools.count()
+
+
+class LocalUser:
+    """A user seeded by editUsersData, behind its own local Lambdas, DynamoDB and KMS."""
+
+    def __init__(self, user_name, latency=0.0):
+        self.user_name = user_name
+        self.kms = LocalKMS()
+        self.dynamodb = LocalDynamoDB()
+        self.lambda_client = local_lambda_for(dynamodb=self.dynamodb, kms=self.kms, latency=latency)
+        self.clients = {"lambda_client": self.lambda_client, "kms_client": self.kms}  # For the ItemManagers
+        self.invoke("editUsersData", {"user_name": user_name})
+
+    def invoke(self, function_name, payload):
+        """Call a Lambda and return its decoded response."""
+        response = self.lambda_client.invoke(FunctionName=function_name, Payload=json.dumps(payload))
+        return json.loads(response["Payload"].read())
+
+
+@pytest.fixture
+def new_user():
+    """
+    Factory of fresh LocalUsers. Record versions and decrypt caches are shared
+    per user name within the process, so the users' entries are dropped afterwards.
+    """
+    user_names = []
+
+    def create(latency=0.0):
+        user_names.append(f"user_{next(_users)}")
+        return LocalUser(user_names[-1], latency=latency)
+
+    yield create
+    with item_manager._record_versions_lock:
+        for user_name in user_names:
+            item_manager._record_versions.pop(user_name, None)
+    with item_manager._decrypt_caches_lock:
+        for user_name in user_names:
+            item_manager._decrypt_caches.pop(user_name, None)
+
+
+@pytest.fixture
+def user(new_user):
+    """A fresh LocalUser."""
+    return new_user()
+
+
+@pytest.fixture
+def root():
+    """A withdrawn Tk root; tests that need one are skipped without a display."""
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        pytest.skip(f"No display for Tk: {e}")
+    root.withdraw()
+    yield root
+    root.destroy()
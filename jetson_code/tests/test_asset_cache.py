@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+import asset_cache  # noqa: E402
+
+
+@pytest.fixture
+def sources(tmp_path):
+    photo = tmp_path / "background.jpeg"
+    noise = Image.effect_noise((1920, 1080), 40)
+    Image.merge("RGB", (noise, noise.transpose(Image.Transpose.FLIP_LEFT_RIGHT), noise)).save(photo, quality=90)
+    icon = tmp_path / "in.png"
+    shape = Image.radial_gradient("L").resize((512, 512))
+    Image.merge("RGBA", (shape, shape, shape, shape.point(lambda v: 255 - v))).save(icon)
+    return str(photo), str(icon), str(tmp_path / "asset_cache")
+
+
+def test_photos_stay_jpeg_and_icons_keep_their_transparency(sources):
+    photo, icon, cache_dir = sources
+
+    entry = asset_cache.cached_file(photo, (1024, 600), cache_dir)
+    with Image.open(entry) as image:
+        assert (image.format, image.size) == ("JPEG", (1024, 600))
+    as_png = os.path.join(cache_dir, "background.png")
+    asset_cache.resize(photo, (1024, 600)).save(as_png, compress_level=6)
+    assert os.path.getsize(entry) < os.path.getsize(as_png) / 2
+
+    entry = asset_cache.cached_file(icon, (64, 64), cache_dir)
+    with Image.open(entry) as image:
+        assert (image.format, image.mode, image.size) == ("PNG", "RGBA", (64, 64))
+        assert image.getextrema()[3][0] < 255  # Still transparent somewhere
+
+
+def test_entries_are_reused_until_the_source_changes(sources):
+    photo, _, cache_dir = sources
+    entry = asset_cache.cached_file(photo, (1024, 600), cache_dir)
+    assert asset_cache.cached_file(photo, (1024, 600), cache_dir) == entry
+
+    stat = os.stat(photo)
+    os.utime(photo, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    updated = asset_cache.cached_file(photo, (1024, 600), cache_dir)
+    assert updated != entry
+    assert os.listdir(cache_dir) == [os.path.basename(updated)]  # The old entry is removed
@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+from async_item_manager import AsyncItemManager, AsyncDefaultListManager, TkAsyncBridge, get_all_items
+from item_manager import InStock, Shopping, Expired, DefaultList
+
+
+def async_managers(user):
+    managers = [AsyncItemManager(manager=cls(user_name=user.user_name, **user.clients))
+                for cls in (InStock, Shopping, Expired)]
+    return managers + [AsyncDefaultListManager(manager=DefaultList(user.user_name, lambda_client=user.lambda_client))]
+
+
+def test_independent_lists_are_fetched_concurrently(new_user):
+    Is, sh, ex, default = async_managers(new_user(latency=0.05))
+    asyncio.run(Is.add_item("Kefir", "2", "N/A", "01/01/2025"))
+    for manager in (Is, sh, ex):
+        manager.manager._cache = None
+
+    started = time.perf_counter()
+    lists = asyncio.run(get_all_items(Is, sh, ex, default))
+    elapsed = time.perf_counter() - started
+
+    assert [[item["name"] for item in items] for items in lists[:3]] == [["Kefir"], [], []]
+    assert "Milk" in lists[3]
+    assert elapsed < 0.15  # One round-trip, not four
+
+
+def test_writes_to_one_list_keep_their_order(user):
+    Is, _, _, _ = async_managers(user)
+
+    async def writes():
+        await asyncio.gather(*[Is.add_item(f"Item {n}", "1", "N/A", "01/01/2025") for n in range(5)])
+        await Is.remove_item_by_name("Item 2")
+
+    asyncio.run(writes())
+    assert [item["name"] for item in Is.manager.get_items()] == ["Item 0", "Item 1", "Item 3", "Item 4"]
+    Is.manager._cache = None
+    assert [item["name"] for item in Is.manager.get_items()] == ["Item 0", "Item 1", "Item 3", "Item 4"]
+
+
+def test_bridge_hands_results_to_the_tk_thread(root, user):
+    Is, _, _, _ = async_managers(user)
+    bridge = TkAsyncBridge(root, poll_interval=5)
+    results = []
+    errors = []
+
+    async def failing():
+        raise ValueError("no such item")
+
+    bridge.submit(Is.add_item("Kefir", "2", "N/A", "01/01/2025"), callback=results.append)
+    bridge.submit(failing(), errback=errors.append)
+    give_up_at = time.monotonic() + 2
+    while (not results or not errors) and time.monotonic() < give_up_at:
+        root.update()
+        time.sleep(0.005)
+    bridge.close()
+
+    assert results[0]["statusCode"] == 200
+    assert isinstance(errors[0], ValueError)
@@ -0,0 +1,162 @@
+import json
+
+import pytest
+
+from change_channel import ChangeChannel
+from item_manager import InStock, Shopping, DefaultListManager, UserSnapshot
+
+
+class Fridge:
+    """A user's record behind the local Lambdas, with the fridge's snapshot of it loaded."""
+
+    def __init__(self, user):
+        self.user_name = user.user_name
+        self.kms = user.kms
+        self.dynamodb = user.dynamodb
+        self.lambda_client = user.lambda_client
+        self.invoke = user.invoke
+        self.managers = (InStock(user_name=self.user_name, **user.clients),
+                         Shopping(user_name=self.user_name, **user.clients),
+                         DefaultListManager(self.user_name, lambda_client=self.lambda_client))
+        self.snapshot = UserSnapshot(self.user_name, lambda_client=self.lambda_client)
+        self.snapshot.register(*self.managers)
+        assert self.snapshot.refresh()
+
+    def add_elsewhere(self, list_name, name, amount):
+        """Add an item the way the app would, behind the fridge's caches."""
+        self.invoke("Add_Item", {"user_name": self.user_name, "list_name": list_name, "item": {
+            "name": name, "amount": self.kms.encrypt_amount(amount), "expiration_date": "N/A", "entry_date": "01/01/2025"
+        }})
+
+    def update_elsewhere(self, list_name, index, name, amount):
+        self.invoke("Update_Item", {"user_name": self.user_name, "list_name": list_name, "item_index": index,
+                                    "updated_item": {"name": name, "amount": self.kms.encrypt_amount(amount),
+                                                     "expiration_date": "N/A", "entry_date": "01/01/2025"}})
+
+    def remove_elsewhere(self, list_name, name):
+        self.invoke("Remove_Item", {"user_name": self.user_name, "list_name": list_name, "item": {"name": name}})
+
+    def calls(self, function_name):
+        return self.lambda_client.calls_by_function.get(function_name, 0)
+
+    def lists(self):
+        Is, sh, default = self.managers
+        return [[(item["name"], item["amount"]) for item in manager.get_items()] for manager in (Is, sh)] + \
+            [default.get_items()]
+
+    def stored_lists(self):
+        """The lists as read again from the table."""
+        for manager in self.managers:
+            manager._cache = None
+        return self.lists()
+
+
+@pytest.fixture
+def fridge(user):
+    return Fridge(user)
+
+
+def test_change_log_describes_each_write_as_a_splice(fridge):
+    cursor = fridge.managers[0].record_version.value
+
+    fridge.add_elsewhere("in_stock_list", "Kefir", "1")
+    fridge.add_elsewhere("in_stock_list", "Tofu", "2")
+    fridge.update_elsewhere("in_stock_list", 0, "Kefir", "3")
+    fridge.remove_elsewhere("in_stock_list", "Kefir")
+
+    response = fridge.invoke("Get_Changes_Since", {"user_name": fridge.user_name, "cursor": cursor})
+    assert response["statusCode"] == 200
+    entries = json.loads(response["body"])["changes"]
+    assert [entry["version"] for entry in entries] == [cursor + 1, cursor + 2, cursor + 3, cursor + 4]
+    assert response["version"] == cursor + 4
+    splices = [[(change["list_name"], change["kind"], change["index"], change["remove"],
+                 [item["name"] for item in change["items"]]) for change in entry["changes"]] for entry in entries]
+    assert splices == [
+        [("in_stock_list", "add", 0, 0, ["Kefir"])],
+        [("in_stock_list", "add", 1, 0, ["Tofu"])],
+        [("in_stock_list", "update", 0, 1, ["Kefir"])],
+        [("in_stock_list", "remove", 0, 1, [])],
+    ]
+
+    response = fridge.invoke("Get_Changes_Since", {"user_name": fridge.user_name, "cursor": cursor + 4})
+    assert json.loads(response["body"]) == {"changes": [], "cursor": cursor + 4}
+
+
+def test_refresh_applies_the_changes_without_a_snapshot(fridge):
+    snapshots = fridge.calls("Get_User_Snapshot")
+
+    fridge.add_elsewhere("in_stock_list", "Kefir", "1")
+    fridge.add_elsewhere("shopping_list", "Tofu", "2")
+    fridge.update_elsewhere("in_stock_list", 0, "Kefir", "3")
+    assert fridge.snapshot.refresh()
+
+    assert fridge.snapshot.changed_lists == {"in_stock_list", "shopping_list"}
+    assert fridge.calls("Get_User_Snapshot") == snapshots
+    lists = fridge.lists()
+    assert lists[0] == [("Kefir", "3")]
+    assert lists[1] == [("Tofu", "2")]
+    assert lists == fridge.stored_lists()
+
+
+def test_own_writes_are_seen_in_the_change_log(fridge):
+    Is = fridge.managers[0]
+    Is.add_item("Kefir", "1", "N/A", "01/01/2025")
+
+    assert fridge.snapshot.refresh()
+    assert fridge.snapshot.changed_lists == set()  # Already in the cache
+    assert Is._cache is not None
+    assert fridge.lists() == fridge.stored_lists()
+
+
+def test_gap_in_the_change_log_falls_back_to_a_snapshot(fridge):
+    cursor = fridge.managers[0].record_version.value
+    fridge.add_elsewhere("in_stock_list", "Kefir", "1")
+    fridge.add_elsewhere("in_stock_list", "Tofu", "2")
+    # The oldest change expired from the log
+    fridge.dynamodb.Table("property_changes").delete_item(Key={"user_name": fridge.user_name, "version": cursor + 1})
+
+    assert fridge.snapshot.refresh_changes() is None
+    snapshots = fridge.calls("Get_User_Snapshot")
+    assert fridge.snapshot.refresh()
+    assert fridge.calls("Get_User_Snapshot") == snapshots + 1
+    assert fridge.lists()[0] == [("Kefir", "1"), ("Tofu", "2")]
+    assert fridge.managers[0].record_version.value == cursor + 2
+
+
+def test_hole_in_the_change_log_falls_back_to_a_snapshot(fridge):
+    cursor = fridge.managers[0].record_version.value
+    fridge.add_elsewhere("in_stock_list", "Kefir", "1")
+    fridge.add_elsewhere("in_stock_list", "Tofu", "1")
+    fridge.remove_elsewhere("in_stock_list", "Kefir")  # Would still fit the cache without the add before it
+    fridge.dynamodb.Table("property_changes").delete_item(Key={"user_name": fridge.user_name, "version": cursor + 2})
+
+    assert fridge.snapshot.refresh_changes() is None  # Stops at the missing version
+    assert fridge.snapshot.refresh()
+    assert fridge.lists()[0] == [("Tofu", "1")]
+    assert fridge.managers[0].record_version.value == cursor + 3
+
+
+def test_change_that_does_not_fit_the_cache_needs_a_snapshot(fridge):
+    fridge.add_elsewhere("in_stock_list", "Kefir", "1")
+    assert fridge.snapshot.refresh()
+    fridge.managers[0]._cache = []  # Out of step with the record
+
+    fridge.remove_elsewhere("in_stock_list", "Kefir")
+    assert fridge.snapshot.refresh_changes() is None
+    assert fridge.snapshot.refresh()
+    assert fridge.lists() == fridge.stored_lists()
+
+
+def test_channel_reports_the_changed_lists(fridge):
+    changed = []
+    channel = ChangeChannel(fridge.snapshot, on_change=changed.append, wait=0, lambda_client=fridge.lambda_client)
+
+    assert channel.poll_once()
+    assert changed == []  # Nothing changed since the load
+    assert channel.connected
+
+    fridge.add_elsewhere("shopping_list", "Tofu", "2")
+    assert channel.poll_once()
+    assert changed == [{"shopping_list"}]
+    assert channel.updates == 1
+    assert fridge.lists()[1] == [("Tofu", "2")]
@@ -0,0 +1,111 @@
+import base64
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+import envelope_encryption
+from envelope_encryption import EnvelopeCipher, is_envelope
+from item_manager import InStock
+from local_backends import LocalKMS
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(envelope_encryption, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def wrapped_key(value):
+    return value.split(":")[1]
+
+
+def test_round_trip():
+    kms = LocalKMS()
+    cipher = EnvelopeCipher(kms)
+    encrypted = [cipher.encrypt(amount) for amount in ("1", "12", "")]
+
+    assert all(is_envelope(value) for value in encrypted)
+    assert len(set(encrypted)) == 3
+    assert [cipher.decrypt(value) for value in encrypted] == ["1", "12", ""]
+    assert kms.calls == 1  # One data key, already unwrapped for decryption
+
+    reader = EnvelopeCipher(kms)  # Another device reading the same values
+    assert [reader.decrypt(value) for value in encrypted] == ["1", "12", ""]
+    assert kms.calls == 2  # The data key is unwrapped once
+
+
+def test_data_key_rotates_after_max_messages(clock):
+    kms = LocalKMS()
+    cipher = EnvelopeCipher(kms, max_messages=3)
+    keys = [wrapped_key(cipher.encrypt(str(n))) for n in range(7)]
+
+    assert keys[0] == keys[1] == keys[2]
+    assert keys[3] == keys[4] == keys[5] != keys[0]
+    assert keys[6] not in (keys[0], keys[3])
+    assert kms.calls == 3
+
+
+def test_data_key_rotates_after_max_age(clock):
+    kms = LocalKMS()
+    cipher = EnvelopeCipher(kms, max_age=60)
+    first = cipher.encrypt("1")
+    clock.now += 59
+    assert wrapped_key(cipher.encrypt("2")) == wrapped_key(first)
+
+    clock.now += 1
+    rotated = cipher.encrypt("3")
+    assert wrapped_key(rotated) != wrapped_key(first)
+    assert kms.calls == 2
+    assert cipher.decrypt(first) == "1"  # Values under the old key stay readable
+
+
+@pytest.mark.parametrize("value", [
+    "env1:",
+    "env1:no-separator",
+    "env1:not*base64:AAAA",
+])
+def test_malformed_value_raises_value_error(value):
+    with pytest.raises(ValueError):
+        EnvelopeCipher(LocalKMS()).decrypt(value)
+
+
+def test_tampered_value_raises_value_error():
+    cipher = EnvelopeCipher(LocalKMS())
+    prefix, wrapped, sealed = cipher.encrypt("5").split(":")
+    sealed = bytearray(base64.b64decode(sealed))
+    sealed[-1] ^= 1
+    tampered = ":".join([prefix, wrapped, base64.b64encode(bytes(sealed)).decode("utf-8")])
+
+    with pytest.raises(ValueError):
+        cipher.decrypt(tampered)
+
+
+def test_legacy_kms_amounts_still_decrypt_in_envelope_mode(user):
+    kms = user.kms
+    # Stored before envelope encryption was turned on
+    user.invoke("Add_Item", {"user_name": user.user_name, "list_name": "in_stock_list", "item": {
+        "name": "Milk", "amount": kms.encrypt_amount("2"), "expiration_date": "N/A", "entry_date": "01/01/2025"
+    }})
+
+    Is = InStock(user_name=user.user_name, envelope=EnvelopeCipher(kms), **user.clients)
+    Is.add_item("Kefir", "3", "N/A", "01/01/2025")
+    response = user.invoke("Get_Items", {"user_name": user.user_name, "list_name": "in_stock_list"})
+    stored = json.loads(response["body"])
+    assert [is_envelope(item["amount"]) for item in stored] == [False, True]
+
+    Is._cache = None
+    Is.decrypt_cache.clear()
+    assert [(item["name"], item["amount"]) for item in Is.get_items()] == [("Milk", "2"), ("Kefir", "3")]
+    assert Is.decrypt_failures == []
@@ -0,0 +1,105 @@
+import random
+from datetime import date, timedelta
+
+from expiry_scheduler import ExpiryScheduler, EXPIRING_SOON_DAYS
+from item_model import ItemList
+
+TODAY = date(2025, 3, 1)
+
+
+class ListStub:
+    """A list manager's cache: replaced on every write, unchanged dicts kept, like ItemManager."""
+
+    def __init__(self, list_name, items=()):
+        self.list_name = list_name
+        self.items = list(items)
+        self._item_list = None
+
+    def get_item_list(self):
+        self._item_list = ItemList.of(self.items, self._item_list)
+        return self._item_list
+
+    def add_item(self, name, amount=None, expiration_date=None, entry_date=None):
+        self.items = self.items + [{"name": name, "amount": amount, "expiration_date": expiration_date,
+                                    "entry_date": entry_date}]
+
+    def remove_item_by_name(self, name):
+        for index, item in enumerate(self.items):
+            if item["name"].lower() == name.lower():
+                self.items = self.items[:index] + self.items[index + 1:]
+                return
+
+
+def item(name, expires_in, amount="1"):
+    return {"name": name, "amount": amount, "entry_date": TODAY.strftime("%d/%m/%Y"),
+            "expiration_date": (TODAY + timedelta(days=expires_in)).strftime("%d/%m/%Y")}
+
+
+def fridge(in_stock=(), expiring_soon=()):
+    lists = (ListStub("in_stock_list", in_stock), ListStub("expiring_soon_list", expiring_soon),
+             ListStub("expired_list"), ListStub("shopping_list"))
+    return lists, ExpiryScheduler(*lists)
+
+
+def names(stub):
+    return [entry["name"] for entry in stub.items]
+
+
+def test_items_move_when_their_dates_come():
+    (Is, es, ex, sh), scheduler = fridge([item("Milk", 3), item("Tea", 30)], [item("Eggs", 0)])
+
+    batch = scheduler.run(TODAY)
+
+    assert batch.notifications == (("expiring_soon", "Milk"), ("expired", "Eggs"))
+    assert names(es) == ["Milk"] and names(ex) == ["Eggs"] and names(sh) == ["Eggs"]
+    assert scheduler.run(TODAY) == ((), ())
+    assert scheduler.next_due() == TODAY + timedelta(days=3)  # Milk's expiring-soon copy expires
+
+
+def test_changed_lists_update_the_heap_without_a_rebuild():
+    (Is, es, ex, sh), scheduler = fridge([item(f"Item {n}", 10 + n) for n in range(50)])
+    scheduler.run(TODAY)
+
+    Is.add_item(**{key: value for key, value in item("Milk", 2).items()})
+    Is.remove_item_by_name("Item 0")
+    batch = scheduler.run(TODAY)
+
+    assert batch.notifications == (("expiring_soon", "Milk"),)
+    assert scheduler.rebuilds == 1 and scheduler.updates >= 1
+
+    # Item 0 left before its day: nothing happens for it
+    batch = scheduler.run(TODAY + timedelta(days=10 - EXPIRING_SOON_DAYS))
+    assert ("expiring_soon", "Item 0") not in batch.notifications
+
+
+def test_removed_expiring_soon_copy_is_added_again():
+    (Is, es, ex, sh), scheduler = fridge([item("Milk", 3)])
+    scheduler.run(TODAY)
+    es.remove_item_by_name("Milk")
+
+    assert scheduler.run(TODAY).notifications == (("expiring_soon", "Milk"),)
+    assert names(es) == ["Milk"]
+
+
+def test_incremental_heap_matches_a_rebuild_every_tick():
+    rng = random.Random(7)
+    incremental, scheduler = fridge()
+    rebuilt, _ = fridge()
+    day = TODAY
+    for tick in range(300):
+        if rng.random() < 0.5:
+            entry = item(f"Item {rng.randrange(40)}", rng.randrange(-2, 15), str(rng.randrange(1, 4)))
+            for lists in (incremental, rebuilt):
+                lists[0].add_item(**entry)
+        if rng.random() < 0.2:
+            list_index, name = rng.randrange(3), f"Item {rng.randrange(40)}"
+            for lists in (incremental, rebuilt):
+                lists[list_index].remove_item_by_name(name)
+        if rng.random() < 0.1:
+            day += timedelta(days=1)
+
+        batch = scheduler.run(day)
+        expected = ExpiryScheduler(*rebuilt).run(day)  # A fresh heap every tick
+        assert batch.notifications == expected.notifications, tick
+        assert [lists.items for lists in incremental] == [lists.items for lists in rebuilt], tick
+    assert scheduler.rebuilds < 10
@@ -0,0 +1,121 @@
+import base64
+
+import item_manager
+from item_manager import DecryptCache, InStock, Shopping, clear_decrypt_caches
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def managers_for(user):
+    clients = user.clients
+    return user.kms, InStock(user_name=user.user_name, **clients), Shopping(user_name=user.user_name, **clients)
+
+
+def test_decrypt_cache_evicts_the_least_recently_used():
+    cache = DecryptCache(max_size=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"  # "b" is now the least recently used
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("1", "3")
+    assert cache.stats()["size"] == 2
+    assert cache.evictions == 1
+
+
+def test_decrypt_cache_entries_expire(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(item_manager.time, "monotonic", clock.monotonic)
+    cache = DecryptCache(ttl=60)
+    cache.put("a", "1")
+
+    clock.now += 59
+    assert cache.get("a") == "1"
+    clock.now += 1
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_unchanged_refresh_makes_no_kms_calls(user):
+    kms, Is, _ = managers_for(user)
+    Is.add_item("Milk", "2", "N/A", "01/01/2025")
+    Is.add_item("Eggs", "6", "N/A", "01/01/2025")
+    Is._cache = None
+    assert [item["amount"] for item in Is.get_items()] == ["2", "6"]
+
+    calls = kms.calls
+    Is._cache = None
+    assert [item["amount"] for item in Is.get_items()] == ["2", "6"]
+    assert kms.calls == calls
+
+
+def test_logout_clears_the_decrypt_caches(new_user):
+    kms, Is, sh = managers_for(new_user())
+    _, other, _ = managers_for(new_user())
+    Is.add_item("Milk", "2", "N/A", "01/01/2025")
+    other.add_item("Eggs", "6", "N/A", "01/01/2025")
+    assert Is.decrypt_cache is sh.decrypt_cache  # One cache per user
+    assert Is.decrypt_cache is not other.decrypt_cache
+
+    clear_decrypt_caches(Is.user_name)  # Switching away from one user
+    assert Is.decrypt_cache.stats()["size"] == 0
+    assert other.decrypt_cache.stats()["size"] == 1
+
+    calls = kms.calls
+    Is._cache = None
+    assert Is.get_items()[0]["amount"] == "2"
+    assert kms.calls == calls + 1  # Decrypted again
+
+    clear_decrypt_caches()  # Logout
+    assert Is.decrypt_cache.stats()["size"] == 0
+    assert other.decrypt_cache.stats()["size"] == 0
+
+
+def test_decrypt_items_keeps_the_order_and_the_items_that_decrypt(user):
+    kms, Is, _ = managers_for(user)
+    items = [{"name": f"Item {n}", "amount": kms.encrypt_amount(str(n))} for n in range(20)]
+    items[7]["amount"] = base64.b64encode(b"not a kms ciphertext").decode("utf-8")
+    items.insert(3, {"name": "No amount"})
+    expected = [(f"Item {n}", str(n)) for n in range(20)]
+    expected[7] = ("Item 7", None)
+    expected.insert(3, ("No amount", None))
+
+    decrypted = Is.decrypt_items(items)
+
+    assert [(item["name"], item.get("amount")) for item in decrypted] == expected
+    assert [(index, name) for index, name, _ in Is.decrypt_failures] == [(8, "Item 7")]
+
+
+def test_name_index_follows_every_change_of_the_list(user):
+    kms, Is, _ = managers_for(user)
+    assert not Is.has_item("Kefir")
+
+    Is.add_item("Kefir", "2", "N/A", "01/01/2025")
+    Is.add_item("Tofu", "1", "N/A", "01/01/2025")
+    assert Is.find_item("kefir")["amount"] == "2"  # Case-insensitive
+
+    Is.update_item("Kefir", 5)
+    assert Is.find_item("Kefir")["amount"] == "5"
+
+    Is.remove_item_by_name("KEFIR")
+    assert not Is.has_item("Kefir")
+    assert Is.has_item("Tofu")
+
+    # Replaced by the app behind the cache, then read again
+    user.invoke("Add_Item", {"user_name": user.user_name, "list_name": "in_stock_list", "item": {
+        "name": "Quinoa", "amount": kms.encrypt_amount("3"), "expiration_date": "N/A", "entry_date": "01/01/2025"
+    }})
+    Is.record_version.invalidate()
+    assert Is.find_item("quinoa")["amount"] == "3"
+    assert Is.has_item("Tofu")
+
+    Is.load_items([{"name": "Eggs", "amount": kms.encrypt_amount("6")}])
+    assert Is.find_item("Eggs")["amount"] == "6"
+    assert not Is.has_item("Tofu") and not Is.has_item("Quinoa")
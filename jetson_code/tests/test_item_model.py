@@ -0,0 +1,32 @@
+import pytest
+
+from item_model import Item
+
+PAYLOADS = [
+    {"name": "Milk", "amount": "2", "expiration_date": "05/01/2025", "entry_date": "01/01/2025"},
+    {"name": "Milk", "amount": "2", "expiration_date": "N/A", "entry_date": "01/01/2025"},
+    {"name": "Milk", "amount": None, "expiration_date": "N/A", "entry_date": "01/01/2025"},  # Failed to decrypt
+    {"name": "Milk"},
+    {"name": "Milk", "entry_date": "01/01/2025"},
+    {"name": "Milk", "amount": "2", "expiration_date": "N/A", "entry_date": "01/01/2025",
+     "item_key": "item#01HZX", "added_at": 1735689600000},  # Keys the model has no field for
+    {"name": "Milk", "added_by": "android"},
+]
+
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_payload_round_trips(payload):
+    item = Item.from_dict(payload)
+    assert item.to_dict() == payload
+    for key, value in payload.items():
+        assert item[key] == value
+
+
+def test_missing_fields_read_like_a_dict():
+    item = Item.from_dict({"name": "Milk", "entry_date": "01/01/2025"})
+    assert item.get("amount") is None
+    assert item.get("expiration_date", "N/A") == "N/A"
+    with pytest.raises(KeyError):
+        item["amount"]
+    assert item.quantity is None
+    assert item.expires == item.entry + 10
@@ -0,0 +1,149 @@
+import json
+
+from local_backends import LocalDynamoDB, local_lambda_for
+
+ROW_FUNCTIONS = ["Put_List_Item", "Update_List_Item", "Delete_List_Item", "Get_List_Items",
+                 "Get_User_Snapshot", "Migrate_To_Item_Rows"]
+
+
+def call(lambda_client, function_name, **event):
+    response = lambda_client.invoke(FunctionName=function_name, Payload=json.dumps(event))
+    return json.loads(response["Payload"].read())
+
+
+def item(name, amount="1", expiration_date="01/01/2030"):
+    return {"name": name, "amount": amount, "expiration_date": expiration_date, "entry_date": "01/01/2025"}
+
+
+def list_items(lambda_client, list_name):
+    response = call(lambda_client, "Get_List_Items", user_name="alice", list_name=list_name)
+    return json.loads(response["body"]), response["version"]
+
+
+def test_lists_keep_duplicate_names():
+    lambda_client = local_lambda_for(ROW_FUNCTIONS)
+    for amount in ("1", "2"):
+        response = call(lambda_client, "Put_List_Item", user_name="alice", list_name="expired_list",
+                        item=item("Milk", amount))
+        assert response["statusCode"] == 200
+
+    items, version = list_items(lambda_client, "expired_list")
+    assert [(entry["name"], entry["amount"]) for entry in items] == [("Milk", "1"), ("Milk", "2")]
+    assert version == 2
+
+
+def test_default_list_rejects_duplicates():
+    lambda_client = local_lambda_for(ROW_FUNCTIONS)
+    assert call(lambda_client, "Put_List_Item", user_name="alice", list_name="default_list",
+                item={"name": "Milk"})["statusCode"] == 200
+    assert call(lambda_client, "Put_List_Item", user_name="alice", list_name="default_list",
+                item={"name": "milk"})["statusCode"] == 400
+    assert list_items(lambda_client, "default_list") == (["Milk"], 1)
+
+
+def test_update_and_delete_address_the_first_row_with_the_name():
+    lambda_client = local_lambda_for(ROW_FUNCTIONS)
+    for amount in ("1", "2"):
+        call(lambda_client, "Put_List_Item", user_name="alice", list_name="shopping_list", item=item("Milk", amount))
+
+    assert call(lambda_client, "Update_List_Item", user_name="alice", list_name="shopping_list",
+                item={"name": "MILK", "amount": "5"})["version"] == 3
+    assert [entry["amount"] for entry in list_items(lambda_client, "shopping_list")[0]] == ["5", "2"]
+
+    assert call(lambda_client, "Delete_List_Item", user_name="alice", list_name="shopping_list",
+                item={"name": "milk"})["version"] == 4
+    assert [entry["amount"] for entry in list_items(lambda_client, "shopping_list")[0]] == ["2"]
+
+    call(lambda_client, "Delete_List_Item", user_name="alice", list_name="shopping_list", item={"name": "milk"})
+    assert call(lambda_client, "Delete_List_Item", user_name="alice", list_name="shopping_list",
+                item={"name": "milk"})["statusCode"] == 404
+
+
+def test_write_retries_when_the_version_moved_under_it():
+    dynamodb = LocalDynamoDB()
+    lambda_client = local_lambda_for(ROW_FUNCTIONS, dynamodb=dynamodb)
+    handler_globals = lambda_client.handlers["Put_List_Item"].__globals__
+    read_version = handler_globals["read_version"]
+    moves = []
+
+    def racing_read_version(user_name):
+        version = read_version(user_name)
+        if not moves:
+            # Another device writes between our read and our transaction
+            moves.append(version)
+            call(lambda_client, "Put_List_Item", user_name=user_name, list_name="in_stock_list", item=item("Eggs"))
+        return version
+
+    handler_globals["read_version"] = racing_read_version
+    response = call(lambda_client, "Put_List_Item", user_name="alice", list_name="in_stock_list", item=item("Milk"))
+
+    assert response["statusCode"] == 200 and response["version"] == 2
+    items, version = list_items(lambda_client, "in_stock_list")
+    assert [entry["name"] for entry in items] == ["Eggs", "Milk"]
+    assert version == 2  # Never behind the rows
+
+
+def test_migration_keeps_duplicate_names():
+    dynamodb = LocalDynamoDB()
+    record = {
+        "user_name": "alice",
+        "record_version": 7,
+        "in_stock_list": [item("Milk", "3")],
+        "expiring_soon_list": [],
+        "expired_list": [item("Milk", "1", "01/01/2024"), item("Milk", "2", "02/01/2024"), item("milk", "1")],
+        "shopping_list": [item("Milk"), item("Milk")],
+        "default_list": ["Milk", "Eggs"],
+    }
+    dynamodb.Table("property").put_item(Item=record)
+    lambda_client = local_lambda_for(ROW_FUNCTIONS, dynamodb=dynamodb)
+
+    response = call(lambda_client, "Migrate_To_Item_Rows")
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"]) == {"users": 1, "rows": 9, "skipped": 0}  # 8 items and the version row
+
+    snapshot = call(lambda_client, "Get_User_Snapshot", user_name="alice", schema="rows")
+    lists = json.loads(snapshot["body"])
+    for list_name in ("in_stock_list", "expired_list", "shopping_list", "default_list"):
+        assert lists[list_name] == record[list_name]
+    assert snapshot["version"] == 7
+
+
+
+def test_migration_skips_migrated_users():
+    dynamodb = LocalDynamoDB()
+    dynamodb.Table("property").put_item(Item={"user_name": "alice", "record_version": 7,
+                                              "in_stock_list": [item("Milk")], "shopping_list": [item("Eggs")]})
+    lambda_client = local_lambda_for(ROW_FUNCTIONS, dynamodb=dynamodb)
+    call(lambda_client, "Migrate_To_Item_Rows")
+    call(lambda_client, "Delete_List_Item", user_name="alice", list_name="shopping_list", item={"name": "Eggs"})
+    call(lambda_client, "Put_List_Item", user_name="alice", list_name="in_stock_list", item=item("Tea"))
+
+    response = call(lambda_client, "Migrate_To_Item_Rows")
+    assert json.loads(response["body"]) == {"users": 0, "rows": 0, "skipped": 1}
+    assert list_items(lambda_client, "shopping_list") == ([], 9)  # Eggs stays removed, the version moves on
+    response = call(lambda_client, "Put_List_Item", user_name="alice", list_name="in_stock_list", item=item("Oats"))
+    assert response["statusCode"] == 200 and response["version"] == 10
+    assert sorted(entry["name"] for entry in list_items(lambda_client, "in_stock_list")[0]) == ["Milk", "Oats", "Tea"]
+
+
+def test_replayed_writes_are_applied_once():
+    lambda_client = local_lambda_for(ROW_FUNCTIONS)
+    writes = [
+        ("Put_List_Item", {"item": item("Milk")}, "jetson:1"),
+        ("Put_List_Item", {"item": item("Eggs")}, "jetson:2"),
+        ("Update_List_Item", {"item": {"name": "Milk", "amount": "4"}}, "jetson:3"),
+        ("Delete_List_Item", {"item": {"name": "Eggs"}}, "jetson:4"),
+    ]
+    for function_name, event, key in writes + writes:
+        response = call(lambda_client, function_name, user_name="alice", list_name="in_stock_list",
+                        idempotency_key=key, **event)
+        assert response["statusCode"] == 200
+
+    items, version = list_items(lambda_client, "in_stock_list")
+    assert [(entry["name"], entry["amount"]) for entry in items] == [("Milk", "4")]
+    assert version == 4
+
+    # Another device's sequence numbers are its own
+    response = call(lambda_client, "Put_List_Item", user_name="alice", list_name="in_stock_list",
+                    item=item("Tea"), idempotency_key="phone:1")
+    assert response["version"] == 5
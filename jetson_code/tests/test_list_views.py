@@ -0,0 +1,213 @@
+import random
+from tkinter import ttk
+from types import SimpleNamespace
+
+from list_views import TreeviewBinder, VirtualTreeview, WINDOW_MARGIN, item_row, name_row
+
+
+class TreeviewStub:
+    """The part of ttk.Treeview the binder uses, counting the calls that change rows."""
+
+    def __init__(self):
+        self.children = []
+        self.values = {}
+        self.calls = []
+
+    def insert(self, parent, index, iid, values):
+        assert iid not in self.values, iid
+        self.children.insert(index, iid)
+        self.values[iid] = tuple(values)
+        self.calls.append(("insert", iid))
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.children.remove(iid)
+            del self.values[iid]
+        self.calls.append(("delete",) + iids)
+
+    def move(self, iid, parent, index):
+        self.children.remove(iid)
+        self.children.insert(index, iid)
+        self.calls.append(("move", iid))
+
+    def item(self, iid, values):
+        self.values[iid] = tuple(values)
+        self.calls.append(("item", iid))
+
+    def rows(self):
+        return [self.values[iid] for iid in self.children]
+
+
+def item(name, amount="1"):
+    return {"name": name, "amount": amount, "expiration_date": "N/A", "entry_date": "01/01/2025"}
+
+
+def test_unchanged_list_makes_no_calls():
+    treeview = TreeviewStub()
+    binder = TreeviewBinder(treeview, item_row)
+    items = [item("Milk"), item("Bread")]
+
+    assert binder.update(items)
+    assert treeview.calls == [("insert", "Milk"), ("insert", "Bread")]
+    treeview.calls = []
+
+    assert not binder.update(items)
+    assert not binder.update([dict(entry) for entry in items])  # A new list with the same rows
+    assert treeview.calls == []
+
+
+def test_only_the_changed_rows_are_touched():
+    treeview = TreeviewStub()
+    binder = TreeviewBinder(treeview, item_row)
+    binder.update([item("Milk"), item("Bread"), item("Eggs")])
+    treeview.calls = []
+
+    binder.update([item("Milk"), item("Bread", "2"), item("Eggs")])
+    assert treeview.calls == [("item", "Bread")]
+    treeview.calls = []
+
+    binder.update([item("Milk"), item("Tofu"), item("Bread", "2")])
+    assert treeview.calls == [("delete", "Eggs"), ("insert", "Tofu")]
+    assert treeview.children == ["Milk", "Tofu", "Bread"]
+
+
+def test_repeated_names_get_numbered_rows():
+    treeview = TreeviewStub()
+    binder = TreeviewBinder(treeview, item_row)
+    binder.update([item("Milk", "1"), item("Bread"), item("Milk", "2")])
+    assert treeview.children == ["Milk", "Bread", "Milk#2"]
+
+    binder.update([item("Bread"), item("Milk", "2")])  # The first milk was removed, like the Lambdas do
+    assert treeview.children == ["Bread", "Milk"]
+    assert treeview.rows() == [item_row(item("Bread")), item_row(item("Milk", "2"))]
+
+
+def test_clear_removes_every_row():
+    treeview = TreeviewStub()
+    binder = TreeviewBinder(treeview, name_row)
+    items = ["Milk", "Bread"]
+    binder.update(items)
+
+    binder.clear()
+    assert treeview.children == []
+    assert binder.update(items)  # Shown again after a clear
+    assert treeview.rows() == [("Milk",), ("Bread",)]
+
+
+def random_lists(seed, length=200):
+    rng = random.Random(seed)
+    items = []
+    for _ in range(length):
+        action = rng.random()
+        if action < 0.4 or not items:
+            items = list(items)
+            items.insert(rng.randrange(len(items) + 1), item(f"Item {rng.randrange(12)}", str(rng.randrange(3))))
+        elif action < 0.7:
+            items = items[:rng.randrange(len(items))] + items[rng.randrange(len(items)) + 1:]
+        elif action < 0.9:
+            items = list(items)
+            index = rng.randrange(len(items))
+            items[index] = item(items[index]["name"], str(rng.randrange(3)))
+        else:
+            items = rng.sample(items, len(items))
+        yield items
+
+
+def test_reconciled_rows_match_the_list():
+    treeview = TreeviewStub()
+    binder = TreeviewBinder(treeview, item_row)
+    for items in random_lists(3):
+        binder.update(items)
+        assert treeview.rows() == [item_row(entry) for entry in items]
+
+
+def test_reconciled_treeview_matches_the_list(root):
+    treeview = ttk.Treeview(root, columns=("item", "amount", "expiration_date", "entry_date"), show="headings")
+    binder = TreeviewBinder(treeview, item_row)
+    for items in random_lists(5, length=50):
+        binder.update(items)
+        rows = [tuple(str(value) for value in treeview.item(iid, "values")) for iid in treeview.get_children()]
+        assert rows == [item_row(entry) for entry in items]
+
+
+class ScrollingTreeviewStub(TreeviewStub):
+    """TreeviewStub with the configuration calls VirtualTreeview makes."""
+
+    def __init__(self, height=10, columns=("item", "amount", "expiration_date", "entry_date")):
+        super().__init__()
+        self.height = height
+        self.columns = columns
+        self.headings = {column: column.title() for column in columns}
+        self.bindings = {}
+
+    def cget(self, option):
+        assert option == "height"
+        return self.height
+
+    def configure(self, **options):
+        pass
+
+    def bind(self, event, callback, add=None):
+        self.bindings[event] = callback
+
+    def __getitem__(self, option):
+        assert option == "columns"
+        return self.columns
+
+    def heading(self, column, option=None, text=None, command=None):
+        if option == "text":
+            return self.headings[column]
+        if text is not None:
+            self.headings[column] = text
+
+
+class ScrollbarStub:
+    def __init__(self):
+        self.position = None
+
+    def configure(self, command):
+        self.command = command
+
+    def set(self, first, last):
+        self.position = (first, last)
+
+
+def test_only_the_rows_in_view_are_materialized():
+    treeview, scrollbar = ScrollingTreeviewStub(height=10), ScrollbarStub()
+    view = VirtualTreeview(treeview, scrollbar=scrollbar)
+    items = [item(f"Item {n:04}") for n in range(1000)]
+
+    view.update(items)
+    assert treeview.rows() == [item_row(entry) for entry in items[:10 + WINDOW_MARGIN]]
+    assert scrollbar.position == (0.0, 0.01)
+
+    scrollbar.command("moveto", "0.5")
+    assert treeview.rows() == [item_row(entry) for entry in items[500:510 + WINDOW_MARGIN]]
+    assert scrollbar.position == (0.5, 0.51)
+
+    scrollbar.command("scroll", 1, "pages")
+    treeview.bindings["<MouseWheel>"](SimpleNamespace(num=None, delta=-120))
+    assert view.offset == 513
+    assert treeview.rows() == [item_row(entry) for entry in items[513:523 + WINDOW_MARGIN]]
+
+    view.scroll_to(995)  # Stops at the last full page
+    assert treeview.rows() == [item_row(entry) for entry in items[990:]]
+    assert len(treeview.values) == 10
+
+
+def test_window_follows_the_sort_order_and_list_changes():
+    treeview = ScrollingTreeviewStub(height=3)
+    view = VirtualTreeview(treeview)
+    items = [item(name) for name in ("milk", "Bread", "eggs", "Apples", "tofu", "Cheese")]
+    view.update(items)
+    view.scroll_to(2)
+
+    view.sort_by("item")
+    assert view.offset == 0
+    assert treeview.headings["item"] == "Item ▲"
+    assert [row[0] for row in treeview.rows()] == ["Apples", "Bread", "Cheese", "eggs", "milk"]
+
+    view.scroll_to(3)
+    view.update(items[1:])  # Milk was removed; the window moves back to the last full page
+    assert view.offset == 2
+    assert [row[0] for row in treeview.rows()] == ["Cheese", "eggs", "tofu"]
@@ -0,0 +1,22 @@
+import os
+
+from local_backends import lambda_function_files, local_lambda_for, LAMBDA_FUNCTIONS_DIR
+
+
+def test_only_lambda_sources_are_loaded(tmp_path):
+    for name in ("Get_Items", "Delete_Item_Public (App)", "README.md", ".gitkeep", "Get_Items.swp", "__init__"):
+        (tmp_path / name).write_text("def lambda_handler(event, context):\n    return event\n")
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / "Get_Items_Old").mkdir()
+
+    assert lambda_function_files(str(tmp_path)) == {
+        "Get_Items": "Get_Items",
+        "Delete_Item_Public": "Delete_Item_Public (App)",
+    }
+
+
+def test_every_function_in_the_repository_loads():
+    files = lambda_function_files()
+    assert "README.md" not in files.values()
+    assert set(local_lambda_for().handlers) == set(files)
+    assert all(os.path.isfile(os.path.join(LAMBDA_FUNCTIONS_DIR, file_name)) for file_name in files.values())
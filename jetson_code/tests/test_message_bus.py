@@ -0,0 +1,81 @@
+import queue
+import time
+
+import pytest
+
+from message_bus import MessageBus, BusClient, RECOGNIZE_REQUEST, RECOGNITION_RESULT, LOGGED_OUT
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "bus.sock")
+
+
+def wait_for(condition, timeout=2.0):
+    give_up_at = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < give_up_at, "timed out"
+        time.sleep(0.005)
+
+
+def connected(bus, clients):
+    """Connect the clients and wait until the bus serves all of them."""
+    for client in clients:
+        assert client.connect(timeout=1)
+    wait_for(lambda: len(bus._connections) == len(clients))
+
+
+def test_published_message_reaches_the_subscribers(path):
+    bus = MessageBus(path).start()
+    requests = queue.Queue()
+    bus.subscribe(RECOGNIZE_REQUEST, requests.put)
+    gui, classifier, initial_gui = BusClient(path), BusClient(path), BusClient(path)
+    gui.subscribe(RECOGNITION_RESULT)  # Queued for drain()
+    logged_out = queue.Queue()
+    initial_gui.subscribe(LOGGED_OUT, logged_out.put)
+    connected(bus, [gui, classifier, initial_gui])
+
+    assert gui.publish(RECOGNIZE_REQUEST, direction="in")
+    assert requests.get(timeout=2).fields == {"direction": "in"}
+
+    assert classifier.publish(RECOGNITION_RESULT, item="Banana")
+    assert gui.messages.get(timeout=2).fields == {"item": "Banana"}
+
+    gui.publish(LOGGED_OUT)
+    assert logged_out.get(timeout=2).type == LOGGED_OUT
+    assert gui.messages.empty()  # Not sent back to the sender
+    for client in (gui, classifier, initial_gui):
+        client.close()
+    bus.close()
+
+
+def test_publish_reconnects_after_the_bus_restarted(path):
+    bus = MessageBus(path).start()
+    gui = BusClient(path)
+    connected(bus, [gui])
+
+    bus.close()  # management.py replaced on logout
+    wait_for(lambda: gui._socket is None)
+    assert not gui.publish(RECOGNIZE_REQUEST, direction="in")  # Nothing to connect to, no waiting
+
+    bus = MessageBus(path).start()
+    requests = queue.Queue()
+    bus.subscribe(RECOGNIZE_REQUEST, requests.put)
+    assert gui.publish(RECOGNIZE_REQUEST, direction="out")
+    assert requests.get(timeout=2).fields == {"direction": "out"}
+    gui.close()
+    bus.close()
+
+
+def test_connect_in_background_waits_for_the_bus(path):
+    gui = BusClient(path)
+    gui.subscribe(RECOGNITION_RESULT)
+    gui.connect_in_background(timeout=2)
+    time.sleep(0.1)  # Still starting
+    bus = MessageBus(path).start()
+
+    wait_for(lambda: len(bus._connections) == 1)
+    bus.publish(RECOGNITION_RESULT, item=None)
+    assert gui.messages.get(timeout=2).fields == {"item": None}
+    gui.close()
+    bus.close()
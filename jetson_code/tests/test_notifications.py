@@ -0,0 +1,33 @@
+from notifications import NotificationManager, summarize, MAX_NAMES
+
+
+def test_summarize_merges_events_of_a_kind():
+    events = [("expired", f"Item {n}") for n in range(5)] + [("expired", "Item 0"), ("expiring_soon", "Milk")]
+    events += [(None, ("Item added", "green"))] * 2
+
+    assert summarize(events) == [
+        (f"5 items expired: {', '.join(f'Item {n}' for n in range(MAX_NAMES))}, +2 more", "red"),
+        ("Item 'Milk' is expiring soon !", "orange"),
+        ("Item added (x2)", "green"),
+    ]
+
+
+def test_bursts_of_notifications_reuse_one_window(root):
+    notifications = NotificationManager(root, max_visible=3, flush_interval=0)
+    root.update()
+    widgets = len(root.winfo_children())
+    labels = len(notifications.window.winfo_children())
+
+    for burst in range(10):
+        for n in range(20):
+            notifications.notify("expired", f"Item {burst}-{n}")
+        notifications.show(f"Burst {burst}", "green")
+        notifications.flush()
+        root.update()
+        assert len(root.winfo_children()) == widgets
+        assert len(notifications.window.winfo_children()) == labels
+
+    assert len(notifications.messages) == 3
+    assert notifications.shown == 20  # One summary and one message per burst
+    assert notifications.dropped == 17
+    notifications.close()
@@ -0,0 +1,154 @@
+import json
+import threading
+import time
+
+import pytest
+from botocore.exceptions import EndpointConnectionError
+
+import item_manager
+from item_manager import IDEMPOTENT_FUNCTIONS
+from local_backends import FaultyLambda
+from offline_store import OfflineStore
+from resilience import ResilientCaller, CircuitBreaker
+
+
+class LostResponseLambda:
+    """Runs every write, then loses its response once, so the caller sends it again."""
+
+    def __init__(self, lambda_client):
+        self.lambda_client = lambda_client
+        self.lost = 0
+        self._seen = set()
+
+    def invoke(self, FunctionName, Payload, **kwargs):
+        response = self.lambda_client.invoke(FunctionName=FunctionName, Payload=Payload, **kwargs)
+        if FunctionName not in IDEMPOTENT_FUNCTIONS and (FunctionName, Payload) not in self._seen:
+            self._seen.add((FunctionName, Payload))
+            self.lost += 1
+            raise EndpointConnectionError(endpoint_url="https://lambda.local")
+        return response
+
+
+@pytest.fixture(autouse=True)
+def caller(monkeypatch):
+    monkeypatch.setattr(item_manager, "lambda_resilience",
+                        ResilientCaller(CircuitBreaker(failure_threshold=100), sleep=lambda delay: None))
+
+
+@pytest.fixture
+def backend(user):
+    return user.user_name, user.kms, user.lambda_client
+
+
+def queue_writes(store):
+    Is = store.list_manager("in_stock_list")
+    sh = store.list_manager("shopping_list")
+    default_list = store.default_list()
+    Is.add_item("Milk", "10", "N/A", "01/01/2025")
+    Is.add_item("Eggs", "6", "N/A", "01/01/2025")
+    Is.update_item("Eggs", 4)
+    Is.apply_transition("Milk", 3)
+    sh.add_item("Tea", "1", "N/A", "01/01/2025")
+    sh.remove_item_by_name("Tea")
+    default_list.add_item("Kefir")
+    default_list.add_item("Quinoa")
+    default_list.remove_item("Quinoa")
+    return 9
+
+
+def server_lists(store):
+    assert store.pull()
+    return {name: store._server[name] for name in ("in_stock_list", "shopping_list", "default_list")}
+
+
+def expected_lists(lambda_client, user_name):
+    """The lists after queue_writes, on top of the default list a new user starts with."""
+    response = lambda_client.invoke(FunctionName="Get_Default_Items", Payload=json.dumps({"user_name": user_name}))
+    seeded = json.loads(json.loads(response["Payload"].read())["body"])
+    return {
+        "in_stock_list": [{"name": "Milk", "amount": "7", "expiration_date": "N/A", "entry_date": "01/01/2025"},
+                          {"name": "Eggs", "amount": "4", "expiration_date": "N/A", "entry_date": "01/01/2025"}],
+        "shopping_list": [],
+        "default_list": seeded + ["Kefir"],
+    }
+
+
+def test_every_replayed_write_is_applied_once(backend, tmp_path):
+    user_name, kms, lambda_client = backend
+    lossy = LostResponseLambda(lambda_client)
+    expected = expected_lists(lambda_client, user_name)
+    store = OfflineStore(user_name, path=str(tmp_path / "lists.db"), lambda_client=lossy, kms_client=kms)
+    writes = queue_writes(store)
+
+    assert store.push()
+    assert lossy.lost >= writes  # Each write reached the Lambda twice
+    assert store.pending_count() == 0 and store.conflicts() == []
+    assert server_lists(store) == expected
+    store.close()
+
+
+def test_outbox_survives_a_restart_while_offline(backend, tmp_path):
+    user_name, kms, lambda_client = backend
+    faulty = FaultyLambda(lambda_client)
+    faulty.outage = True
+    path = str(tmp_path / "lists.db")
+    expected = expected_lists(lambda_client, user_name)
+    store = OfflineStore(user_name, path=path, lambda_client=faulty, kms_client=kms)
+    writes = queue_writes(store)
+    assert store.get_list("in_stock_list")[1]["amount"] == "4"  # Shown before it is synced
+
+    assert not store.push()
+    store.close()
+
+    faulty.outage = False
+    store = OfflineStore(user_name, path=path, lambda_client=faulty, kms_client=kms)
+    assert store.pending_count() == writes
+    assert store.push()
+    assert server_lists(store) == expected
+    assert store.get_list("default_list") == expected["default_list"]
+    store.close()
+
+
+def test_write_that_no_longer_applies_is_logged_as_a_conflict(backend, tmp_path):
+    user_name, kms, lambda_client = backend
+    store = OfflineStore(user_name, path=str(tmp_path / "lists.db"), lambda_client=lambda_client, kms_client=kms)
+    store.list_manager("shopping_list").remove_item_by_name("Coffee")
+
+    assert store.push()
+    [conflict] = store.conflicts()
+    assert conflict["op"] == "remove" and conflict["status_code"] == 404
+    store.close()
+
+
+def test_lists_changed_once_are_saved_once(backend, tmp_path):
+    user_name, kms, lambda_client = backend
+    store = OfflineStore(user_name, path=str(tmp_path / "lists.db"), lambda_client=lambda_client, kms_client=kms)
+    assert store._snapshot.refresh()
+    reported = []
+    store.add_listener(reported.append)
+
+    # Hold the first caller after it compared the item lists, while the second one starts
+    manager = store._remote["default_list"]
+    get_items = manager.get_items
+    entered, release = threading.Event(), threading.Event()
+
+    def slow_get_items():
+        if not entered.is_set():
+            entered.set()
+            release.wait(1)
+        return get_items()
+
+    manager.get_items = slow_get_items
+    sync = threading.Thread(target=store._store_server_lists)
+    sync.start()
+    assert entered.wait(1)
+    channel = threading.Thread(target=store._store_server_lists)
+    channel.start()
+    time.sleep(0.05)
+    release.set()
+    sync.join()
+    channel.join()
+
+    assert len(reported) == 1
+    assert "in_stock_list" in reported[0]
+    store.close()
@@ -0,0 +1,179 @@
+import json
+
+from item_manager import InStock, ExpiringSoon, RecordVersion
+
+
+class CacheStub:
+    def __init__(self, list_name):
+        self.list_name = list_name
+        self._cache = ["cached"]
+
+
+def record_with(*list_names):
+    record = RecordVersion()
+    managers = [CacheStub(list_name) for list_name in list_names]
+    for manager in managers:
+        record.managers.add(manager)
+    return record, managers
+
+
+def test_write_to_the_next_version_keeps_the_caches():
+    record, managers = record_with("in_stock_list", "shopping_list")
+    record.observe_read(3)
+
+    assert record.observe_write(4)
+    assert record.value == 4
+    assert all(manager._cache == ["cached"] for manager in managers)
+
+
+def test_write_past_a_gap_drops_every_cache():
+    record, managers = record_with("in_stock_list", "shopping_list")
+    record.observe_read(3)
+
+    assert not record.observe_write(6)  # Versions 4 and 5 were written elsewhere
+    assert record.value == 6
+    assert all(manager._cache is None for manager in managers)
+
+
+def test_write_before_any_read_drops_every_cache():
+    record, managers = record_with("in_stock_list")
+
+    assert not record.observe_write(1)
+    assert managers[0]._cache is None
+
+
+def test_moved_read_drops_the_other_caches_only():
+    record, (reader, other) = record_with("in_stock_list", "shopping_list")
+    record.observe_read(3, reader=reader)
+    record.observe_read(3, reader=other)
+    assert other._cache == ["cached"]  # Same version, nothing changed
+
+    record.observe_read(5, reader=reader)
+    assert reader._cache == ["cached"]
+    assert other._cache is None
+
+
+def test_claim_tells_seen_next_and_missing_versions():
+    record = RecordVersion()
+    assert record.claim(1) == "gap"  # Nothing loaded yet
+
+    record.observe_read(3)
+    assert record.claim(2) == "seen"
+    assert record.claim(3) == "seen"
+    assert record.claim(5) == "gap"
+    assert record.value == 3
+    assert record.claim(4) == "apply"
+    assert record.value == 4
+    assert record.claim(4) == "seen"
+
+
+def test_load_fills_the_listed_caches_and_drops_the_rest():
+    record = RecordVersion()
+
+    class LoadStub(CacheStub):
+        def load_items(self, items):
+            self._cache = items
+
+    loaded, missing = LoadStub("in_stock_list"), LoadStub("shopping_list")
+    record.managers.update((loaded, missing))
+
+    record.load({"in_stock_list": [{"name": "Milk"}]}, 7)
+    assert record.value == 7
+    assert loaded._cache == [{"name": "Milk"}]
+    assert missing._cache is None
+
+
+def managers_for(user):
+    return (user.kms, user.lambda_client, InStock(user_name=user.user_name, **user.clients),
+            ExpiringSoon(user_name=user.user_name, **user.clients))
+
+
+def test_own_writes_are_applied_to_the_cache_without_a_refetch(user):
+    _, lambda_client, Is, es = managers_for(user)
+    Is.get_items()
+    es.get_items()
+    reads = lambda_client.calls_by_function.get("Get_Items", 0)
+
+    Is.add_item("Kefir", "2", "N/A", "01/01/2025")
+    es.add_item("Quinoa", "1", "N/A", "01/01/2025")
+    Is.remove_item_by_name("Kefir")
+
+    assert Is.get_items() == []
+    assert [item["name"] for item in es.get_items()] == ["Quinoa"]
+    assert lambda_client.calls_by_function.get("Get_Items", 0) == reads
+
+
+def test_write_made_elsewhere_is_refetched(user):
+    kms, lambda_client, Is, es = managers_for(user)
+    Is.get_items()
+    es.get_items()
+
+    # The app adds an item behind the fridge's caches
+    lambda_client.invoke(FunctionName="Add_Item", Payload=json.dumps({
+        "user_name": Is.user_name, "list_name": "expiring_soon_list",
+        "item": {"name": "Tofu", "amount": kms.encrypt_amount("3"), "expiration_date": "N/A", "entry_date": "01/01/2025"}
+    }))
+    Is.add_item("Kefir", "2", "N/A", "01/01/2025")  # Skips a version, so both caches are stale
+    reads = lambda_client.calls_by_function.get("Get_Items", 0)
+
+    assert [item["name"] for item in Is.get_items()] == ["Kefir"]
+    assert [(item["name"], item["amount"]) for item in es.get_items()] == [("Tofu", "3")]
+    assert lambda_client.calls_by_function.get("Get_Items", 0) == reads + 2
+
+
+class RacingTable:
+    """Table whose first get_item lets another device write before the Lambda's update."""
+
+    def __init__(self, table, write):
+        self.table = table
+        self.write = write
+
+    def get_item(self, **kwargs):
+        response = self.table.get_item(**kwargs)
+        write, self.write = self.write, None
+        if write is not None:
+            write()
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+
+def test_remove_retries_when_the_list_moved_under_it(user):
+    kms, lambda_client, Is, _ = managers_for(user)
+    for name in ("Eggs", "Milk", "Tea", "Oats"):
+        Is.add_item(name, "1", "N/A", "01/01/2025")
+    handler_globals = lambda_client.handlers["Remove_Item"].__globals__
+    table = handler_globals["table"]
+
+    def remove_eggs_elsewhere():
+        handler_globals["table"] = table  # The other device's call reads the real table
+        lambda_client.invoke(FunctionName="Remove_Item", Payload=json.dumps(
+            {"user_name": Is.user_name, "list_name": "in_stock_list", "item": {"name": "Eggs"}}))
+
+    handler_globals["table"] = RacingTable(table, remove_eggs_elsewhere)
+    response = Is.remove_item_by_name("Tea")
+    handler_globals["table"] = table
+
+    assert response["statusCode"] == 200
+    Is._cache = None
+    assert [item["name"] for item in Is.get_items()] == ["Milk", "Oats"]
+
+
+def test_replayed_write_keeps_the_cache_at_its_version(user):
+    _, lambda_client, Is, es = managers_for(user)
+    Is.add_item("Kefir", "2", "N/A", "01/01/2025", idempotency_key="jetson:1")
+    Is.remove_item_by_name("Kefir", idempotency_key="jetson:2")
+    Is.get_items()
+    es.get_items()
+    version = Is.record_version.value
+    reads = lambda_client.calls_by_function.get("Get_Items", 0)
+
+    # The responses were lost and the outbox sends the writes again
+    for response in (Is.add_item("Kefir", "2", "N/A", "01/01/2025", idempotency_key="jetson:1"),
+                     Is.remove_item_by_name("Kefir", idempotency_key="jetson:2")):
+        assert response["duplicate"] and response["version"] == version
+
+    assert Is.get_items() == []
+    assert es.get_items() == []
+    assert lambda_client.calls_by_function.get("Get_Items", 0) == reads
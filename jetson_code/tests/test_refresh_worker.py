@@ -0,0 +1,114 @@
+import threading
+import time
+from datetime import date, timedelta
+
+from expiry_scheduler import ExpiryScheduler
+from item_manager import InStock, ExpiringSoon, Expired, Shopping
+from refresh_worker import RefreshWorker, RefreshResult
+
+
+def wait_for(condition, timeout=2.0):
+    give_up_at = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < give_up_at, "timed out"
+        time.sleep(0.005)
+
+
+def test_ticks_never_overlap():
+    running = []
+    overlaps = []
+    applied_at = []
+    started_at = []
+
+    def refresh():
+        started_at.append(time.monotonic())
+        running.append(1)
+        if len(running) > 1:
+            overlaps.append(len(running))
+        time.sleep(0.01)
+        running.pop()
+        return RefreshResult((), (), 0.0)
+
+    worker = RefreshWorker(refresh, interval=0.001).start()
+    try:
+        for _ in range(5):
+            for _ in range(10):
+                worker.request()  # Requests made during a tick fold into the next one
+            wait_for(lambda: not worker.results.empty())
+            time.sleep(0.02)  # The Tk thread is busy; the worker must wait for it
+            assert worker.results.qsize() == 1
+            applied_at.append(time.monotonic())
+            assert worker.drain(lambda result: None) == 1
+    finally:
+        worker.stop()
+
+    assert not overlaps
+    for applied, started in zip(applied_at, started_at[1:]):
+        assert started >= applied  # The next tick started after Tk applied the previous result
+
+
+def test_stop_ends_a_worker_waiting_for_tk():
+    worker = RefreshWorker(lambda: RefreshResult((), (), 0.0), interval=0.001).start()
+    wait_for(lambda: not worker.results.empty())  # Never drained
+
+    worker.stop()
+    worker._thread.join(timeout=2)
+    assert not worker._thread.is_alive()
+    assert worker.ticks == 1
+
+
+def test_stop_during_a_tick_starts_no_other_tick():
+    ticking = threading.Event()
+    release = threading.Event()
+
+    def refresh():
+        ticking.set()
+        release.wait(2)
+        return None
+
+    worker = RefreshWorker(refresh, interval=0.001).start()
+    assert ticking.wait(2)
+    worker.stop()
+    release.set()
+    worker._thread.join(timeout=2)
+    assert not worker._thread.is_alive()
+    assert worker.ticks == 1
+
+
+def test_expiry_moves_and_tk_writes_keep_the_caches_in_step(new_user):
+    user = new_user(latency=0.001)
+    managers = [cls(user_name=user.user_name, **user.clients) for cls in (InStock, ExpiringSoon, Expired, Shopping)]
+    Is, es, ex, sh = managers
+    for manager in managers:
+        manager.get_items()
+
+    today = date.today()
+    soon = (today + timedelta(days=2)).strftime("%d/%m/%Y")
+    later = (today + timedelta(days=60)).strftime("%d/%m/%Y")
+    for n in range(10):
+        Is.add_item(f"Soon {n}", "1", soon, today.strftime("%d/%m/%Y"))
+    scheduler = ExpiryScheduler(Is, es, ex, sh)
+
+    observe_write = Is.record_version.observe_write
+
+    def slow_observe_write(version):
+        result = observe_write(version)
+        time.sleep(0.002)  # Widens the gap between the version check and the cache update
+        return result
+
+    Is.record_version.observe_write = slow_observe_write
+
+    # The refresh worker moves the due items while the Tk thread adds to the same lists
+    moves = threading.Thread(target=scheduler.run)
+    moves.start()
+    for n in range(10):
+        Is.add_item(f"Later {n}", "1", later, today.strftime("%d/%m/%Y"))
+        es.add_item(f"Tk {n}", "1", soon, today.strftime("%d/%m/%Y"))
+    moves.join()
+
+    cached = {manager.list_name: [item["name"] for item in manager.get_items()] for manager in managers}
+    for manager in managers:
+        manager._cache = None
+    stored = {manager.list_name: [item["name"] for item in manager.get_items()] for manager in managers}
+    assert cached == stored
+    assert len(stored["expiring_soon_list"]) == 20
@@ -0,0 +1,154 @@
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+import item_manager
+from item_manager import invoke_lambda, UserSnapshot
+from local_backends import LocalLambda, FaultyLambda
+from resilience import (ResilientCaller, CircuitBreaker, CircuitOpenError, DeadlineExceeded, ServiceUnavailable,
+                        MAX_ATTEMPTS, BACKOFF_BASE, BACKOFF_CAP)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def echo_lambda():
+    return LocalLambda({name: (lambda event, context: {"statusCode": 200, "body": "[]"})
+                        for name in ("Get_Items", "Add_Item", "Get_Changes_Since")})
+
+
+@pytest.fixture
+def callers(monkeypatch):
+    """Fresh process-wide callers that record their backoff instead of sleeping."""
+    sleeps = []
+    caller = ResilientCaller(CircuitBreaker(failure_threshold=100), sleep=sleeps.append)
+    long_poll = ResilientCaller(CircuitBreaker(failure_threshold=1), sleep=sleeps.append)
+    monkeypatch.setattr(item_manager, "lambda_resilience", caller)
+    monkeypatch.setattr(item_manager, "long_poll_resilience", long_poll)
+    return caller, long_poll, sleeps
+
+
+def test_throttled_calls_are_retried_with_growing_backoff(callers):
+    caller, _, sleeps = callers
+    faulty = FaultyLambda(echo_lambda(), throttle_rate=1.0)
+
+    response = invoke_lambda(faulty, "Add_Item", {})
+
+    assert response["statusCode"] == 503
+    assert faulty.calls == MAX_ATTEMPTS
+    assert caller.retries == MAX_ATTEMPTS - 1
+    assert len(sleeps) == MAX_ATTEMPTS - 1
+    for retry, delay in enumerate(sleeps, start=1):
+        assert 0 <= delay <= min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (retry - 1))
+
+
+def test_server_errors_are_retried_for_reads_only(callers):
+    faulty = FaultyLambda(echo_lambda(), error_rate=1.0)
+    assert invoke_lambda(faulty, "Add_Item", {})["statusCode"] == 503
+    assert faulty.calls == 1  # The write may have happened
+
+    faulty = FaultyLambda(echo_lambda(), function_error_rate=1.0)
+    assert invoke_lambda(faulty, "Get_Items", {})["statusCode"] == 503
+    assert faulty.calls == MAX_ATTEMPTS
+
+
+def test_call_succeeds_after_transient_failures():
+    sleeps = []
+    caller = ResilientCaller(sleep=sleeps.append)
+    failures = [ClientError({"Error": {"Code": "ThrottlingException"}}, "Invoke")] * 2
+
+    def attempt():
+        if failures:
+            raise failures.pop()
+        return "done"
+
+    assert caller.call("test", attempt) == "done"
+    assert caller.retries == 2 and len(sleeps) == 2
+    assert caller.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_fatal_errors_are_raised_unchanged_and_not_retried():
+    caller = ResilientCaller(sleep=lambda delay: None)
+    calls = []
+
+    def attempt():
+        calls.append(1)
+        raise ClientError({"Error": {"Code": "ValidationException"}}, "Invoke")
+
+    with pytest.raises(ClientError):
+        caller.call("test", attempt, idempotent=True)
+    assert len(calls) == 1
+
+
+def test_deadline_expires_during_a_slow_call(callers):
+    caller, _, _ = callers
+    slow = FaultyLambda(echo_lambda(), latency=0.5)
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        caller.call("Get_Items", lambda: slow.invoke(FunctionName="Get_Items", Payload="{}"), deadline=0.1)
+    assert time.monotonic() - start < 0.4
+
+    assert invoke_lambda(slow, "Get_Items", {}, deadline=0.1)["statusCode"] == 503
+
+
+def test_breaker_opens_half_opens_and_closes():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=30, clock=clock)
+    caller = ResilientCaller(breaker, max_attempts=1)
+    faulty = FaultyLambda(echo_lambda())
+    faulty.outage = True
+
+    def attempt():
+        return faulty.invoke(FunctionName="Get_Items", Payload="{}")
+
+    for _ in range(2):
+        with pytest.raises(ServiceUnavailable):
+            caller.call("Get_Items", attempt)
+    assert breaker.state == CircuitBreaker.OPEN and breaker.is_open
+
+    with pytest.raises(CircuitOpenError):
+        caller.call("Get_Items", attempt)
+    assert faulty.calls == 2 and caller.rejected == 1
+
+    clock.now += 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # One trial at a time
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN  # The cooldown starts again
+
+    clock.now += 30
+    faulty.outage = False
+    assert caller.call("Get_Items", attempt)["StatusCode"] == 200
+    assert breaker.state == CircuitBreaker.CLOSED and not breaker.is_open
+
+
+def test_long_polls_use_their_own_breaker(callers):
+    caller, long_poll, _ = callers
+    faulty = FaultyLambda(echo_lambda())
+    faulty.outage = True
+    snapshot = UserSnapshot("long_poll_user", lambda_client=faulty)
+
+    assert snapshot.refresh_changes(wait=20) is False
+    assert long_poll.breaker.is_open
+    assert caller.breaker.state == CircuitBreaker.CLOSED  # The device is not shown offline
+
+    faulty.outage = False
+    assert invoke_lambda(faulty, "Get_Items", {})["statusCode"] == 200
+
+
+def test_half_open_long_poll_does_not_hold_back_other_calls(callers):
+    caller, long_poll, _ = callers
+    long_poll.breaker.cooldown = 0
+    long_poll.breaker.record_failure()
+    assert long_poll.breaker.allow()  # A long poll is now the half-open trial, waiting for changes
+
+    assert invoke_lambda(echo_lambda(), "Get_Items", {})["statusCode"] == 200
+    assert invoke_lambda(echo_lambda(), "Get_Changes_Since", {})["statusCode"] == 200  # Without a wait
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from item_manager import InStock, ExpiringSoon, Shopping
+
+
+@pytest.fixture(params=["record", "rows"])
+def fridge(request, user):
+    schema = request.param
+    clients = dict(user.clients, schema=schema)
+    Is = InStock("in_stock_list", user.user_name, **clients)
+    es = ExpiringSoon("expiring_soon_list", user.user_name, **clients)
+    sh = Shopping("shopping_list", user.user_name, **clients)
+    Is.add_item("Milk", "10", "N/A", "01/01/2025")
+    es.add_item("Milk", "10", "N/A", "01/01/2025")
+    return schema, user.kms, user.lambda_client, Is, es, sh
+
+
+def set_amount_elsewhere(fridge, amount):
+    """Change the stock amount the way another device would, behind the managers' caches."""
+    schema, kms, lambda_client, Is, _, _ = fridge
+    if schema == "record":
+        payload = {"user_name": Is.user_name, "list_name": "in_stock_list", "item_index": 0,
+                   "updated_item": {"name": "Milk", "amount": kms.encrypt_amount(amount),
+                                    "expiration_date": "N/A", "entry_date": "01/01/2025"}}
+        function_name = "Update_Item"
+    else:
+        payload = {"user_name": Is.user_name, "list_name": "in_stock_list",
+                   "item": {"name": "Milk", "amount": kms.encrypt_amount(amount)}}
+        function_name = "Update_List_Item"
+    response = lambda_client.invoke(FunctionName=function_name, Payload=json.dumps(payload))
+    assert json.loads(response["Payload"].read())["statusCode"] == 200
+
+
+def test_take_some_updates_the_item_and_its_copies(fridge):
+    _, _, _, Is, es, _ = fridge
+    assert Is.apply_transition("Milk", 2)["statusCode"] == 200
+    assert Is.get_item_amount("Milk") == "8"
+    assert es.get_item_amount("Milk") == "8"
+
+
+def test_take_all_moves_the_item_to_the_shopping_list(fridge):
+    _, _, _, Is, es, sh = fridge
+    assert Is.apply_transition("Milk", None, "02/01/2025")["statusCode"] == 200
+    assert Is.get_items() == [] and es.get_items() == []
+    assert sh.get_items() == [{"name": "Milk", "amount": "1", "expiration_date": "N/A", "entry_date": "02/01/2025"}]
+
+    # Taking it out again leaves a single shopping item
+    Is.add_item("Milk", "1", "N/A", "01/01/2025")
+    Is.apply_transition("Milk", None)
+    assert [item["name"] for item in sh.get_items()] == ["Milk"]
+
+
+def test_stale_amount_is_recomputed_from_a_fresh_read(fridge):
+    _, _, _, Is, es, _ = fridge
+    assert Is.get_item_amount("Milk") == "10"  # Cached
+    set_amount_elsewhere(fridge, 5)
+
+    assert Is.apply_transition("Milk", 2)["statusCode"] == 200
+    assert Is.get_item_amount("Milk") == "3"  # Not the 8 the cached amount gave
+
+
+def test_lambda_refuses_an_old_expected_version(fridge):
+    schema, kms, lambda_client, Is, _, _ = fridge
+    Is.get_items()
+    version = Is.record_version.value
+    set_amount_elsewhere(fridge, 5)
+
+    response = json.loads(lambda_client.invoke(FunctionName="Apply_Transition", Payload=json.dumps({
+        "user_name": Is.user_name, "item_name": "Milk", "new_amount": kms.encrypt_amount(8),
+        "expected_version": version, "schema": schema
+    }))["Payload"].read())
+
+    assert response["statusCode"] == 409
+    assert json.loads(response["body"])["version"] == version + 1
+    Is._cache = None
+    assert Is.get_item_amount("Milk") == "5"
+
+
+def test_replayed_transition_is_applied_once(fridge):
+    _, _, _, Is, _, _ = fridge
+    Is.apply_transition("Milk", 2, idempotency_key="jetson:1")
+    response = Is.apply_transition("Milk", 2, idempotency_key="jetson:1")
+    assert response["statusCode"] == 200 and response.get("duplicate")
+    assert Is.get_item_amount("Milk") == "8"